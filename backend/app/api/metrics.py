@@ -0,0 +1,24 @@
+"""Prometheus metrics API."""
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from ..core.circuit import OPEN, breakers
+from ..core.metrics import registry
+from ..core.tasks import task_scheduler
+
+router = APIRouter(prefix="/api", tags=["metrics"])
+
+registry.gauge("screener_screens_running", "运行中的筛选任务数", lambda: task_scheduler.running_count)
+registry.gauge("screener_screens_queued", "排队中的筛选任务数", lambda: task_scheduler.queued_count)
+registry.gauge("screener_source_circuit_open", "数据源是否熔断中（1 为熔断）",
+               lambda: {(name,): int(breaker.state == OPEN) for name, breaker in breakers.items()},
+               ("source",))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """数据源调用、限流等待、各阶段和写库耗时（Prometheus 文本格式）
+
+    多进程筛选时子进程内的调用不计入。
+    """
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
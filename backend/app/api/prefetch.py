@@ -0,0 +1,27 @@
+"""After-close prefetch API."""
+from fastapi import APIRouter
+
+from ..core.prefetch import prefetcher
+
+router = APIRouter(prefix="/api", tags=["prefetch"])
+
+
+@router.get("/prefetch/status")
+async def get_prefetch_status():
+    """获取收盘后预取的状态、下次运行时间和最近的运行记录"""
+    return prefetcher.status()
+
+
+@router.post("/prefetch/run")
+async def run_prefetch():
+    """立即执行一次预取（后台运行）"""
+    prefetcher.start()
+    prefetcher.trigger()
+    return {"message": "预取已开始"}
+
+
+@router.post("/prefetch/cancel")
+async def cancel_prefetch():
+    """中止正在进行的预取（本交易日不再自动重跑）"""
+    prefetcher.cancel_run()
+    return {"message": "正在中止预取..."}
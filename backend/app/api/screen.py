@@ -1,37 +1,58 @@
 """Stock screening API with task history and batch processing."""
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, BackgroundTasks, Body, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from typing import Optional, List
 import asyncio
+import bisect
+import json
 import uuid
 from concurrent.futures import ThreadPoolExecutor
-import threading
 from datetime import datetime
 
-from ..core.tushare_client import (
-    tushare_client,
-    set_cancel_state,
-    set_pause_state,
-    get_cancel_state,
-    reset_control_flags
+from ..core.tushare_client import tushare_client
+from ..core.broadcast import broadcaster, encode_event
+from ..core.config import settings
+from ..core.rules import Rule, compile_rules
+from ..core.sharded import screen_sharded
+from ..core.stock_detail import GZIP_MIN_BYTES
+from ..core.sectors import UNION, sector_index, sector_names
+from ..core.sweep import MAX_COMBINATIONS, hit_matrix
+from ..core.limit_up import MAIN_BOARD_LIMIT
+from ..core.tasks import (
+    ScreenTask,
+    TaskQueueFull,
+    task_scheduler,
+    QUEUED,
+    RUNNING,
+    PAUSED,
+    CANCELLED,
+    INTERRUPTED
 )
-from ..models import StockInfo
+from ..models import ScreenRule
 from ..database import (
     create_task,
-    update_task_progress,
+    progress_writer,
     complete_task,
-    save_task_results,
+    append_task_results,
+    checkpoint_task,
+    finalize_task_results,
+    mark_interrupted_tasks,
+    get_interrupted_tasks,
+    reopen_task,
     get_tasks,
     get_task,
     get_task_results,
+    count_task_results_by_rule,
     delete_task,
     get_task_stats
 )
 
 router = APIRouter(prefix="/api", tags=["screen"])
 executor = ThreadPoolExecutor(max_workers=1)
+progress_writer.interval = settings.progress_flush_interval
 
-# 全局进度状态
-_progress_state = {
+# 尚未启动过任务时的进度
+_IDLE_PROGRESS = {
     "current": 0,
     "total": 0,
     "found": 0,
@@ -40,50 +61,109 @@ _progress_state = {
     "current_batch": 0,
     "total_batches": 0,
     "task_id": None,
-    "lock": threading.Lock()
+    "progress": 0
 }
 
-_progress_results = []
 
+def _find_task(task_id: Optional[str]) -> ScreenTask:
+    """按 ID 查找内存中的任务，不指定时取最近提交的任务"""
+    task = task_scheduler.get(task_id)
+    if task is None:
+        raise HTTPException(status_code=404, detail="Task not found")
+    return task
 
-def _progress_callback(current: int, total: int, found: int, status: str):
-    """进度回调函数"""
-    with _progress_state["lock"]:
-        _progress_state["current"] = current
-        _progress_state["total"] = total
-        _progress_state["found"] = found
-        _progress_state["status"] = status
 
-        # Update database with progress
-        if _progress_state.get("task_id"):
-            update_task_progress(
-                _progress_state["task_id"],
-                current,
-                found,
-                status if status in ["running", "已暂停"] else None
-            )
+def _task_progress(task: ScreenTask) -> dict:
+    progress = task.snapshot()
+    progress["queue_position"] = task_scheduler.queue_position(task.task_id)
+    return progress
 
 
-def _run_batch_screen_task(
-    task_id: str,
-    lookback_days: int,
-    max_stocks: int,
-    screen_all: bool = False,
-    batch_size: int = 500,
-    sector: str = ""
-):
-    """后台批量筛选任务"""
-    global _progress_results
+def _publish_progress(task: ScreenTask):
+    """向推送订阅者广播任务进度（无订阅者时不做任何事）"""
+    if broadcaster.has_subscribers:
+        broadcaster.publish("progress", _task_progress(task), topic=task.task_id)
+
+
+def _result_callback(task: ScreenTask, result: dict):
+    """新发现符合条件的股票：追加到任务的结果日志并推送"""
+    row = task.results.append(result)
+    if broadcaster.has_subscribers:
+        broadcaster.publish("result", {**row, "task_id": task.task_id}, topic=task.task_id)
+
+
+def _progress_callback(task: ScreenTask, current: int, total: int, found: int, status: str):
+    """进度回调函数（只更新内存，数据库写入由 progress_writer 在后台合并）"""
+    task.update(current=current, total=total, found=found, status=status)
+    progress_writer.submit(
+        task.task_id,
+        current,
+        found,
+        status if status in [RUNNING, PAUSED] else None
+    )
+    _publish_progress(task)
+
+
+def _finish_task(task: ScreenTask, status: str):
+    """写入最终状态并广播"""
+    task.update(status=status, is_paused=False)
+    finalize_task_results(task.task_id, status)
+    _publish_progress(task)
+
+
+def _run_batch_screen_task(task: ScreenTask):
+    """后台批量筛选任务（由调度器在独立线程中执行）"""
+    task_id = task.task_id
+    control = task.control
+    params = task.params
+    lookback_days = params["lookback_days"]
+    max_stocks = params["max_stocks"]
+    screen_all = params["screen_all"]
+    batch_size = params["batch_size"]
+    sector = params.get("sectors") or params["sector"] or None
+    sector_mode = params.get("sector_mode", UNION)
+    bulk = params["bulk"]
+
+    # 同时运行的任务均分抓取线程，调用频率由全局限流器共享
+    workers = max(settings.fetch_workers // task_scheduler.max_running, 1)
+    on_progress = lambda c, t, f, s: _progress_callback(task, c, t, f, s)
+    on_result = lambda result: _result_callback(task, result)
+
+    progress_writer.submit(task_id, 0, 0, PAUSED if control.paused else RUNNING)
+    _publish_progress(task)
 
     try:
-        # Get stock list first to determine batches
-        stock_list = tushare_client.get_stock_list(sector=sector if sector else None)
+        if params.get("sweep"):
+            _run_sweep(task)
+            return
+
+        if params["panel"]:
+            # 矩阵引擎：一次性筛选，无需分批
+            results = tushare_client.screen_stocks_panel(
+                lookback_days=lookback_days,
+                max_stocks=None if screen_all else max_stocks,
+                sector=sector,
+                progress_callback=on_progress,
+                bulk=bulk,
+                control=control,
+                trading_days=params.get("trading_days", False),
+                rules=[Rule(**r) for r in params.get("rules") or []],
+                sector_mode=sector_mode
+            )
+            task.update(found=len(results))
+            append_task_results(task_id, results)
+            for result in results:
+                on_result(result)
+            _finish_task(task, CANCELLED if control.cancelled else "完成")
+            return
+
+        # 股票列表在任务开始时取一次，之后每批都使用这份快照（按 ts_code 排序）
+        stock_list = tushare_client.get_stock_list(sector=sector, sector_mode=sector_mode)
 
         if stock_list.empty:
-            with _progress_state["lock"]:
-                _progress_state["status"] = "完成"
-                _progress_state["error"] = "未获取到股票列表"
+            task.update(status="完成", error="未获取到股票列表")
             complete_task(task_id, "完成", found_count=0)
+            _publish_progress(task)
             return
 
         if screen_all:
@@ -91,74 +171,175 @@ def _run_batch_screen_task(
             batches = (total_stocks + batch_size - 1) // batch_size
         else:
             total_stocks = min(max_stocks, len(stock_list))
+            batch_size = max(total_stocks, 1)
             batches = 1
 
-        all_results = []
-        current_batch = 0
-
-        with _progress_state["lock"]:
-            _progress_state["total_batches"] = batches
-            _progress_state["total"] = total_stocks
-            _progress_state["current_batch"] = 0
-
-        for batch_idx in range(batches):
-            # Check for cancellation
-            if get_cancel_state():
-                with _progress_state["lock"]:
-                    _progress_state["status"] = "已取消"
-                complete_task(task_id, "已取消", found_count=len(all_results))
-                return
+        if params["processes"] > 0:
+            _run_sharded_screen(task, stock_list.iloc[:total_stocks])
+            return
 
-            # Handle pause
-            while get_cancel_state() == False and _progress_state.get("is_paused", False):
-                threading.Event().wait(0.1)
+        # 断点记录最后处理的代码，从其后继续（列表可能与中断前不同）
+        codes = stock_list['ts_code'].tolist()
+        on_checkpoint = lambda offset, results: checkpoint_task(
+            task_id, offset, results, codes[offset - 1] if offset else ""
+        )
 
-            if get_cancel_state():
-                complete_task(task_id, "已取消", found_count=len(all_results))
+        # 从断点继续时，断点之前的结果已预先载入任务的结果日志
+        resume_code = params.get("resume_code")
+        if resume_code:
+            start_offset = min(bisect.bisect_right(codes, resume_code), total_stocks)
+        else:
+            start_offset = min(params.get("start_offset", 0), total_stocks)
+        found_before = task.results.cursor
+        all_results = []
+        task.update(total_batches=batches, total=total_stocks, current=start_offset,
+                    current_batch=start_offset // batch_size)
+
+        position = start_offset
+        while position < total_stocks:
+            # Check for cancellation (waits here while paused)
+            if control.wait_while_paused():
+                _finish_task(task, CANCELLED)
                 return
 
-            current_batch = batch_idx + 1
-            start_idx = batch_idx * batch_size
-            end_idx = min(start_idx + batch_size, total_stocks)
-
-            with _progress_state["lock"]:
-                _progress_state["current_batch"] = current_batch
+            batch_idx = position // batch_size
+            end_idx = min((batch_idx + 1) * batch_size, total_stocks)
+            task.update(current_batch=batch_idx + 1)
 
-            # Process this batch - only reset flags on first batch
+            # 结果随断点写入数据库（每 checkpoint_interval 只股票一次）
             batch_results = tushare_client.screen_stocks_progressive(
                 lookback_days=lookback_days,
-                max_stocks=end_idx - start_idx,
+                max_stocks=end_idx - position,
                 progress_callback=lambda c, t, f, s: _progress_callback(
-                    c, total_stocks, len(all_results) + f, s
+                    task, c, total_stocks, found_before + len(all_results) + f, s
                 ),
-                start_offset=start_idx,
-                reset_flags=(batch_idx == 0)  # 仅第一批重置标志
+                start_offset=position,
+                bulk=(bulk and position == start_offset),  # 批量拉取只需在第一批执行
+                sector=sector,
+                result_callback=on_result,
+                control=control,
+                workers=workers,
+                checkpoint_callback=on_checkpoint,
+                trading_days=params.get("trading_days", False),
+                sector_mode=sector_mode,
+                stock_list=stock_list
             )
 
             all_results.extend(batch_results)
+            task.update(found=found_before + len(all_results))
+            position = end_idx
 
-            # Update progress
-            with _progress_state["lock"]:
-                _progress_results = all_results
-                _progress_state["found"] = len(all_results)
+        # All batches complete (the last batch may have been cancelled midway)
+        _finish_task(task, CANCELLED if control.cancelled else "完成")
 
-            # Save intermediate results
-            save_task_results(task_id, all_results)
-            update_task_progress(task_id, end_idx, len(all_results))
+    except Exception as e:
+        task.update(status=f"错误: {str(e)}", is_paused=False)
+        complete_task(task_id, f"错误: {str(e)}")
+        _publish_progress(task)
+
+
+def _run_sweep(task: ScreenTask):
+    """参数扫描：全部组合的结果按组合标识（rule 字段）存入同一个任务"""
+    grid = task.params["sweep"]
+    sweep = tushare_client.screen_stocks_sweep(
+        grid["lookbacks"], grid["thresholds"], grid["min_streaks"],
+        max_stocks=None if task.params["screen_all"] else task.params["max_stocks"],
+        sector=task.params.get("sectors") or task.params["sector"] or None,
+        progress_callback=lambda c, t, f, s: _progress_callback(task, c, t, f, s),
+        bulk=task.params["bulk"],
+        control=task.control,
+        trading_days=task.params.get("trading_days", False),
+        sector_mode=task.params.get("sector_mode", UNION)
+    )
 
-        # All batches complete
-        with _progress_state["lock"]:
-            _progress_results = all_results
-            _progress_state["status"] = "完成"
-            _progress_state["found"] = len(all_results)
+    if sweep is not None:
+        results = [r for hits in sweep["results"].values() for r in hits]
+        append_task_results(task.task_id, results)
+        task.results.extend(results)
+        task.update(found=len(results))
+    _finish_task(task, CANCELLED if task.control.cancelled else "完成")
 
-        save_task_results(task_id, all_results)
-        complete_task(task_id, "完成", found_count=len(all_results))
 
-    except Exception as e:
-        with _progress_state["lock"]:
-            _progress_state["status"] = f"错误: {str(e)}"
-        complete_task(_progress_state.get("task_id", ""), f"错误: {str(e)}")
+def _run_sharded_screen(task: ScreenTask, stock_list):
+    """多进程筛选：按进程分片处理，分片完成后按回落幅度合并结果"""
+    start_date, end_date = tushare_client.screen_window(
+        task.params["lookback_days"], task.params.get("trading_days", False)
+    )
+    task.update(total_batches=0, total=len(stock_list))
+
+    def on_results(new_results):
+        append_task_results(task.task_id, new_results)
+        for result in new_results:
+            _result_callback(task, result)
+
+    results = screen_sharded(
+        stock_list, start_date, end_date, task.params["processes"],
+        progress_callback=lambda c, t, f, s: _progress_callback(task, c, t, f, s),
+        results_callback=on_results,
+        control=task.control,
+        rate_share=task_scheduler.max_running
+    )
+
+    task.update(found=len(results))
+    _finish_task(task, CANCELLED if task.control.cancelled else "完成")
+
+
+def resume_interrupted_task(record: dict) -> ScreenTask:
+    """从断点继续一个已中断的任务（沿用原任务 ID）
+
+    分批筛选从最后一个断点继续，断点前的结果保留；矩阵引擎和多进程筛选
+    没有顺序断点，清空部分结果后重新计算，已拉取的日线在本地存储中，
+    不会重复调用数据源。
+
+    Raises:
+        TaskQueueFull: 排队任务已达上限（任务保持已中断状态）
+    """
+    task_id = record["task_id"]
+    params = json.loads(record["params"])
+    sequential = not params.get("panel") and not params.get("processes")
+    offset = (record.get("checkpoint_offset") or 0) if sequential else 0
+    resume_code = (record.get("checkpoint_code") or "") if sequential else ""
+
+    task = ScreenTask(task_id, {**params, "start_offset": offset, "resume_code": resume_code},
+                      priority=params.get("priority", 0))
+    if sequential:
+        task.results.extend(get_task_results(task_id))
+        task.update(current=offset, found=task.results.cursor)
+
+    reopen_task(task_id, QUEUED, clear_results=not sequential)
+    try:
+        task_scheduler.submit(task, _run_batch_screen_task)
+    except TaskQueueFull:
+        reopen_task(task_id, INTERRUPTED)
+        raise
+    return task
+
+
+def recover_interrupted_tasks() -> int:
+    """启动时调用：把上次进程遗留的运行中/排队任务标记为已中断
+
+    开启 auto_resume_tasks 时自动从断点继续。
+
+    Returns:
+        中断的任务数
+    """
+    records = mark_interrupted_tasks(INTERRUPTED)
+    if records:
+        print(f"发现 {len(records)} 个中断的筛选任务")
+
+    if settings.auto_resume_tasks:
+        for record in sorted(records, key=lambda r: r["created_at"]):
+            if not record.get("params"):
+                continue
+            try:
+                resume_interrupted_task(record)
+                print(f"已从断点继续任务 {record['task_id']} (第 {record.get('checkpoint_offset') or 0} 只)")
+            except TaskQueueFull:
+                break
+            except Exception as e:
+                print(f"继续任务 {record['task_id']} 失败: {e}")
+
+    return len(records)
 
 
 @router.post("/screen/start")
@@ -167,165 +348,343 @@ async def start_screen(
     max_stocks: int = Query(200, description="最多处理股票数"),
     screen_all: bool = Query(False, description="是否筛选全部股票"),
     batch_size: int = Query(500, description="分批筛选时每批数量"),
-    sector: str = Query("", description="板块名称")
+    sector: str = Query("", description="板块名称"),
+    sectors: List[str] = Query([], description="多个板块名称（可重复传入，与 sector 合并）"),
+    sector_mode: str = Query(UNION, pattern="^(union|intersection)$", description="多个板块取并集或交集"),
+    bulk: bool = Query(False, description="按交易日批量获取全市场日线（需 Tushare 权限）"),
+    panel: bool = Query(False, description="矩阵引擎：补齐本地数据后一次性筛选"),
+    processes: int = Query(0, ge=0, le=32, description="多进程筛选的进程数（0 表示单进程）"),
+    priority: int = Query(0, ge=-10, le=10, description="排队优先级（越大越先执行）"),
+    trading_days: bool = Query(False, description="回溯天数按交易日计算"),
+    rules: Optional[List[ScreenRule]] = Body(None, embed=True, description="自定义筛选规则（多套规则一次评估）")
 ):
     """启动筛选任务
 
+    可以同时提交多个任务：最多 max_concurrent_screens 个同时运行，
+    其余按优先级排队，队列满时返回 429。
+
+    请求体可以带 {"rules": [...]}：每条规则是一组连板数、回落幅度、连板后
+    交易日数、近期平均成交量/成交额的条件，全部规则在矩阵引擎上一次评估，
+    结果的 rule 字段为命中的规则名称。指定规则时自动使用矩阵引擎。
+
     Args:
         lookback_days: 回溯天数（默认180天）
         max_stocks: 最多处理股票数（默认200），screen_all=True时忽略
         screen_all: 是否筛选全部A股（约4000+只）
         batch_size: 分批筛选时每批数量（默认500）
         sector: 板块名称（可选）
+        sectors: 多个板块名称，按本地板块索引取并集或交集后筛选
+        sector_mode: union（属于任一板块）或 intersection（同时属于全部板块）
+        bulk: 按交易日批量获取全市场日线，约 120 次调用覆盖半年（需 Tushare 权限）
+        panel: 使用矩阵引擎，补齐本地日线后一次性计算全部股票
+        processes: 多进程筛选的进程数，按进程分片处理全部股票（0 表示单进程分批）
+        priority: 排队优先级，同优先级先到先得
+        trading_days: lookback_days 按交易日计算（默认按自然日）
+        rules: 自定义筛选规则，名称不能重复
     """
-    with _progress_state["lock"]:
-        if _progress_state["status"] == "running":
-            return {"message": "筛选任务已在运行中", "task_id": _progress_state.get("task_id")}
-
-        # Generate new task ID
-        task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
-        _progress_state["task_id"] = task_id
-        _progress_state["status"] = "running"
-        _progress_state["current"] = 0
-        _progress_state["found"] = 0
-        _progress_state["current_batch"] = 0
-        _progress_state["total_batches"] = 0
-
-    reset_control_flags()
+    if rules:
+        try:
+            compile_rules([Rule(**r.model_dump()) for r in rules])
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
+    # Generate new task ID
+    task_id = f"task_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    task = ScreenTask(task_id, {
+        "lookback_days": lookback_days,
+        "max_stocks": max_stocks,
+        "screen_all": screen_all,
+        "batch_size": batch_size,
+        "sector": sector,
+        "sectors": sector_names([sector, *sectors]),
+        "sector_mode": sector_mode,
+        "bulk": bulk,
+        "panel": panel or bool(rules),
+        "processes": 0 if rules else processes,
+        "trading_days": trading_days,
+        "rules": [r.model_dump() for r in rules] if rules else None
+    }, priority=priority)
 
     # Create task record
     total_stocks = 999999 if screen_all else max_stocks
-    create_task(task_id, lookback_days, max_stocks, total_stocks)
+    create_task(task_id, lookback_days, max_stocks, total_stocks, status=QUEUED,
+                params={**task.params, "priority": priority})
 
-    # Start background thread
-    thread = threading.Thread(
-        target=_run_batch_screen_task,
-        args=(task_id, lookback_days, max_stocks, screen_all, batch_size, sector)
-    )
-    thread.daemon = True
-    thread.start()
+    try:
+        started = task_scheduler.submit(task, _run_batch_screen_task)
+    except TaskQueueFull as e:
+        delete_task(task_id)
+        raise HTTPException(status_code=429, detail=str(e))
 
     return {
-        "message": "筛选任务已启动",
+        "message": "筛选任务已启动" if started else "筛选任务已排队",
         "task_id": task_id,
         "screen_all": screen_all,
-        "batches": _progress_state.get("total_batches", 1)
+        "batches": task.snapshot()["total_batches"] or 1,
+        "queued": not started,
+        "queue_position": task_scheduler.queue_position(task_id)
+    }
+
+
+@router.post("/screen/sweep")
+async def start_sweep(
+    lookbacks: List[int] = Body(..., embed=True, description="回溯天数列表"),
+    thresholds: List[float] = Body([0.1], embed=True, description="涨停阈值列表（主板等价涨幅，0.1 即涨停价）"),
+    min_streaks: List[int] = Body([3], embed=True, description="最少连板数列表"),
+    max_stocks: int = Query(200, description="最多处理股票数"),
+    screen_all: bool = Query(False, description="是否扫描全部股票"),
+    sector: str = Query("", description="板块名称"),
+    bulk: bool = Query(False, description="按交易日批量获取全市场日线（需 Tushare 权限）"),
+    priority: int = Query(0, ge=-10, le=10, description="排队优先级（越大越先执行）"),
+    trading_days: bool = Query(False, description="回溯天数按交易日计算")
+):
+    """启动参数扫描任务
+
+    按最长的回溯天数补齐一次本地日线，在同一个矩阵上评估
+    (回溯天数 × 涨停阈值 × 最少连板数) 的全部组合。每个组合的结果以
+    组合标识（如 L180/T0.1/S3）作为 rule 存入同一个任务，命中数矩阵通过
+    GET /screen/sweep/{task_id} 查询，单个组合的结果通过
+    GET /tasks/{task_id}/results?rule= 查询。
+    """
+    lookbacks, thresholds, min_streaks = (sorted(set(values)) for values in (lookbacks, thresholds, min_streaks))
+    if not lookbacks or not thresholds or not min_streaks:
+        raise HTTPException(status_code=400, detail="回溯天数、阈值和连板数都至少需要一个")
+    if min(lookbacks) < 1 or min(min_streaks) < 1 or not all(0 < t <= MAIN_BOARD_LIMIT for t in thresholds):
+        raise HTTPException(status_code=400, detail="回溯天数和连板数须为正数，阈值须在 (0, 0.1] 之间")
+    combinations = len(lookbacks) * len(thresholds) * len(min_streaks)
+    if combinations > MAX_COMBINATIONS:
+        raise HTTPException(status_code=400, detail=f"组合数 {combinations} 超过上限 {MAX_COMBINATIONS}")
+
+    task_id = f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    task = ScreenTask(task_id, {
+        "lookback_days": max(lookbacks),
+        "max_stocks": max_stocks,
+        "screen_all": screen_all,
+        "batch_size": max_stocks,
+        "sector": sector,
+        "bulk": bulk,
+        "panel": True,
+        "processes": 0,
+        "trading_days": trading_days,
+        "sweep": {"lookbacks": lookbacks, "thresholds": thresholds, "min_streaks": min_streaks}
+    }, priority=priority)
+
+    total_stocks = 999999 if screen_all else max_stocks
+    create_task(task_id, max(lookbacks), max_stocks, total_stocks, status=QUEUED,
+                params={**task.params, "priority": priority})
+
+    try:
+        started = task_scheduler.submit(task, _run_batch_screen_task)
+    except TaskQueueFull as e:
+        delete_task(task_id)
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {
+        "message": "参数扫描已启动" if started else "参数扫描已排队",
+        "task_id": task_id,
+        "combinations": combinations,
+        "queued": not started,
+        "queue_position": task_scheduler.queue_position(task_id)
+    }
+
+
+@router.get("/screen/sweep/{task_id}")
+async def get_sweep_matrix(task_id: str):
+    """参数扫描的命中数矩阵 hits[回溯][阈值][连板数]"""
+    record = get_task(task_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Task not found")
+    grid = json.loads(record["params"] or "{}").get("sweep")
+    if not grid:
+        raise HTTPException(status_code=400, detail="该任务不是参数扫描任务")
+
+    counts = count_task_results_by_rule(task_id)
+    return {
+        "task_id": task_id,
+        "status": record["status"],
+        **grid,
+        "hits": hit_matrix(grid["lookbacks"], grid["thresholds"], grid["min_streaks"], counts)
     }
 
 
 @router.post("/screen/pause")
-async def pause_screen():
-    """暂停筛选任务"""
-    set_pause_state(True)
-    with _progress_state["lock"]:
-        _progress_state["is_paused"] = True
-        _progress_state["status"] = "已暂停"
-        if _progress_state.get("task_id"):
-            update_task_progress(
-                _progress_state["task_id"],
-                _progress_state["current"],
-                _progress_state["found"],
-                "已暂停"
-            )
-    return {"message": "已暂停"}
+async def pause_screen(task_id: Optional[str] = Query(None, description="任务 ID（默认最近提交的任务）")):
+    """暂停筛选任务（排队中的任务启动后立即进入暂停）"""
+    task = _find_task(task_id)
+    if not task_scheduler.is_active(task.task_id):
+        return {"message": "任务已结束", "task_id": task.task_id}
+
+    task.control.set_paused(True)
+    queued = task.snapshot()["status"] == QUEUED
+    task.update(is_paused=True, **({} if queued else {"status": PAUSED}))
+    if not queued:
+        with task.lock:
+            current, found = task.state["current"], task.state["found"]
+        progress_writer.submit(task.task_id, current, found, PAUSED)
+    _publish_progress(task)
+    return {"message": "已暂停", "task_id": task.task_id}
 
 
 @router.post("/screen/resume")
-async def resume_screen():
+async def resume_screen(task_id: Optional[str] = Query(None, description="任务 ID（默认最近提交的任务）")):
     """继续筛选任务"""
-    set_pause_state(False)
-    with _progress_state["lock"]:
-        _progress_state["is_paused"] = False
-        _progress_state["status"] = "running"
-        if _progress_state.get("task_id"):
-            update_task_progress(
-                _progress_state["task_id"],
-                _progress_state["current"],
-                _progress_state["found"],
-                "running"
-            )
-    return {"message": "已继续"}
+    task = _find_task(task_id)
+    if not task_scheduler.is_active(task.task_id):
+        return {"message": "任务已结束", "task_id": task.task_id}
+
+    task.control.set_paused(False)
+    queued = task.snapshot()["status"] == QUEUED
+    task.update(is_paused=False, **({} if queued else {"status": RUNNING}))
+    if not queued:
+        with task.lock:
+            current, found = task.state["current"], task.state["found"]
+        progress_writer.submit(task.task_id, current, found, RUNNING)
+    _publish_progress(task)
+    return {"message": "已继续", "task_id": task.task_id}
 
 
 @router.post("/screen/cancel")
-async def cancel_screen():
-    """取消筛选任务"""
-    set_cancel_state(True)
-    set_pause_state(False)  # 先解除暂停
-    return {"message": "正在取消..."}
+async def cancel_screen(task_id: Optional[str] = Query(None, description="任务 ID（默认最近提交的任务）")):
+    """取消筛选任务（排队中的任务直接移出队列）"""
+    task = _find_task(task_id)
+    task.control.cancel()
+    if task_scheduler.dequeue(task.task_id):
+        _finish_task(task, CANCELLED)
+        return {"message": "已取消", "task_id": task.task_id}
+    return {"message": "正在取消...", "task_id": task.task_id}
 
 
 @router.get("/screen/progress")
-async def get_screen_progress():
-    """获取筛选进度"""
-    with _progress_state["lock"]:
-        batch_info = ""
-        if _progress_state.get("total_batches", 0) > 1:
-            batch_info = f" (批次 {_progress_state['current_batch']}/{_progress_state['total_batches']})"
-
-        return {
-            "current": _progress_state["current"],
-            "total": _progress_state["total"],
-            "found": _progress_state["found"],
-            "status": f"{_progress_state['status']}{batch_info}",
-            "is_paused": _progress_state["is_paused"],
-            "current_batch": _progress_state.get("current_batch", 0),
-            "total_batches": _progress_state.get("total_batches", 0),
-            "task_id": _progress_state.get("task_id"),
-            "progress": round(_progress_state["current"] / _progress_state["total"] * 100, 1)
-                if _progress_state["total"] > 0 else 0
-        }
-
-
-@router.get("/screen/results", response_model=list[StockInfo])
-async def get_screen_results():
-    """获取当前筛选结果"""
-    global _progress_results
-    return _progress_results
+async def get_screen_progress(task_id: Optional[str] = Query(None, description="任务 ID（默认最近提交的任务）")):
+    """获取筛选进度
 
+    内存中已没有该任务（例如服务重启过）时从任务历史中读取。
+    """
+    task = task_scheduler.get(task_id)
+    if task is not None:
+        return _task_progress(task)
+    if task_id is None:
+        return dict(_IDLE_PROGRESS)
+
+    record = get_task(task_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Task not found")
+    total = record["total_stocks"] or 0
+    return {
+        **_IDLE_PROGRESS,
+        "current": record["processed_stocks"],
+        "total": total,
+        "found": record["found_count"],
+        "status": record["status"],
+        "task_id": task_id,
+        "progress": round(record["processed_stocks"] / total * 100, 1) if total > 0 else 0
+    }
 
-@router.get("/stock/{ts_code}")
-async def get_stock_detail(ts_code: str, lookback_days: int = 180):
-    """获取单只股票的详细信息"""
-    from datetime import datetime, timedelta
 
-    end_date = datetime.now().strftime("%Y%m%d")
-    start_date = (datetime.now() - timedelta(days=lookback_days)).strftime("%Y%m%d")
+@router.get("/screen/tasks")
+async def list_screen_tasks():
+    """运行中、排队中和最近结束的筛选任务进度"""
+    return {
+        "running": task_scheduler.running_count,
+        "queued": task_scheduler.queued_count,
+        "max_running": task_scheduler.max_running,
+        "tasks": [_task_progress(task) for task in task_scheduler.tasks()]
+    }
 
-    try:
-        loop = asyncio.get_event_loop()
 
-        # 获取日线数据
-        daily_data = await loop.run_in_executor(
-            executor,
-            lambda: tushare_client.get_daily_data(ts_code, start_date, end_date)
-        )
+@router.get("/screen/stream")
+async def stream_screen(
+    request: Request,
+    task_id: Optional[str] = Query(None, description="只推送该任务的事件（默认推送全部任务）")
+):
+    """以 Server-Sent Events 推送筛选进度和新发现的股票
+
+    事件类型：
+    - progress: 与 /api/screen/progress 返回值相同
+    - result: 新发现的一只股票（StockInfo 字段，附带 seq 和 task_id）
+    - resync: 客户端跟不上导致事件被丢弃，需用 /api/screen/results?since= 补取结果
+    连接建立时先推送一次当前进度；空闲时每 15 秒发送一次注释保持连接。
+    """
+    async def event_stream():
+        queue = broadcaster.subscribe(topic=task_id)
+        try:
+            task = task_scheduler.get(task_id)
+            yield encode_event("progress", _task_progress(task) if task else _IDLE_PROGRESS)
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield b": keep-alive\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
-        if daily_data.empty:
-            raise HTTPException(status_code=404, detail="Stock not found")
 
-        # 查找涨停日
-        limit_up_periods = await loop.run_in_executor(
-            executor,
-            lambda: tushare_client.find_consecutive_limit_up(daily_data)
-        )
+@router.get("/screen/results")
+async def get_screen_results(
+    task_id: Optional[str] = Query(None, description="任务 ID（默认最近提交的任务）"),
+    since: Optional[int] = Query(None, ge=0, description="增量游标：只返回序号 >= since 的结果")
+):
+    """获取筛选任务的当前结果
+
+    不带 since 时返回全部结果（StockInfo 列表，按回落幅度降序，结果不变时
+    直接返回缓存的 JSON）；带 since 时返回
+    {"task_id", "cursor", "results"}，results 为新增结果（含 seq 序号），
+    下次请求把 cursor 作为 since 即可。
+    """
+    task = task_scheduler.get(task_id)
+    if task is None:
+        if task_id is None:
+            return [] if since is None else {"task_id": None, "cursor": 0, "results": []}
+        raise HTTPException(status_code=404, detail="Task not found")
+
+    if since is None:
+        return Response(content=task.results.snapshot_json(), media_type="application/json")
 
-        # 获取股票基本信息
-        stock_list = await loop.run_in_executor(
+    results, cursor = task.results.since(since)
+    return {"task_id": task.task_id, "cursor": cursor, "results": results}
+
+
+@router.get("/stock/{ts_code}")
+async def get_stock_detail(
+    request: Request,
+    ts_code: str,
+    lookback_days: int = 180,
+    trading_days: bool = False,
+    format: str = Query("records", pattern="^(records|columnar)$")
+):
+    """获取单只股票的详细信息（trading_days 为 True 时按交易日回溯）
+
+    format=columnar 时日线按字段返回数组。响应带 ETag（由最新日线日期决定），
+    请求带匹配的 If-None-Match 时返回 304；客户端接受 gzip 时压缩返回。
+    """
+    try:
+        loop = asyncio.get_event_loop()
+        entry = await loop.run_in_executor(
             executor,
-            lambda: tushare_client.get_stock_list()
+            lambda: tushare_client.stock_detail(ts_code, lookback_days, trading_days, format)
         )
-        stock_info = stock_list[stock_list['ts_code'] == ts_code]
-
-        return {
-            "ts_code": ts_code,
-            "name": stock_info.iloc[0]['name'] if not stock_info.empty else "",
-            "daily_data": daily_data.to_dict('records'),
-            "limit_up_periods": limit_up_periods
-        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Stock not found")
+
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if entry.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+
+    body = entry.body
+    if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("accept-encoding", ""):
+        body = entry.gzipped()
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 # ==================== Task History APIs ====================
 
@@ -339,6 +698,12 @@ async def list_tasks(
     return {"tasks": tasks}
 
 
+@router.get("/tasks/interrupted")
+async def list_interrupted_tasks():
+    """获取因服务重启而中断、可以继续的任务"""
+    return {"tasks": get_interrupted_tasks(INTERRUPTED)}
+
+
 @router.get("/tasks/stats")
 async def get_statistics():
     """获取任务统计信息"""
@@ -355,12 +720,39 @@ async def get_task_detail(task_id: str):
 
 
 @router.get("/tasks/{task_id}/results")
-async def get_task_result_stocks(task_id: str):
+async def get_task_result_stocks(
+    task_id: str,
+    rule: Optional[str] = Query(None, description="只返回该规则（或扫描组合）的结果")
+):
     """获取任务筛选结果"""
-    results = get_task_results(task_id)
+    results = get_task_results(task_id, rule)
     return results
 
 
+@router.post("/tasks/{task_id}/resume")
+async def resume_task(task_id: str):
+    """从最后一个断点继续已中断的任务"""
+    record = get_task(task_id)
+    if not record:
+        raise HTTPException(status_code=404, detail="Task not found")
+    if record["status"] != INTERRUPTED:
+        raise HTTPException(status_code=400, detail="只能继续已中断的任务")
+    if not record.get("params"):
+        raise HTTPException(status_code=400, detail="该任务没有保存筛选参数，无法继续")
+
+    try:
+        task = resume_interrupted_task(record)
+    except TaskQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {
+        "message": "任务已继续",
+        "task_id": task_id,
+        "start_offset": task.params["start_offset"],
+        "queue_position": task_scheduler.queue_position(task_id)
+    }
+
+
 @router.delete("/tasks/{task_id}")
 async def delete_task_record(task_id: str):
     """删除任务记录"""
@@ -370,6 +762,13 @@ async def delete_task_record(task_id: str):
     return {"message": "Task deleted"}
 
 
+@router.post("/stocks/refresh")
+async def refresh_stock_list():
+    """清空股票列表缓存，下次筛选时重新获取"""
+    tushare_client.invalidate_stock_list()
+    return {"message": "股票列表缓存已清空"}
+
+
 @router.get("/verify-token")
 async def verify_token():
     """验证 Tushare Token 是否有效"""
@@ -386,19 +785,26 @@ async def verify_token():
 
 @router.get("/sectors")
 async def get_sectors():
-    """获取板块列表"""
+    """获取板块列表（本地板块目录，过期时先返回旧目录并在后台刷新）"""
     try:
         loop = asyncio.get_event_loop()
         sectors = await loop.run_in_executor(
             executor,
             lambda: tushare_client.get_sector_list()
         )
-        return {"sectors": sectors}
+        return {"sectors": sectors, "index": sector_index.status()}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/sectors/refresh")
+async def refresh_sectors(background_tasks: BackgroundTasks):
+    """在后台重新获取板块目录和全部已知板块的成分股"""
+    background_tasks.add_task(sector_index.refresh)
+    return {"message": "板块数据刷新已开始"}
+
+
 @router.get("/health")
 async def health_check():
-    """健康检查"""
-    return {"status": "ok"}
+    """健康检查（不等待数据源库导入，data_sources_ready 表示是否已预热完成）"""
+    return {"status": "ok", "data_sources_ready": tushare_client.ready}
@@ -0,0 +1,22 @@
+"""Data source health API."""
+from fastapi import APIRouter, HTTPException
+
+from ..core.circuit import breakers
+
+router = APIRouter(prefix="/api", tags=["sources"])
+
+
+@router.get("/sources/health")
+async def get_sources_health():
+    """各数据源的熔断状态、连续失败次数、最近错误和累计调用统计"""
+    return {name: breaker.status() for name, breaker in breakers.items()}
+
+
+@router.post("/sources/{name}/reset")
+async def reset_source(name: str):
+    """手动恢复熔断中的数据源（例如更换 Token 后）"""
+    breaker = breakers.get(name)
+    if breaker is None:
+        raise HTTPException(status_code=404, detail=f"未知数据源: {name}")
+    breaker.reset()
+    return breaker.status()
@@ -0,0 +1,236 @@
+"""本地日线存储 - 每只股票一个定长记录的二进制文件，覆盖区间记录在 SQLite 索引中"""
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# 数据目录，可用环境变量 SCREENER_DATA_DIR 指定（例如离线基准使用临时目录）
+DATA_DIR = Path(os.environ.get("SCREENER_DATA_DIR") or Path(__file__).parent.parent.parent / "data")
+BAR_DIR = DATA_DIR / "bars"
+
+# 日线字段（trade_date 以 int32 YYYYMMDD 存储，其余为 float64）
+BAR_FIELDS = ['open', 'high', 'low', 'close', 'pre_close', 'pct_chg', 'vol', 'amount']
+BAR_DTYPE = np.dtype([('trade_date', 'i4')] + [(f, 'f8') for f in BAR_FIELDS])
+BAR_COLUMNS = ['ts_code', 'trade_date'] + BAR_FIELDS
+
+# 收盘后多久认为当日数据已定稿
+SETTLE_HOUR = 16
+
+
+def shift_date(date: str, days: int) -> str:
+    """YYYYMMDD 日期加减天数"""
+    return (datetime.strptime(date, "%Y%m%d") + timedelta(days=days)).strftime("%Y%m%d")
+
+
+class BarStore:
+    """按股票分文件的日线存储，支持增量追加"""
+
+    def __init__(self, root: Path = BAR_DIR):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._symbol_locks: dict[str, threading.Lock] = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        # 已读取过的日线常驻内存（附文件修改时间，其他进程写入后自动失效）
+        self._bars: dict[str, tuple[int, np.ndarray]] = {}
+
+    def _index(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.root.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.root / "index.db", check_same_thread=False, timeout=30)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    ts_code TEXT PRIMARY KEY,
+                    cov_start TEXT NOT NULL,
+                    cov_end TEXT NOT NULL,
+                    full_sync TEXT NOT NULL,
+                    rows INTEGER DEFAULT 0
+                )
+            """)
+            # 已按交易日整体入库的日期（全市场截面）
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS market_days (
+                    trade_date TEXT PRIMARY KEY,
+                    rows INTEGER DEFAULT 0
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def symbol_lock(self, ts_code: str) -> threading.Lock:
+        """同一只股票的读-补-写需要串行"""
+        with self._lock:
+            lock = self._symbol_locks.get(ts_code)
+            if lock is None:
+                lock = self._symbol_locks[ts_code] = threading.Lock()
+            return lock
+
+    def _path(self, ts_code: str) -> Path:
+        return self.root / f"{ts_code}.bin"
+
+    def coverage(self, ts_code: str) -> Optional[dict]:
+        """获取本地已覆盖的日期区间 {cov_start, cov_end, full_sync, rows}"""
+        with self._lock:
+            row = self._index().execute(
+                "SELECT cov_start, cov_end, full_sync, rows FROM coverage WHERE ts_code = ?",
+                (ts_code,)
+            ).fetchone()
+        if not row:
+            return None
+        return {'cov_start': row[0], 'cov_end': row[1], 'full_sync': row[2], 'rows': row[3]}
+
+    def load(self, ts_code: str) -> np.ndarray:
+        """读取全部本地日线（结构化数组，按日期升序，调用方不应修改返回值）"""
+        path = self._path(ts_code)
+        try:
+            mtime = path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        cached = self._bars.get(ts_code)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        try:
+            bars = np.fromfile(path, dtype=BAR_DTYPE)
+        except (OSError, ValueError) as e:
+            print(f"读取本地日线 {ts_code} 失败: {e}")
+            return np.empty(0, dtype=BAR_DTYPE)
+        self._bars[ts_code] = (mtime, bars)
+        return bars
+
+    def read(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """读取区间内的日线，格式与 DataClient.get_daily_data 一致"""
+        bars = self.load(ts_code)
+        mask = (bars['trade_date'] >= int(start_date)) & (bars['trade_date'] <= int(end_date))
+        return bars_to_frame(ts_code, bars[mask])
+
+    def merge(self, ts_code: str, df: pd.DataFrame, cov_start: str, cov_end: str, full_sync: bool = False):
+        """合并新数据并扩展覆盖区间
+
+        Args:
+            df: 新获取的日线（get_daily_data 格式）
+            cov_start/cov_end: 本次请求实际覆盖的区间（即使当中没有交易也算已覆盖）
+            full_sync: 是否为全量重建（丢弃旧数据）
+        """
+        if cov_start > cov_end:
+            return
+
+        new_bars = frame_to_bars(df)
+        new_bars = new_bars[(new_bars['trade_date'] >= int(cov_start)) &
+                            (new_bars['trade_date'] <= int(cov_end))]
+        old = None if full_sync else self.coverage(ts_code)
+
+        if old is None:
+            bars = new_bars
+            start, end = cov_start, cov_end
+            synced = datetime.now().strftime("%Y%m%d")
+        else:
+            bars = np.concatenate([self.load(ts_code), new_bars])
+            # 同一日期以新数据为准
+            _, keep = np.unique(bars['trade_date'][::-1], return_index=True)
+            bars = bars[::-1][keep]
+            synced = old['full_sync']
+            # 区间相连才能合并，否则保留较新的一段
+            if cov_start <= shift_date(old['cov_end'], 1) and cov_end >= shift_date(old['cov_start'], -1):
+                start, end = min(cov_start, old['cov_start']), max(cov_end, old['cov_end'])
+            elif cov_end > old['cov_end']:
+                start, end = cov_start, cov_end
+            else:
+                start, end = old['cov_start'], old['cov_end']
+
+        bars = np.sort(bars, order='trade_date')
+        _fill_pre_close(bars)
+        self._write(ts_code, bars)
+
+        with self._lock:
+            conn = self._index()
+            conn.execute("""
+                INSERT OR REPLACE INTO coverage (ts_code, cov_start, cov_end, full_sync, rows)
+                VALUES (?, ?, ?, ?, ?)
+            """, (ts_code, start, end, synced, len(bars)))
+            conn.commit()
+
+    def _write(self, ts_code: str, bars: np.ndarray):
+        path = self._path(ts_code)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        bars.tofile(tmp)
+        os.replace(tmp, path)
+        self._bars[ts_code] = (path.stat().st_mtime_ns, bars)
+
+    def ingested_dates(self, start_date: str, end_date: str) -> set[str]:
+        """区间内已整体入库的交易日"""
+        with self._lock:
+            rows = self._index().execute(
+                "SELECT trade_date FROM market_days WHERE trade_date BETWEEN ? AND ?",
+                (start_date, end_date)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def mark_ingested(self, trade_date: str, rows: int):
+        """记录某个交易日的全市场数据已入库"""
+        with self._lock:
+            conn = self._index()
+            conn.execute("INSERT OR REPLACE INTO market_days (trade_date, rows) VALUES (?, ?)",
+                         (trade_date, rows))
+            conn.commit()
+
+    def invalidate(self, ts_code: Optional[str] = None):
+        """删除某只（或全部）股票的本地数据"""
+        with self._lock:
+            conn = self._index()
+            if ts_code:
+                conn.execute("DELETE FROM coverage WHERE ts_code = ?", (ts_code,))
+                paths = [self._path(ts_code)]
+                self._bars.pop(ts_code, None)
+            else:
+                conn.execute("DELETE FROM coverage")
+                conn.execute("DELETE FROM market_days")
+                paths = list(self.root.glob("*.bin"))
+                self._bars.clear()
+            conn.commit()
+        for path in paths:
+            path.unlink(missing_ok=True)
+
+
+def frame_to_bars(df: pd.DataFrame) -> np.ndarray:
+    """DataFrame -> 结构化数组"""
+    if df is None or df.empty:
+        return np.empty(0, dtype=BAR_DTYPE)
+    bars = np.empty(len(df), dtype=BAR_DTYPE)
+    bars['trade_date'] = pd.to_numeric(df['trade_date'].astype(str).str.replace('-', ''), errors='coerce').fillna(0).astype('i4')
+    for field in BAR_FIELDS:
+        if field in df.columns:
+            bars[field] = pd.to_numeric(df[field], errors='coerce').to_numpy(dtype='f8')
+        else:
+            bars[field] = np.nan
+    return bars[bars['trade_date'] > 0]
+
+
+def bars_to_frame(ts_code: str, bars: np.ndarray) -> pd.DataFrame:
+    """结构化数组 -> DataFrame（与 get_daily_data 返回格式一致）"""
+    if len(bars) == 0:
+        return pd.DataFrame()
+    df = pd.DataFrame({field: bars[field] for field in BAR_FIELDS})
+    df.insert(0, 'trade_date', bars['trade_date'].astype(str))
+    df.insert(0, 'ts_code', ts_code)
+    return df[BAR_COLUMNS]
+
+
+def _fill_pre_close(bars: np.ndarray):
+    """缺少前收盘价的行（AkShare 数据没有涨跌额/涨跌幅时的首行）用上一行收盘价补齐"""
+    if len(bars) < 2:
+        return
+    missing = np.isnan(bars['pre_close'][1:])
+    if missing.any():
+        bars['pre_close'][1:][missing] = bars['close'][:-1][missing]
+
+
+# 全局实例
+bar_store = BarStore()
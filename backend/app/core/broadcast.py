@@ -0,0 +1,78 @@
+"""事件广播 - 把筛选线程中的进度/结果推送给所有 SSE 订阅者"""
+import asyncio
+import json
+import threading
+from typing import Optional
+
+# 每个订阅者最多缓存的事件数，客户端跟不上时清空积压并发送 resync 事件
+SUBSCRIBER_QUEUE_SIZE = 256
+
+
+def encode_event(event: str, data) -> bytes:
+    """编码为 SSE 消息"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+
+
+# 订阅者队列溢出后发送的事件，客户端收到后按 seq 补取丢失的结果
+RESYNC_EVENT = encode_event("resync", {})
+
+
+class Broadcaster:
+    """线程安全的一对多事件广播
+
+    publish() 可以在任意线程调用；没有订阅者时直接返回，不做任何序列化。
+    每个事件只编码一次，再分发到各订阅者所在事件循环的队列中。
+    订阅时可指定 topic（例如任务 ID），只接收该 topic 的事件；不指定则接收全部。
+    """
+
+    def __init__(self):
+        self._subscribers: set[tuple[asyncio.AbstractEventLoop, asyncio.Queue, Optional[str]]] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    def subscribe(self, topic: Optional[str] = None) -> asyncio.Queue:
+        """在事件循环中调用，返回接收事件的队列"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.add((asyncio.get_running_loop(), queue, topic))
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers = {s for s in self._subscribers if s[1] is not queue}
+
+    def publish(self, event: str, data, payload: Optional[bytes] = None,
+                topic: Optional[str] = None):
+        """广播事件（payload 为已编码的消息时直接使用）"""
+        if not self._subscribers:
+            return
+
+        with self._lock:
+            subscribers = [s for s in self._subscribers if s[2] is None or s[2] == topic]
+        if not subscribers:
+            return
+
+        payload = payload or encode_event(event, data)
+        for loop, queue, _ in subscribers:
+            try:
+                loop.call_soon_threadsafe(_offer, queue, payload)
+            except RuntimeError:
+                # 事件循环已关闭
+                self.unsubscribe(queue)
+
+
+def _offer(queue: asyncio.Queue, payload: bytes):
+    if queue.full():
+        # 客户端跟不上：丢弃积压的事件，通知客户端通过 /api/screen/results?since= 补取结果
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(RESYNC_EVENT)
+    queue.put_nowait(payload)
+
+
+# 全局实例
+broadcaster = Broadcaster()
@@ -0,0 +1,142 @@
+"""数据源熔断 - 连续失败的数据源暂时跳过，直接使用另一个数据源，定期试探恢复"""
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Optional
+
+from .config import settings
+
+CLOSED = "closed"  # 正常
+OPEN = "open"  # 熔断中，调用直接跳过
+HALF_OPEN = "half_open"  # 试探中，只放行一个调用
+
+
+class CircuitBreaker:
+    """单个数据源的熔断器
+
+    连续失败 failure_threshold 次后熔断，recovery_seconds 秒内该数据源的调用
+    全部跳过；之后放行一个试探调用，成功则恢复，失败则重新计时。试探调用
+    超过 recovery_seconds 仍未返回结果时允许再次试探。
+
+    Args:
+        name: 数据源名称
+        failure_threshold: 连续失败多少次后熔断
+        recovery_seconds: 熔断多久后试探
+        clock: 单调时钟（便于测试）
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self.failure_threshold = max(failure_threshold, 1)
+        self.recovery_seconds = recovery_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_started: Optional[float] = None
+        self._consecutive_failures = 0
+        self._stats = {
+            "successes": 0,
+            "failures": 0,
+            "short_circuited": 0,
+            "trips": 0,
+        }
+        self._last_error = ""
+        self._last_failure: Optional[str] = None
+        self._last_success: Optional[str] = None
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow(self) -> bool:
+        """本次是否可以调用该数据源（熔断期间返回 False，到期后放行一个试探）"""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            now = self._clock()
+            if self._state == OPEN and now - self._opened_at >= self.recovery_seconds:
+                self._state = HALF_OPEN
+                self._probe_started = None
+
+            if self._state == HALF_OPEN and (
+                self._probe_started is None or now - self._probe_started >= self.recovery_seconds
+            ):
+                self._probe_started = now
+                return True
+
+            self._stats["short_circuited"] += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            self._last_success = datetime.now().isoformat(timespec="seconds")
+            if self._state != CLOSED:
+                print(f"数据源 {self.name} 已恢复")
+            self._state = CLOSED
+            self._probe_started = None
+
+    def record_failure(self, error: Optional[BaseException] = None):
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            self._last_error = str(error) if error is not None else ""
+            self._last_failure = datetime.now().isoformat(timespec="seconds")
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                if self._state == CLOSED:
+                    print(f"数据源 {self.name} 连续失败 {self._consecutive_failures} 次，"
+                          f"熔断 {self.recovery_seconds:g} 秒")
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._probe_started = None
+                self._stats["trips"] += 1
+
+    @contextmanager
+    def guard(self):
+        """记录 with 块内调用的成功/失败（异常照常抛出）"""
+        try:
+            yield
+        except Exception as e:
+            self.record_failure(e)
+            raise
+        self.record_success()
+
+    def reset(self):
+        """手动恢复（例如更换了 Token）"""
+        with self._lock:
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            self._probe_started = None
+
+    def status(self) -> dict:
+        """当前状态和累计统计"""
+        with self._lock:
+            retry_in = 0.0
+            if self._state == OPEN:
+                retry_in = max(self.recovery_seconds - (self._clock() - self._opened_at), 0.0)
+            return {
+                "name": self.name,
+                "state": self._state,
+                "healthy": self._state == CLOSED,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in": round(retry_in, 1),
+                "last_error": self._last_error,
+                "last_failure": self._last_failure,
+                "last_success": self._last_success,
+                **self._stats,
+            }
+
+
+# 每个数据源一个熔断器，所有线程共享
+breakers = {
+    name: CircuitBreaker(name, settings.circuit_failure_threshold, settings.circuit_recovery_seconds)
+    for name in ('akshare', 'tushare')
+}
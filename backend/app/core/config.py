@@ -3,9 +3,29 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     tushare_token: str
-    cache_days: int = 7  # 缓存天数
+    cache_days: int = 7  # 本地日线缓存天数（超过后全量重新同步）
     limit_up_threshold: float = 0.095  # 涨停阈值 9.5% (容错)
     lookback_days: int = 180  # 回溯天数（半年）
+    tushare_calls_per_minute: int = 120  # Tushare 免费账户每分钟调用上限
+    akshare_calls_per_minute: int = 300  # AkShare 每分钟调用上限（避免被限流）
+    fetch_workers: int = 4  # 并发获取日线的线程数
+    stock_list_ttl: int = 3600  # 股票列表缓存秒数
+    progress_flush_interval: float = 1.0  # 任务进度写入数据库的最小间隔（秒）
+    max_concurrent_screens: int = 2  # 同时运行的筛选任务数（共享 fetch_workers 和调用频率）
+    screen_queue_size: int = 16  # 排队等待的筛选任务数上限
+    checkpoint_interval: int = 100  # 每处理多少只股票保存一次断点
+    auto_resume_tasks: bool = False  # 启动时自动继续上次中断的任务
+    prefetch_enabled: bool = True  # 收盘后自动预取全市场日线
+    prefetch_time: str = "16:30"  # 交易日预取开始时间 (HH:MM)
+    prefetch_lookback_days: int = 400  # 预取覆盖的自然日数（覆盖按交易日回溯的筛选）
+    prefetch_calls_per_minute: int = 60  # 预取占用的数据源调用频率上限
+    prefetch_bulk: bool = False  # 先按交易日批量获取全市场日线（需 Tushare 权限）
+    circuit_failure_threshold: int = 5  # 数据源连续失败多少次后熔断（期间直接使用另一个数据源）
+    circuit_recovery_seconds: float = 60.0  # 熔断多久后试探恢复（秒）
+    sector_refresh_hours: float = 24.0  # 板块目录和成分股超过多少小时后在后台刷新
+    detail_cache_size: int = 256  # 内存中缓存的股票详情数（最近查看）
+    warm_up_data_sources: bool = True  # 启动后在后台预先导入 Tushare/AkShare（不阻塞启动）
+    data_source: str = "live"  # 数据源：live（AkShare/Tushare）或 fake（合成数据，离线演示/基准）
 
     class Config:
         env_file = ".env"
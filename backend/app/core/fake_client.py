@@ -0,0 +1,205 @@
+"""合成数据源 - 离线生成确定性的日线（含注入的连板），用于基准测试和离线演示"""
+import random
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .limit_up import limit_rate, limit_up_price
+from .metrics import source_call
+from .tasks import TaskControl
+from .tushare_client import DataClient
+
+# 合成日线覆盖的日期范围（按工作日生成，不区分节假日）
+FIRST_DATE = "20200101"
+LAST_DATE = "20301231"
+
+INDUSTRIES = ["银行", "半导体", "医药生物", "电力设备", "汽车", "食品饮料", "计算机", "有色金属", "传媒", "房地产"]
+
+# 合成概念板块：第 i 只股票在 i % 除数 == 0 时属于该概念（与行业交叉，便于测试交集）
+CONCEPTS = {"高股息": 3, "专精特新": 4}
+
+BAR_COLUMNS = ['ts_code', 'trade_date', 'open', 'high', 'low', 'close', 'pre_close', 'pct_chg', 'vol', 'amount']
+
+
+@lru_cache(maxsize=1)
+def _calendar() -> np.ndarray:
+    """合成日历的全部交易日 (YYYYMMDD)"""
+    return np.asarray(pd.bdate_range(FIRST_DATE, LAST_DATE).strftime('%Y%m%d'))
+
+
+def synthetic_code(i: int) -> str:
+    """第 i 只合成股票的代码：主板为主，每 5 只中有 1 只创业板"""
+    if i % 5 == 4:
+        return f"{300000 + i:06d}.SZ"
+    if i % 2 == 0:
+        return f"{600000 + i:06d}.SH"
+    return f"{i:06d}.SZ"
+
+
+def synthetic_bars(ts_code: str, seed: int = 0, streak_every: int = 60) -> pd.DataFrame:
+    """生成一只股票在整个合成日历上的日线
+
+    同一 (ts_code, seed) 每次生成完全相同的数据。平日涨跌幅为略微向下漂移
+    的正态分布（不会触及涨停），约每 streak_every 个交易日注入一段 2-6 连板，
+    涨停日收盘价严格等于涨停价。
+    """
+    rng = np.random.default_rng(zlib.crc32(ts_code.encode()) ^ seed)
+    dates = _calendar()
+    n = len(dates)
+    rate = limit_rate(ts_code)
+
+    pct = rng.normal(-0.7, 2.0, n).clip(-rate * 94, rate * 94)
+    streak = np.zeros(n, dtype=bool)
+    for start in rng.choice(n - 10, size=max(n // streak_every, 1), replace=False):
+        streak[start:start + rng.integers(2, 7)] = True
+    pct[streak] = rate * 100
+
+    base = float(rng.uniform(5, 50))
+    close = np.round(base * np.cumprod(1 + pct / 100), 2).clip(0.5, None)
+    for i in np.flatnonzero(streak):
+        previous = close[i - 1] if i else base
+        close[i] = limit_up_price(previous, rate)
+    pre_close = np.concatenate(([base], close[:-1]))
+
+    open_ = np.round(pre_close * (1 + rng.normal(0, 0.01, n)), 2)
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.02, n))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.02, n))
+    high[streak] = close[streak]
+    vol = rng.lognormal(11, 0.5, n).round()
+
+    return pd.DataFrame({
+        'ts_code': ts_code,
+        'trade_date': dates,
+        'open': open_,
+        'high': np.round(high, 2),
+        'low': np.round(low, 2),
+        'close': close,
+        'pre_close': pre_close,
+        'pct_chg': np.round((close / pre_close - 1) * 100, 4),
+        'vol': vol,
+        'amount': np.round(vol * close / 10, 3),  # 千元
+    })
+
+
+class _FakePro:
+    """模拟 Tushare pro 接口中用到的部分（daily / trade_cal / stock_basic）"""
+
+    def __init__(self, client: "FakeDataClient"):
+        self._client = client
+
+    def daily(self, ts_code: str = None, trade_date: str = None, start_date: str = None,
+              end_date: str = None, fields: str = None) -> pd.DataFrame:
+        with source_call('fake', 'daily_by_date' if trade_date else 'daily'):
+            self._client._simulate_call()
+        if ts_code:
+            return self._client._bars(ts_code, start_date, end_date)
+        frames = [self._client._bars(code, trade_date, trade_date) for code in self._client.codes]
+        return pd.concat(frames, ignore_index=True)
+
+    def trade_cal(self, exchange: str = '', start_date: str = None, end_date: str = None,
+                  fields: str = None) -> pd.DataFrame:
+        days = self._client.fetch_trade_calendar(start_date, end_date) or []
+        return pd.DataFrame({'cal_date': days, 'is_open': 1})
+
+    def stock_basic(self, **kwargs) -> pd.DataFrame:
+        return self._client._fetch_stock_list()
+
+
+class FakeDataClient(DataClient):
+    """合成数据源，接口与 DataClient 相同
+
+    只替换访问网络的部分（股票列表、日线、交易日历、板块），本地存储、
+    备忘、限流以外的筛选流程与真实数据源完全一致，因此可以离线测量筛选
+    吞吐。日线由 synthetic_bars 确定性生成。
+
+    Args:
+        n_stocks: 股票数量
+        latency: 每次日线请求的平均延迟（秒），实际延迟在 0.5-1.5 倍之间
+        error_rate: 日线请求失败的概率（失败时与所有数据源都失败一样返回 None）
+        seed: 随机种子，相同种子生成相同的数据和失败序列
+    """
+
+    def __init__(self, n_stocks: int = 5000, latency: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        super().__init__()
+        self.n_stocks = n_stocks
+        self.latency = latency
+        self.error_rate = error_rate
+        self.seed = seed
+        self.codes = [synthetic_code(i) for i in range(n_stocks)]
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    def _simulate_call(self, control: Optional[TaskControl] = None):
+        """模拟一次网络请求的延迟和失败
+
+        Raises:
+            ConnectionError: 按 error_rate 注入的失败
+        """
+        with self._random_lock:
+            self.calls += 1
+            delay = self.latency * self._random.uniform(0.5, 1.5)
+            failed = self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        if delay > 0:
+            if control is not None:
+                control.cancel_event.wait(delay)
+            else:
+                time.sleep(delay)
+        if failed:
+            raise ConnectionError("合成数据源模拟的请求失败")
+
+    def _bars(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
+        df = synthetic_bars(ts_code, self.seed)
+        dates = df['trade_date']
+        return df[(dates >= start_date) & (dates <= end_date)].reset_index(drop=True)
+
+    def connect(self):
+        return _FakePro(self)
+
+    def warm_up(self):
+        self.ready = True
+
+    def verify_token(self) -> dict:
+        today = pd.Timestamp.now().strftime('%Y%m%d')
+        days = self.fetch_trade_calendar(FIRST_DATE, today)
+        return {"valid": True, "message": "合成数据源", "last_trade_date": days[-1] if days else ""}
+
+    def _fetch_stock_list(self, exclude_st: bool = True, min_list_days: int = 180) -> pd.DataFrame:
+        return pd.DataFrame({
+            'ts_code': self.codes,
+            'name': [f"合成{i:04d}" for i in range(self.n_stocks)],
+            'industry': [INDUSTRIES[i % len(INDUSTRIES)] for i in range(self.n_stocks)],
+        })
+
+    def _fetch_daily_data(self, ts_code: str, start_date: str, end_date: str,
+                          control: Optional[TaskControl] = None) -> Optional[pd.DataFrame]:
+        try:
+            with source_call('fake', 'daily'):
+                self._simulate_call(control)
+        except ConnectionError:
+            return None
+        return self._bars(ts_code, start_date, end_date)[BAR_COLUMNS]
+
+    def fetch_trade_calendar(self, start_date: str, end_date: str) -> Optional[list[str]]:
+        dates = _calendar()
+        lo, hi = np.searchsorted(dates, start_date), np.searchsorted(dates, end_date, side='right')
+        return dates[lo:hi].tolist()
+
+    def fetch_sector_catalog(self) -> Optional[list[dict]]:
+        return ([{'name': name, 'code': '', 'type': 'sw'} for name in INDUSTRIES]
+                + [{'name': name, 'code': '', 'type': 'concept'} for name in CONCEPTS])
+
+    def fetch_sector_members(self, name: str, kind: str = '') -> Optional[list[str]]:
+        if name in CONCEPTS:
+            return self.codes[::CONCEPTS[name]]
+        if name in INDUSTRIES:
+            return self.codes[INDUSTRIES.index(name)::len(INDUSTRIES)]
+        return []
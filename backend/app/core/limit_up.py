@@ -0,0 +1,101 @@
+"""涨停判定与连板识别（NumPy 向量化实现）"""
+from typing import Optional
+
+import numpy as np
+
+# 各板块涨跌幅限制
+MAIN_BOARD_LIMIT = 0.10  # 沪深主板
+GROWTH_BOARD_LIMIT = 0.20  # 创业板 (300/301) 和科创板 (688/689)
+ST_LIMIT = 0.05  # 主板 ST
+BJ_LIMIT = 0.30  # 北交所
+
+GROWTH_PREFIXES = ('300', '301', '688', '689')
+
+
+def limit_rate(ts_code: str, name: str = "") -> float:
+    """根据代码和名称判断涨停幅度"""
+    if ts_code.endswith('.BJ'):
+        return BJ_LIMIT
+    if ts_code.startswith(GROWTH_PREFIXES):
+        return GROWTH_BOARD_LIMIT
+    if name and 'ST' in name:
+        return ST_LIMIT
+    return MAIN_BOARD_LIMIT
+
+
+def limit_up_price(pre_close: np.ndarray, rate) -> np.ndarray:
+    """涨停价 = 前收盘价 × (1 + 涨停幅度)，四舍五入到分"""
+    return np.floor(pre_close * (1 + rate) * 100 + 0.5 + 1e-6) / 100
+
+
+def limit_up_mask(
+    close: np.ndarray,
+    pre_close: np.ndarray,
+    pct_chg: np.ndarray,
+    rate,
+    fallback_ratio: float = 0.95
+) -> np.ndarray:
+    """标记涨停日
+
+    有前收盘价时按涨停价判定（收盘价达到涨停价）；缺少前收盘价时（如首行）
+    退化为涨幅 >= 涨停幅度 × fallback_ratio。涨幅明显超过限制的（新股上市
+    等无涨跌幅限制的日子）不算涨停。rate 可以是标量，也可以与 close 广播。
+    """
+    rate = np.asarray(rate, dtype=float)
+    limit_pct = rate * 100
+    with np.errstate(invalid='ignore'):
+        by_price = close >= limit_up_price(pre_close, rate) - 0.005
+        by_pct = pct_chg >= limit_pct * fallback_ratio
+        hit = np.where(np.isnan(pre_close), by_pct, by_price)
+        return hit & ~(pct_chg > limit_pct + 1)
+
+
+def run_lengths(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """连续 True 区间的起点下标和长度"""
+    padded = np.concatenate(([0], mask.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return starts, ends - starts
+
+
+def find_limit_up_periods(
+    trade_date: np.ndarray,
+    close: np.ndarray,
+    pre_close: np.ndarray,
+    pct_chg: np.ndarray,
+    rate: float = MAIN_BOARD_LIMIT,
+    min_count: int = 3,
+    threshold: Optional[float] = None,
+    fallback_ratio: float = 0.95
+) -> list[dict]:
+    """查找连续涨停区间
+
+    Args:
+        trade_date/close/pre_close/pct_chg: 按日期升序的日线字段
+        rate: 涨停幅度（见 limit_rate）
+        min_count: 最少连续涨停次数
+        threshold: 指定时按统一涨幅阈值（%）判定，忽略板块规则
+        fallback_ratio: 缺少前收盘价时按涨幅判定的容错比例
+
+    Returns:
+        [{'start_date', 'start_price', 'count', 'limit_up_days'}]
+    """
+    if threshold is not None:
+        with np.errstate(invalid='ignore'):
+            mask = pct_chg >= threshold
+    else:
+        mask = limit_up_mask(close, pre_close, pct_chg, rate, fallback_ratio)
+
+    starts, lengths = run_lengths(mask)
+    keep = lengths >= min_count
+
+    result = []
+    for start, count in zip(starts[keep].tolist(), lengths[keep].tolist()):
+        result.append({
+            'start_date': trade_date[start],
+            'start_price': float(close[start]),
+            'count': count,
+            'limit_up_days': list(trade_date[start:start + count])
+        })
+    return result
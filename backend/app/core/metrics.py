@@ -0,0 +1,212 @@
+"""运行指标 - 计数器和直方图，按 Prometheus 文本格式导出（/api/metrics）"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Union
+
+# 耗时直方图的默认分桶（秒）
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不减的计数，按标签分组"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Histogram:
+    """分桶计数 + 总和，按标签分组"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                 buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签 -> [各桶计数（非累计，最后一格为 +Inf）, 总和, 次数]
+        self._series: dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """记录 with 块的耗时（异常时同样记录）"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._series.get(tuple(labels.get(n, "") for n in self.labelnames))
+        return series[2] if series else 0
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Gauge:
+    """导出时通过回调取值的瞬时指标
+
+    带 labelnames 时回调返回 {标签值元组: 数值}，每组标签导出一个样本。
+    """
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, func: Callable[[], Union[float, dict]],
+                 labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.func = func
+        self.labelnames = tuple(labelnames)
+
+    def samples(self) -> list[str]:
+        try:
+            if not self.labelnames:
+                return [f"{self.name} {_number(self.func())}"]
+            items = sorted(self.func().items())
+        except Exception as e:
+            print(f"读取指标 {self.name} 失败: {e}")
+            return []
+        return [f"{self.name}{_labels(self.labelnames, key)} {_number(value)}" for key, value in items]
+
+
+class Registry:
+    """指标注册表，按注册顺序导出"""
+
+    def __init__(self):
+        self._metrics: dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...] = (),
+                  buckets: tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def gauge(self, name: str, help: str, func: Callable[[], Union[float, dict]],
+              labelnames: tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help, func, labelnames))
+
+    def render(self) -> str:
+        """Prometheus 文本格式 (text/plain; version=0.0.4)"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+# 全局实例
+registry = Registry()
+
+source_calls = registry.counter(
+    "screener_source_calls_total", "数据源调用次数", ("source", "endpoint"))
+source_errors = registry.counter(
+    "screener_source_errors_total", "数据源调用失败次数", ("source", "endpoint"))
+source_latency = registry.histogram(
+    "screener_source_request_seconds", "数据源单次调用耗时", ("source", "endpoint"))
+rate_limit_wait = registry.histogram(
+    "screener_rate_limit_wait_seconds", "等待调用频率令牌的时间", ("limiter",))
+stage_latency = registry.histogram(
+    "screener_stage_seconds", "筛选各阶段耗时", ("stage",))
+db_write_latency = registry.histogram(
+    "screener_db_write_seconds", "任务数据库写入耗时", ("op",))
+stocks_screened = registry.counter(
+    "screener_stocks_screened_total", "逐只筛选处理的股票数", ("outcome",))
+
+
+@contextmanager
+def source_call(source: str, endpoint: str):
+    """记录一次数据源调用的次数、耗时和失败（异常照常抛出）"""
+    source_calls.inc(source=source, endpoint=endpoint)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        source_errors.inc(source=source, endpoint=endpoint)
+        raise
+    finally:
+        source_latency.observe(time.perf_counter() - started, source=source, endpoint=endpoint)
+
+
+def timed(histogram: Histogram, **labels) -> Callable:
+    """装饰器：记录函数耗时"""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with histogram.time(**labels):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
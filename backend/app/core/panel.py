@@ -0,0 +1,194 @@
+"""全市场矩阵筛选引擎 - 将本地日线对齐为 (交易日 × 股票) 的二维数组后一次性计算"""
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .bar_store import BarStore, bar_store
+from .limit_up import limit_rate, limit_up_mask, run_lengths
+
+
+class Panel:
+    """对齐后的日线矩阵，缺失（停牌/未上市）的位置为 NaN"""
+
+    def __init__(self, dates: np.ndarray, codes: list[str], fields: dict[str, np.ndarray]):
+        self.dates = dates  # (T,) int32 YYYYMMDD
+        self.codes = codes  # (N,)
+        self.fields = fields  # 字段名 -> (T, N) float64
+
+    @property
+    def close(self) -> np.ndarray:
+        return self.fields['close']
+
+    @property
+    def pre_close(self) -> np.ndarray:
+        return self.fields['pre_close']
+
+    @property
+    def pct_chg(self) -> np.ndarray:
+        return self.fields['pct_chg']
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        return len(self.dates), len(self.codes)
+
+
+def load_panel(
+    codes: list[str],
+    start_date: str,
+    end_date: str,
+    fields: tuple[str, ...] = ('close', 'pre_close', 'pct_chg'),
+    store: BarStore = bar_store
+) -> Panel:
+    """从本地存储读取一组股票，按交易日对齐为矩阵"""
+    lo, hi = int(start_date), int(end_date)
+    per_code = []
+    for ts_code in codes:
+        bars = store.load(ts_code)
+        per_code.append(bars[(bars['trade_date'] >= lo) & (bars['trade_date'] <= hi)])
+
+    all_dates = [b['trade_date'] for b in per_code if len(b)]
+    dates = np.unique(np.concatenate(all_dates)) if all_dates else np.empty(0, dtype='i4')
+
+    data = {f: np.full((len(dates), len(codes)), np.nan) for f in fields}
+    for col, bars in enumerate(per_code):
+        if not len(bars):
+            continue
+        rows = np.searchsorted(dates, bars['trade_date'])
+        for f in fields:
+            data[f][rows, col] = bars[f]
+
+    return Panel(dates, list(codes), data)
+
+
+def last_valid_index(values: np.ndarray) -> np.ndarray:
+    """每列最后一个非 NaN 的行号，整列缺失时为 -1"""
+    valid = ~np.isnan(values)
+    last = len(values) - 1 - np.argmax(valid[::-1], axis=0)
+    return np.where(valid.any(axis=0), last, -1)
+
+
+def find_streaks(panel: Panel, rates: np.ndarray, min_count: int = 3,
+                 fallback_ratio: float = 0.95) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """找出所有股票的连板区间
+
+    停牌日（NaN）会被跳过而不打断连板，与逐只处理时的结果一致。
+
+    Returns:
+        (rows, cols, counts, end_rows): 每段连板的起始行、所在列、涨停天数和
+        最后一个涨停日所在行，按列、再按日期排序
+    """
+    mask = limit_up_mask(panel.close, panel.pre_close, panel.pct_chg, rates[np.newaxis, :], fallback_ratio)
+    return streaks_from_mask(mask, panel.close, min_count)
+
+
+def streaks_from_mask(mask: np.ndarray, close: np.ndarray,
+                      min_count: int = 3) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """在 (交易日 × 股票) 的涨停掩码上找出连板区间，返回值同 find_streaks"""
+    n_dates, n_codes = mask.shape
+
+    # 每列前后各补一格 False 后按列展开，保证连板不会跨股票；再去掉停牌的格子
+    padded = np.zeros((n_codes, n_dates + 2), dtype=bool)
+    padded[:, 1:-1] = mask.T
+    present = np.ones((n_codes, n_dates + 2), dtype=bool)
+    present[:, 1:-1] = ~np.isnan(close.T)
+    positions = np.flatnonzero(present.ravel())
+
+    starts, lengths = run_lengths(padded.ravel()[positions])
+    keep = lengths >= min_count
+    starts, lengths = starts[keep], lengths[keep]
+
+    cols, rows = np.divmod(positions[starts], n_dates + 2)
+    end_rows = positions[starts + lengths - 1] % (n_dates + 2)
+    return rows - 1, cols, lengths, end_rows - 1
+
+
+def stock_labels(panel: Panel, stock_info: pd.DataFrame) -> tuple[list[str], list[str], np.ndarray]:
+    """按矩阵列顺序取股票名称、行业和涨停幅度"""
+    name_map = dict(zip(stock_info['ts_code'], stock_info.get('name', pd.Series(dtype=str))))
+    industry_map = dict(zip(stock_info['ts_code'], stock_info.get('industry', pd.Series(dtype=str))))
+    names = [str(name_map.get(c, '')) for c in panel.codes]
+    industries = [str(industry_map.get(c, '') or '') for c in panel.codes]
+    rates = np.array([limit_rate(code, name) for code, name in zip(panel.codes, names)])
+    return names, industries, rates
+
+
+def first_per_stock(cols: np.ndarray, qualified: np.ndarray) -> np.ndarray:
+    """每只股票第一段满足条件的连板在 streak 数组中的下标"""
+    _, first = np.unique(cols[qualified], return_index=True)
+    return np.flatnonzero(qualified)[first]
+
+
+def build_results(panel: Panel, names: list[str], industries: list[str], current: np.ndarray,
+                  rows: np.ndarray, cols: np.ndarray, counts: np.ndarray, end_rows: np.ndarray) -> list[dict]:
+    """把选中的连板区间转换为结果字典"""
+    start_price = panel.close[rows, cols]
+    drop_ratio = (start_price - current[cols]) / start_price * 100
+
+    dates = panel.dates.astype(str)
+    results = []
+    for row, col, count, end, price, drop in zip(rows.tolist(), cols.tolist(), counts.tolist(), end_rows.tolist(),
+                                                start_price.tolist(), drop_ratio.tolist()):
+        traded = ~np.isnan(panel.close[row:end + 1, col])
+        results.append({
+            'ts_code': panel.codes[col],
+            'name': names[col],
+            'industry': industries[col],
+            'start_date': dates[row],
+            'start_price': price,
+            'current_price': float(current[col]),
+            'limit_up_count': count,
+            'drop_ratio': drop,
+            'limit_up_days': dates[row:end + 1][traded].tolist()
+        })
+    return results
+
+
+def screen_panel(
+    panel: Panel,
+    stock_info: pd.DataFrame,
+    min_count: int = 3,
+    fallback_ratio: float = 0.95
+) -> list[dict]:
+    """在矩阵上一次性完成连板回落筛选
+
+    与 screen_stocks_progressive 的逐只判定规则一致：取每只股票第一段
+    满足「当前价低于启动价」的连板（>= min_count）。
+
+    Args:
+        panel: load_panel 的结果
+        stock_info: 含 ts_code/name/industry 的股票列表
+    """
+    if not panel.codes or not len(panel.dates):
+        return []
+
+    names, industries, rates = stock_labels(panel, stock_info)
+    rows, cols, counts, end_rows = find_streaks(panel, rates, min_count, fallback_ratio)
+    if not len(rows):
+        return []
+
+    last_idx = last_valid_index(panel.close)
+    current = panel.close[last_idx, np.arange(len(panel.codes))]
+    start_price = panel.close[rows, cols]
+
+    qualified = (last_idx[cols] >= 0) & (current[cols] < start_price)
+    # 每只股票只取第一段满足条件的连板
+    pick = first_per_stock(cols, qualified)
+    results = build_results(panel, names, industries, current,
+                            rows[pick], cols[pick], counts[pick], end_rows[pick])
+
+    results.sort(key=lambda x: x['drop_ratio'], reverse=True)
+    return results
+
+
+def screen_codes(
+    stock_info: pd.DataFrame,
+    start_date: str,
+    end_date: str,
+    min_count: int = 3,
+    fallback_ratio: float = 0.95,
+    store: Optional[BarStore] = None
+) -> list[dict]:
+    """读取本地数据并筛选（load_panel + screen_panel）"""
+    panel = load_panel(stock_info['ts_code'].tolist(), start_date, end_date, store=store or bar_store)
+    return screen_panel(panel, stock_info, min_count, fallback_ratio)
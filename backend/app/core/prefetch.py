@@ -0,0 +1,228 @@
+"""收盘后预取 - 交易日收盘后按受控频率补齐全市场日线，次日筛选直接读取本地数据"""
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .bar_store import bar_store, shift_date
+from .config import settings
+from .rate_limit import TokenBucket
+from .screen_memo import screen_memo
+from .sectors import sector_index
+from .tasks import TaskControl, task_scheduler
+from .trade_calendar import trade_calendar
+from .tushare_client import data_client
+from ..database import (
+    start_prefetch_run,
+    update_prefetch_run,
+    get_prefetch_runs,
+    get_last_completed_prefetch
+)
+
+# 每处理多少只股票写入一次运行记录
+REPORT_EVERY = 50
+
+# 有筛选任务运行时，每隔多少秒检查一次是否可以继续
+YIELD_SECONDS = 1.0
+
+# 预取失败（例如取不到股票列表）后多久重试
+RETRY_SECONDS = 600
+
+# 交易日开盘时间，开盘到 prefetch_time 之间不补跑错过的预取
+MARKET_OPEN_HOUR = 9
+
+
+class Prefetcher:
+    """收盘后预取调度器
+
+    后台线程在每个交易日 prefetch_time 之后运行一次：刷新股票列表，对本地
+    覆盖不到最近收盘交易日的股票逐只补齐日线，板块索引过期时一并刷新。预取使用独立的令牌桶
+    （prefetch_calls_per_minute），同时仍受各数据源全局限流约束；有筛选
+    任务运行时暂停，把调用频率让给交互筛选。每次运行的进度和覆盖情况
+    记录在 prefetch_runs 表中。
+    """
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._control = TaskControl()
+        self._lock = threading.Lock()
+        self._limiter = TokenBucket(settings.prefetch_calls_per_minute, burst=1, name='prefetch')
+        self._force = False
+        self._skipped_session = ""
+        self.state = {
+            "state": "stopped",
+            "session": None,
+            "total": 0,
+            "processed": 0,
+            "fetched": 0,
+            "failed": 0,
+            "next_run": None,
+            "message": "",
+        }
+
+    def _update(self, **fields):
+        with self._lock:
+            self.state.update(fields)
+
+    def start(self):
+        """启动后台线程（重复调用无影响）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止后台线程，正在进行的预取会在当前股票完成后中止"""
+        self._stopping.set()
+        self._control.cancel()
+        self._wake.set()
+
+    def trigger(self):
+        """立即执行一次预取（即使最近收盘交易日已预取过）"""
+        self._force = True
+        self._wake.set()
+
+    def cancel_run(self):
+        """中止正在进行的预取，调度继续"""
+        self._control.cancel()
+
+    def status(self) -> dict:
+        """当前状态、最近几次运行记录"""
+        with self._lock:
+            state = dict(self.state)
+        state["enabled"] = settings.prefetch_enabled
+        state["running"] = self._thread is not None and self._thread.is_alive()
+        state["runs"] = get_prefetch_runs(5)
+        return state
+
+    def next_run_time(self, now: Optional[datetime] = None) -> datetime:
+        """下一次预取的时间
+
+        最近收盘交易日还没有预取过时立即补跑（交易日盘中除外），否则为
+        之后第一个未预取的交易日的 prefetch_time。
+        """
+        now = now or datetime.now()
+        hour, minute = (int(x) for x in settings.prefetch_time.split(":"))
+        last = get_last_completed_prefetch()
+        done_session = max(last["session"] if last else "", self._skipped_session)
+
+        day = now.strftime("%Y%m%d")
+        trading_hours = trade_calendar.is_open(day) and \
+            now.replace(hour=MARKET_OPEN_HOUR, minute=0) <= now < now.replace(hour=hour, minute=minute)
+        if not trading_hours and trade_calendar.last_closed_session(now) > done_session:
+            return now
+
+        for _ in range(30):
+            run_at = datetime.strptime(day, "%Y%m%d").replace(hour=hour, minute=minute)
+            if trade_calendar.is_open(day) and day > done_session:
+                return max(run_at, now)
+            day = shift_date(day, 1)
+        return now + timedelta(days=1)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self._force:
+                run_at = datetime.now()
+            else:
+                try:
+                    run_at = self.next_run_time()
+                except Exception as e:
+                    print(f"计算预取时间失败: {e}")
+                    run_at = datetime.now() + timedelta(hours=1)
+
+            self._update(state="waiting", next_run=run_at.isoformat(timespec="seconds"))
+            delay = (run_at - datetime.now()).total_seconds()
+            if delay > 0:
+                # 最多睡一小时后重新计算（日历或配置可能变化）
+                self._wake.wait(timeout=min(delay, 3600))
+                self._wake.clear()
+                if self._stopping.is_set():
+                    break
+                if not self._force and datetime.now() < run_at:
+                    continue
+
+            self._force = False
+            try:
+                summary = self.run_once()
+                if summary["status"] == "cancelled":
+                    # 手动中止后本交易日不再自动重跑
+                    self._skipped_session = summary["session"]
+                elif summary["status"] != "completed":
+                    self._wake.wait(timeout=RETRY_SECONDS)
+                    self._wake.clear()
+            except Exception as e:
+                print(f"收盘后预取失败: {e}")
+                self._update(state="error", message=str(e))
+                self._wake.wait(timeout=RETRY_SECONDS)
+                self._wake.clear()
+
+        self._update(state="stopped", next_run=None)
+
+    def run_once(self) -> dict:
+        """预取一次：补齐全市场到最近收盘交易日的日线
+
+        Returns:
+            本次运行的统计
+        """
+        self._control = control = TaskControl()
+        session = trade_calendar.last_closed_session()
+        start_date = (datetime.now() - timedelta(days=settings.prefetch_lookback_days)).strftime("%Y%m%d")
+
+        self._update(state="running", session=session, total=0, processed=0, fetched=0, failed=0,
+                     message="正在获取股票列表")
+        stock_list = data_client.get_stock_list(refresh=True)
+        codes = stock_list['ts_code'].tolist() if not stock_list.empty else []
+        run_id = start_prefetch_run(session, len(codes))
+        self._update(total=len(codes))
+
+        if settings.prefetch_bulk:
+            self._update(message="按交易日批量获取全市场日线")
+            data_client.bulk_load_daily(start_date, session, control=control)
+
+        processed = fetched = failed = covered = 0
+        for ts_code in codes:
+            # 有筛选任务运行时让出调用频率
+            while task_scheduler.running_count > 0 and not control.cancelled:
+                self._update(message="筛选任务运行中，预取暂停")
+                control.cancel_event.wait(YIELD_SECONDS)
+            if control.cancelled:
+                break
+
+            if data_client._missing_ranges(bar_store.coverage(ts_code), start_date, session):
+                if not self._limiter.acquire(control.cancel_event):
+                    break
+                data_client.get_daily_data(ts_code, start_date, session, control)
+                fetched += 1
+
+            if data_client._missing_ranges(bar_store.coverage(ts_code), start_date, session):
+                failed += 1
+            else:
+                covered += 1
+            processed += 1
+
+            if processed % REPORT_EVERY == 0:
+                self._update(processed=processed, fetched=fetched, failed=failed,
+                             message=f"正在预取: {ts_code}")
+                update_prefetch_run(run_id, processed, fetched, failed, covered)
+
+        # 日线更新后旧区间的备忘不会再命中，顺便清理
+        screen_memo.prune(session)
+
+        # 板块目录和成分股过期时一并刷新，之后按板块筛选不再请求数据源
+        if not control.cancelled and sector_index.status()["stale"]:
+            self._update(message="正在刷新板块成分股")
+            sector_index.refresh(control.cancel_event)
+
+        status = "cancelled" if control.cancelled else ("completed" if codes else "failed")
+        update_prefetch_run(run_id, processed, fetched, failed, covered, status)
+        message = f"已覆盖 {covered}/{len(codes)} 只股票，新获取 {fetched} 只，失败 {failed} 只"
+        self._update(state="idle", processed=processed, fetched=fetched, failed=failed, message=message)
+        print(f"收盘后预取 {session}: {message}")
+        return {"session": session, "total": len(codes), "processed": processed,
+                "fetched": fetched, "failed": failed, "covered": covered, "status": status}
+
+
+# 全局实例
+prefetcher = Prefetcher()
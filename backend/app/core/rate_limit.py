@@ -0,0 +1,71 @@
+"""数据源调用频率控制 - 每个数据源一个共享的令牌桶"""
+import threading
+import time
+from typing import Optional
+
+from .config import settings
+from .metrics import rate_limit_wait
+
+
+class TokenBucket:
+    """线程安全的令牌桶限流器
+
+    Args:
+        rate_per_minute: 每分钟补充的令牌数（即平均调用上限）
+        burst: 桶容量，允许的瞬时并发调用数
+        name: 指标中的限流器名称（不指定时不记录等待时间）
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int = 5, name: Optional[str] = None):
+        self.name = name
+        self.rate = max(rate_per_minute, 1) / 60.0
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, cancel_event: Optional[threading.Event] = None) -> bool:
+        """获取一个令牌，不足时阻塞等待
+
+        Args:
+            cancel_event: 等待期间该事件被置位时不再等待，也不取令牌
+
+        Returns:
+            是否取到了令牌（False 表示已取消，调用方不应再调用数据源）
+        """
+        started = time.monotonic()
+        acquired = self._acquire(cancel_event)
+        if self.name:
+            rate_limit_wait.observe(time.monotonic() - started, limiter=self.name)
+        return acquired
+
+    def _acquire(self, cancel_event: Optional[threading.Event]) -> bool:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if cancel_event is not None and cancel_event.is_set():
+                return False
+            time.sleep(min(wait, 0.1))
+
+    def set_rate(self, rate_per_minute: float):
+        """调整速率（例如升级了 Tushare 积分）"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(rate_per_minute, 1) / 60.0
+
+
+# 每个数据源一个限流器，所有线程共享
+rate_limiters = {
+    'akshare': TokenBucket(settings.akshare_calls_per_minute, name='akshare'),
+    'tushare': TokenBucket(settings.tushare_calls_per_minute, name='tushare'),
+}
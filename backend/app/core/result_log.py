@@ -0,0 +1,64 @@
+"""筛选结果追加日志 - 每条结果带单调递增的序号，支持按游标增量读取"""
+import json
+import threading
+from typing import Optional
+
+from ..models import StockInfo
+
+_FIELDS = list(StockInfo.model_fields)
+
+
+class ResultLog:
+    """一个筛选任务的结果日志
+
+    结果在追加时校验并规整一次，之后读取不再逐条校验；完整快照按
+    回落幅度排序后编码为 JSON 并缓存，结果不变时重复请求直接返回缓存。
+    """
+
+    def __init__(self):
+        self._rows: list[dict] = []
+        self._lock = threading.Lock()
+        self._snapshot: Optional[tuple[int, bytes]] = None
+
+    @property
+    def cursor(self) -> int:
+        """已追加的结果数，即下一条结果的序号"""
+        return len(self._rows)
+
+    def append(self, result: dict) -> dict:
+        """追加一条结果，返回带序号的规整结果"""
+        row = StockInfo(**{k: result[k] for k in _FIELDS if k in result}).model_dump()
+        with self._lock:
+            row["seq"] = len(self._rows)
+            self._rows.append(row)
+        return row
+
+    def extend(self, results: list[dict]):
+        for result in results:
+            self.append(result)
+
+    def since(self, cursor: int) -> tuple[list[dict], int]:
+        """读取序号 >= cursor 的结果，返回 (结果, 新游标)
+
+        游标超出当前长度（例如任务清空结果后重新计算）时从头返回。
+        """
+        with self._lock:
+            rows = self._rows
+            if cursor > len(rows):
+                cursor = 0
+            return rows[cursor:], len(rows)
+
+    def snapshot_json(self) -> bytes:
+        """全部结果（按回落幅度降序）的 JSON 编码，结果不变时复用"""
+        with self._lock:
+            cached = self._snapshot
+            if cached is not None and cached[0] == len(self._rows):
+                return cached[1]
+            rows = sorted(self._rows, key=lambda x: x["drop_ratio"], reverse=True)
+            payload = json.dumps(
+                [{k: row[k] for k in _FIELDS} for row in rows],
+                ensure_ascii=False
+            ).encode("utf-8")
+            self._snapshot = (len(rows), payload)
+            return payload
+
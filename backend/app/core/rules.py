@@ -0,0 +1,182 @@
+"""声明式筛选规则 - 把规则编译为矩阵上的 NumPy 谓词，一次扫描评估多套规则"""
+import operator
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .bar_store import BarStore, bar_store
+from .panel import (
+    Panel,
+    load_panel,
+    last_valid_index,
+    find_streaks,
+    stock_labels,
+    first_per_stock,
+    build_results
+)
+
+# 规则字段 -> (连板特征列, 比较)。min_drop 为严格大于，默认 0 即「当前价低于启动价」
+_PREDICATES: list[tuple[str, str, Callable]] = [
+    ('min_streak', 'count', operator.ge),
+    ('max_streak', 'count', operator.le),
+    ('min_drop', 'drop_ratio', operator.gt),
+    ('max_drop', 'drop_ratio', operator.le),
+    ('min_days_since', 'days_since', operator.ge),
+    ('max_days_since', 'days_since', operator.le),
+    ('min_avg_vol', 'avg_vol', operator.ge),
+    ('min_avg_amount', 'avg_amount', operator.ge),
+]
+
+# 量能特征依赖的日线字段
+_VOLUME_FIELDS = {'avg_vol': 'vol', 'avg_amount': 'amount'}
+
+PANEL_FIELDS = ('close', 'pre_close', 'pct_chg')
+
+
+@dataclass(frozen=True)
+class Rule:
+    """一套筛选规则，所有设置了的条件同时满足才算命中
+
+    默认值即固定筛选：至少 3 连板，当前价低于启动价。
+    """
+    name: str = "default"  # 规则名称（结果中标注）
+    min_streak: int = 3  # 最少连续涨停次数
+    max_streak: Optional[int] = None  # 最多连续涨停次数
+    min_drop: float = 0.0  # 回落幅度下限（%，不含）
+    max_drop: Optional[float] = None  # 回落幅度上限（%）
+    min_days_since: Optional[int] = None  # 连板结束后至少经过的交易日数
+    max_days_since: Optional[int] = None  # 连板结束后至多经过的交易日数
+    volume_days: int = 20  # 量能均值统计的交易日数
+    min_avg_vol: Optional[float] = None  # 近 volume_days 日平均成交量下限（手）
+    min_avg_amount: Optional[float] = None  # 近 volume_days 日平均成交额下限（千元）
+
+
+class CompiledRule:
+    """编译后的规则：一组 (特征列, 比较, 阈值) 谓词"""
+
+    def __init__(self, rule: Rule):
+        self.name = rule.name
+        self.min_streak = rule.min_streak
+        self.fields: set[str] = set()  # 需要额外读取的日线字段
+        self.predicates = []
+        for field, column, op in _PREDICATES:
+            value = getattr(rule, field)
+            if value is None:
+                continue
+            if column in _VOLUME_FIELDS:
+                self.fields.add(_VOLUME_FIELDS[column])
+                column = f"{column}_{rule.volume_days}"
+            self.predicates.append((column, op, value))
+
+    def evaluate(self, features: "StreakFeatures") -> np.ndarray:
+        """对所有连板区间求值，返回布尔掩码"""
+        mask = features.valid.copy()
+        for column, op, value in self.predicates:
+            mask &= op(features[column], value)
+        return mask
+
+
+def compile_rules(rules: list[Rule]) -> list[CompiledRule]:
+    """编译规则，规则名称必须唯一
+
+    Raises:
+        ValueError: 规则为空或名称重复
+    """
+    if not rules:
+        raise ValueError("至少需要一条规则")
+    names = [r.name for r in rules]
+    if len(set(names)) != len(names):
+        raise ValueError(f"规则名称重复: {names}")
+    return [CompiledRule(r) for r in rules]
+
+
+def panel_fields(compiled: list[CompiledRule]) -> tuple[str, ...]:
+    """评估这组规则需要读取的日线字段"""
+    extra = set().union(*(c.fields for c in compiled))
+    return PANEL_FIELDS + tuple(sorted(extra))
+
+
+class StreakFeatures:
+    """每段连板的特征列（与 find_streaks 的结果一一对应），按需计算并缓存"""
+
+    def __init__(self, panel: Panel, rows: np.ndarray, cols: np.ndarray, counts: np.ndarray,
+                 end_rows: np.ndarray, last_idx: np.ndarray, current: np.ndarray):
+        self.panel = panel
+        self.cols = cols
+        self.valid = last_idx[cols] >= 0
+        start_price = panel.close[rows, cols]
+        # 停牌日不计入连板后经过的交易日
+        traded = np.cumsum(~np.isnan(panel.close), axis=0)
+        self._columns = {
+            'count': counts,
+            'drop_ratio': (start_price - current[cols]) / start_price * 100,
+            'days_since': traded[np.maximum(last_idx[cols], 0), cols] - traded[end_rows, cols],
+        }
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        if column not in self._columns:
+            name, days = column.rsplit('_', 1)
+            values = self.panel.fields[_VOLUME_FIELDS[name]][-int(days):]
+            traded = (~np.isnan(values)).sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # 整段停牌的股票均值为 NaN，任何量能条件都不满足
+                per_stock = np.nansum(values, axis=0) / traded
+            self._columns[column] = per_stock[self.cols]
+        return self._columns[column]
+
+
+def screen_panel_rules(
+    panel: Panel,
+    stock_info: pd.DataFrame,
+    rules: list[Rule],
+    fallback_ratio: float = 0.95
+) -> dict[str, list[dict]]:
+    """在矩阵上一次性评估多套规则
+
+    连板区间按所有规则中最小的 min_streak 只计算一次，每套规则是在同一组
+    特征列上的布尔掩码；每只股票取第一段满足该规则的连板。
+
+    Returns:
+        规则名称 -> 命中结果（按回落幅度降序，带 rule 字段）
+    """
+    compiled = compile_rules(rules)
+    matched: dict[str, list[dict]] = {c.name: [] for c in compiled}
+    if not panel.codes or not len(panel.dates):
+        return matched
+
+    names, industries, rates = stock_labels(panel, stock_info)
+    min_count = min(c.min_streak for c in compiled)
+    rows, cols, counts, end_rows = find_streaks(panel, rates, min_count, fallback_ratio)
+    if not len(rows):
+        return matched
+
+    last_idx = last_valid_index(panel.close)
+    current = panel.close[last_idx, np.arange(len(panel.codes))]
+    features = StreakFeatures(panel, rows, cols, counts, end_rows, last_idx, current)
+
+    for rule in compiled:
+        pick = first_per_stock(cols, rule.evaluate(features))
+        results = build_results(panel, names, industries, current,
+                                rows[pick], cols[pick], counts[pick], end_rows[pick])
+        for result in results:
+            result['rule'] = rule.name
+        results.sort(key=lambda x: x['drop_ratio'], reverse=True)
+        matched[rule.name] = results
+
+    return matched
+
+
+def screen_codes_rules(
+    stock_info: pd.DataFrame,
+    start_date: str,
+    end_date: str,
+    rules: list[Rule],
+    fallback_ratio: float = 0.95,
+    store: Optional[BarStore] = None
+) -> dict[str, list[dict]]:
+    """读取本地数据并评估多套规则（只读取规则用到的字段）"""
+    fields = panel_fields(compile_rules(rules))
+    panel = load_panel(stock_info['ts_code'].tolist(), start_date, end_date, fields, store=store or bar_store)
+    return screen_panel_rules(panel, stock_info, rules, fallback_ratio)
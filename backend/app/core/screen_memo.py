@@ -0,0 +1,151 @@
+"""单只股票筛选结果的持久化备忘 - 输入数据不变时直接复用上次的计算结果"""
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .bar_store import BAR_DIR, shift_date
+
+MEMO_PATH = BAR_DIR.parent / "screen_memo.db"
+
+# 筛选逻辑变化时递增，旧的备忘自动失效
+RULES_VERSION = 1
+
+# 累积多少条新备忘后写入一次 SQLite
+FLUSH_EVERY = 200
+
+# 超过多少天的备忘在启动时清理
+KEEP_DAYS = 30
+
+# 未命中时 get() 的返回值（None 本身是合法的“不符合条件”结果）
+MISS = object()
+
+
+def rules_key(rate: float, min_count: int, fallback_ratio: float) -> str:
+    """判定规则的标识：涨停幅度、最少连板数、无前收盘价时的判定比例"""
+    return f"v{RULES_VERSION}:{rate:g}:{min_count}:{fallback_ratio:g}"
+
+
+def data_version(cov: dict) -> str:
+    """本地日线的版本：覆盖区间或全量同步日期变化后，备忘失效"""
+    return f"{cov['cov_start']}-{cov['cov_end']}:{cov['rows']}:{cov['full_sync']}"
+
+
+class ScreenMemo:
+    """按 (股票, 区间, 判定规则) 记录涨停区间和筛选结果
+
+    不符合条件的股票（结果为 None）同样记录，这样重复筛选时绝大多数股票
+    都不需要再读取日线。新备忘先放在内存中，累积 FLUSH_EVERY 条或调用
+    flush() 时批量写入。
+    """
+
+    def __init__(self, path: Path = MEMO_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._memo: dict[tuple, tuple[str, list, Optional[dict]]] = {}
+        self._unsaved: list[tuple] = []
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memo (
+                    ts_code TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    rules TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    periods TEXT NOT NULL,
+                    result TEXT,
+                    PRIMARY KEY (ts_code, start_date, end_date, rules)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memo_end ON memo (end_date)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, ts_code: str, start_date: str, end_date: str, rules: str, version: str):
+        """查找备忘
+
+        Returns:
+            (periods, result)，未命中或数据版本不一致时返回 MISS
+        """
+        key = (ts_code, start_date, end_date, rules)
+        with self._lock:
+            entry = self._memo.get(key)
+            if entry is None:
+                row = self._db().execute(
+                    "SELECT version, periods, result FROM memo "
+                    "WHERE ts_code = ? AND start_date = ? AND end_date = ? AND rules = ?",
+                    key
+                ).fetchone()
+                if row is None:
+                    return MISS
+                entry = (row[0], json.loads(row[1]), json.loads(row[2]) if row[2] else None)
+                self._memo[key] = entry
+
+        if entry[0] != version:
+            return MISS
+        return entry[1], entry[2]
+
+    def put(self, ts_code: str, start_date: str, end_date: str, rules: str, version: str,
+            periods: list, result: Optional[dict]):
+        """记录一只股票的计算结果"""
+        key = (ts_code, start_date, end_date, rules)
+        with self._lock:
+            self._memo[key] = (version, periods, result)
+            self._unsaved.append(key + (
+                version,
+                json.dumps(periods, ensure_ascii=False),
+                json.dumps(result, ensure_ascii=False) if result else None
+            ))
+            if len(self._unsaved) >= FLUSH_EVERY:
+                self._flush_locked()
+
+    def flush(self):
+        """把内存中的新备忘写入 SQLite"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._unsaved:
+            return
+        rows, self._unsaved = self._unsaved, []
+        try:
+            conn = self._db()
+            conn.executemany("""
+                INSERT OR REPLACE INTO memo
+                (ts_code, start_date, end_date, rules, version, periods, result)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"写入筛选备忘失败: {e}")
+
+    def prune(self, today: str):
+        """删除区间结束于 KEEP_DAYS 天之前的备忘"""
+        with self._lock:
+            self._flush_locked()
+            conn = self._db()
+            conn.execute("DELETE FROM memo WHERE end_date < ?", (shift_date(today, -KEEP_DAYS),))
+            conn.commit()
+            self._memo.clear()
+
+    def clear(self):
+        """清空全部备忘"""
+        with self._lock:
+            self._unsaved = []
+            self._memo.clear()
+            conn = self._db()
+            conn.execute("DELETE FROM memo")
+            conn.commit()
+
+
+# 全局实例
+screen_memo = ScreenMemo()
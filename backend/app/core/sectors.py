@@ -0,0 +1,265 @@
+"""板块目录和成分股索引 - 本地持久化，过期后先返回旧数据再在后台刷新"""
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from .bar_store import BAR_DIR
+from .config import settings
+
+SECTORS_PATH = BAR_DIR.parent / "sectors.db"
+
+# 多板块筛选的组合方式
+UNION = "union"
+INTERSECTION = "intersection"
+SECTOR_MODES = (UNION, INTERSECTION)
+
+# 刷新失败后多久再重试
+RETRY_SECONDS = 300
+
+
+def sector_names(sector: Union[str, list[str], None]) -> list[str]:
+    """板块参数规整为去重后的名称列表（保持顺序）"""
+    if not sector:
+        return []
+    names = [sector] if isinstance(sector, str) else sector
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+
+class SectorIndex:
+    """板块目录 + 板块 -> 成分股的倒排索引
+
+    目录和成分股写入 SQLite，查询在内存中完成（成分股为 frozenset，多板块
+    并集/交集只做集合运算）。超过 sector_refresh_hours 的数据照常返回，同时
+    在后台刷新（同一时间只有一个刷新）；从未获取过的目录或板块才会同步
+    请求数据源。收盘后预取时调用 refresh() 整体刷新。
+
+    Args:
+        path: SQLite 缓存路径
+        source: 数据源，需提供 fetch_sector_catalog() 和
+            fetch_sector_members(name, type)，失败时返回 None；默认使用
+            data_client，之后可以通过 source 属性替换
+    """
+
+    def __init__(self, path: Path = SECTORS_PATH, source=None):
+        self.path = Path(path)
+        self.source = source
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._loaded = False
+        # 目录: 名称 -> {name, code, type}，按名称排序
+        self._catalog: dict[str, dict] = {}
+        self._catalog_fetched = 0.0
+        # 倒排索引: 板块 -> (成分股, 获取时间)
+        self._members: dict[str, tuple[frozenset, float]] = {}
+        self._refreshing: set[str] = set()
+        self._retry_at: dict[str, float] = {}
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sectors (
+                    name TEXT PRIMARY KEY,
+                    code TEXT NOT NULL DEFAULT '',
+                    type TEXT NOT NULL DEFAULT ''
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS members (
+                    sector TEXT NOT NULL,
+                    ts_code TEXT NOT NULL,
+                    PRIMARY KEY (sector, ts_code)
+                )
+            """)
+            # 目录（键为空字符串）和各板块成分股的获取时间
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS fetched (
+                    key TEXT PRIMARY KEY,
+                    at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self):
+        """首次使用时从 SQLite 读入内存（持有锁时调用）"""
+        if self._loaded:
+            return
+        conn = self._db()
+        fetched = dict(conn.execute("SELECT key, at FROM fetched"))
+        self._catalog = {name: {'name': name, 'code': code, 'type': kind}
+                         for name, code, kind in conn.execute("SELECT name, code, type FROM sectors ORDER BY name")}
+        self._catalog_fetched = fetched.pop('', 0.0)
+        groups: dict[str, list[str]] = {}
+        for sector, ts_code in conn.execute("SELECT sector, ts_code FROM members"):
+            groups.setdefault(sector, []).append(ts_code)
+        self._members = {sector: (frozenset(groups.get(sector, ())), at) for sector, at in fetched.items()}
+        self._loaded = True
+
+    def _source(self):
+        if self.source is not None:
+            return self.source
+        from .tushare_client import data_client
+        return data_client
+
+    def _stale(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at >= settings.sector_refresh_hours * 3600
+
+    # ---------- 目录 ----------
+
+    def catalog(self) -> list[dict]:
+        """板块目录（每项含 name、code、type 和已知的成分股数 count）"""
+        with self._lock:
+            self._load()
+            empty = not self._catalog
+            stale = self._stale(self._catalog_fetched)
+            retry = time.monotonic() >= self._retry_at.get('', 0)
+        if empty and retry:
+            self.refresh_catalog()
+        elif stale:
+            self._revalidate('', self.refresh_catalog)
+
+        with self._lock:
+            return [
+                {**entry, 'count': len(self._members[name][0]) if name in self._members else None}
+                for name, entry in self._catalog.items()
+            ]
+
+    def refresh_catalog(self) -> bool:
+        """从数据源重新获取目录（失败时保留旧目录）"""
+        sectors = self._source().fetch_sector_catalog()
+        if not sectors:
+            with self._lock:
+                self._retry_at[''] = time.monotonic() + RETRY_SECONDS
+            return False
+
+        now = time.time()
+        catalog = {s['name']: {'name': s['name'], 'code': s.get('code', ''), 'type': s.get('type', '')}
+                   for s in sorted(sectors, key=lambda s: s['name'])}
+        with self._lock:
+            self._load()
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM sectors")
+                conn.executemany("INSERT INTO sectors (name, code, type) VALUES (?, ?, ?)",
+                                 [(e['name'], e['code'], e['type']) for e in catalog.values()])
+                conn.execute("INSERT OR REPLACE INTO fetched (key, at) VALUES ('', ?)", (now,))
+            self._catalog = catalog
+            self._catalog_fetched = now
+        return True
+
+    # ---------- 成分股 ----------
+
+    def members(self, name: str) -> frozenset:
+        """板块成分股 (ts_code)，从未获取过时同步获取，过期时后台刷新"""
+        with self._lock:
+            self._load()
+            cached = self._members.get(name)
+            retry = time.monotonic() >= self._retry_at.get(name, 0)
+        if cached is None:
+            if retry:
+                self.refresh_members(name)
+            with self._lock:
+                cached = self._members.get(name)
+            return cached[0] if cached else frozenset()
+        if self._stale(cached[1]):
+            self._revalidate(name, lambda: self.refresh_members(name))
+        return cached[0]
+
+    def refresh_members(self, name: str) -> bool:
+        """从数据源重新获取一个板块的成分股（失败时保留旧数据）"""
+        with self._lock:
+            self._load()
+            kind = self._catalog.get(name, {}).get('type', '')
+        codes = self._source().fetch_sector_members(name, kind)
+        if codes is None:
+            with self._lock:
+                self._retry_at[name] = time.monotonic() + RETRY_SECONDS
+            return False
+
+        now = time.time()
+        members = frozenset(codes)
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM members WHERE sector = ?", (name,))
+                conn.executemany("INSERT INTO members (sector, ts_code) VALUES (?, ?)",
+                                 [(name, code) for code in members])
+                conn.execute("INSERT OR REPLACE INTO fetched (key, at) VALUES (?, ?)", (name, now))
+            self._members[name] = (members, now)
+        return True
+
+    def select(self, names: list[str], mode: str = UNION) -> frozenset:
+        """多个板块成分股的并集或交集"""
+        sets = [self.members(name) for name in names]
+        if not sets:
+            return frozenset()
+        if mode == INTERSECTION:
+            return frozenset.intersection(*sets)
+        return frozenset.union(*sets)
+
+    def labels(self, names: list[str]) -> dict[str, str]:
+        """ts_code -> 所属的第一个板块（按 names 顺序），用于标注行业为空的股票"""
+        labels: dict[str, str] = {}
+        for name in reversed(names):
+            labels.update(dict.fromkeys(self.members(name), name))
+        return labels
+
+    # ---------- 刷新 ----------
+
+    def _revalidate(self, key: str, refresh: Callable[[], bool]):
+        """后台刷新一项（同一项同时只刷新一次，失败后 RETRY_SECONDS 内不再重试）"""
+        with self._lock:
+            if key in self._refreshing or time.monotonic() < self._retry_at.get(key, 0):
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                refresh()
+            except Exception as e:
+                print(f"刷新板块数据失败 ({key or '目录'}): {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=run, name="sector-refresh", daemon=True).start()
+
+    def refresh(self, cancel_event: Optional[threading.Event] = None) -> int:
+        """刷新目录和全部已知板块的成分股（收盘后预取时调用）
+
+        Returns:
+            成功刷新成分股的板块数
+        """
+        self.refresh_catalog()
+        with self._lock:
+            self._load()
+            names = list(dict.fromkeys([*self._catalog, *self._members]))
+
+        refreshed = 0
+        for name in names:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if self.refresh_members(name):
+                refreshed += 1
+        return refreshed
+
+    def status(self) -> dict:
+        with self._lock:
+            self._load()
+            return {
+                "sectors": len(self._catalog),
+                "indexed": len(self._members),
+                "refreshed_at": datetime.fromtimestamp(self._catalog_fetched).isoformat(timespec="seconds")
+                if self._catalog_fetched else None,
+                "stale": self._stale(self._catalog_fetched),
+            }
+
+
+# 全局实例
+sector_index = SectorIndex()
@@ -0,0 +1,150 @@
+"""多进程分片筛选 - 将股票列表切分到多个进程，绕开 GIL 并行处理"""
+import heapq
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .rate_limit import rate_limiters
+from .screen_memo import screen_memo
+from .tasks import TaskControl
+from .tushare_client import data_client
+
+# 每个进程分到的分片数，分片越多结果回传越及时、负载越均衡
+SHARDS_PER_PROCESS = 4
+
+
+def _init_worker(share: int):
+    """子进程初始化：数据源调用频率按份数均分"""
+    for limiter in rate_limiters.values():
+        limiter.set_rate(limiter.rate * 60 / share)
+
+
+def _screen_shard(stocks: list[tuple], start_date: str, end_date: str,
+                  events, cancel, pause) -> list[dict]:
+    """在子进程中筛选一个分片，每 10 只股票上报一次进度
+
+    Returns:
+        该分片的结果（按回落幅度降序）
+    """
+    control = TaskControl(cancel, pause)
+    results = []
+    reported = found = 0
+
+    for i, (ts_code, name, industry) in enumerate(stocks):
+        if control.wait_while_paused():
+            break
+
+        try:
+            result = data_client._screen_one(ts_code, name, industry, start_date, end_date, control)
+        except Exception as e:
+            print(f"筛选 {ts_code} 失败: {e}")
+            result = None
+        if result:
+            results.append(result)
+            found += 1
+
+        if (i + 1) % 10 == 0:
+            events.put((i + 1 - reported, found, f"正在处理: {ts_code} {name}"))
+            reported, found = i + 1, 0
+
+    events.put((len(stocks) - reported if not control.cancelled else 0, found, None))
+    screen_memo.flush()
+    results.sort(key=lambda x: x['drop_ratio'], reverse=True)
+    return results
+
+
+def screen_sharded(
+    stock_list: pd.DataFrame,
+    start_date: str,
+    end_date: str,
+    processes: int,
+    progress_callback: Optional[Callable] = None,
+    results_callback: Optional[Callable] = None,
+    control: Optional[TaskControl] = None,
+    rate_share: int = 1
+) -> list[dict]:
+    """多进程筛选股票列表
+
+    Args:
+        stock_list: 含 ts_code/name/industry 的股票列表
+        start_date/end_date: 日线区间 YYYYMMDD
+        processes: 进程数
+        progress_callback: 进度回调，参数 (current, total, found, status)
+        results_callback: 分片完成时回调，参数为本次新增的结果（合并排序只在最后做一次）
+        control: 所属任务的暂停/取消标志，同步给子进程
+        rate_share: 与其他同时运行的任务均分调用频率的份数
+
+    Returns:
+        全部结果（按回落幅度降序）
+    """
+    stocks = [
+        (row.ts_code, row.name, row.industry if isinstance(row.industry, str) else '')
+        for row in stock_list[['ts_code', 'name', 'industry']].itertuples(index=False)
+    ]
+    total = len(stocks)
+    if not total:
+        return []
+
+    n_shards = min(total, processes * SHARDS_PER_PROCESS)
+    shards = [stocks[i::n_shards] for i in range(n_shards)]
+
+    control = control or TaskControl()
+    ctx = multiprocessing.get_context("spawn")
+    shard_results: list[list[dict]] = []
+    processed = found = 0
+
+    with ctx.Manager() as manager, ProcessPoolExecutor(
+        max_workers=processes, mp_context=ctx, initializer=_init_worker,
+        initargs=(processes * max(rate_share, 1),)
+    ) as pool:
+        events = manager.Queue()
+        cancel = manager.Event()
+        pause = manager.Event()
+        pending = {pool.submit(_screen_shard, shard, start_date, end_date, events, cancel, pause)
+                   for shard in shards}
+
+        while pending:
+            # 把任务的暂停/取消状态同步给子进程
+            cancelled, paused = control.cancelled, control.paused
+            if cancelled and not cancel.is_set():
+                cancel.set()
+                for future in pending:
+                    future.cancel()
+            if paused and not pause.is_set():
+                pause.set()
+            elif not paused and pause.is_set():
+                pause.clear()
+
+            done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+
+            status = None
+            while True:
+                try:
+                    delta, new_found, message = events.get_nowait()
+                except queue.Empty:
+                    break
+                processed += delta
+                found += new_found
+                status = message or status
+
+            new_results = []
+            for future in done:
+                if future.cancelled():
+                    continue
+                try:
+                    shard = future.result()
+                except Exception as e:
+                    print(f"分片筛选失败: {e}")
+                    continue
+                shard_results.append(shard)
+                new_results.extend(shard)
+
+            if progress_callback and (status or done):
+                progress_callback(min(processed, total), total, found, status or "正在处理...")
+            if results_callback and new_results:
+                results_callback(new_results)
+
+    return list(heapq.merge(*shard_results, key=lambda x: -x['drop_ratio']))
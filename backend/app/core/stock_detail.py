@@ -0,0 +1,120 @@
+"""单只股票详情的编码和缓存 - 列式日线、ETag、最近查看的 LRU"""
+import gzip
+import json
+import math
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Optional
+
+import pandas as pd
+
+from .config import settings
+from .metrics import registry
+
+try:
+    import orjson  # 可选依赖，编码更快；未安装时使用标准库 json
+except ImportError:
+    orjson = None
+
+# 小于该字节数的响应不压缩
+GZIP_MIN_BYTES = 1024
+
+detail_cache_lookups = registry.counter(
+    "screener_detail_cache_total", "股票详情缓存查询次数", ("outcome",))
+
+
+def _dumps(payload: dict) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _clean(values: list) -> list:
+    """NaN 替换为 None（JSON 不支持 NaN）"""
+    return [None if isinstance(v, float) and math.isnan(v) else v for v in values]
+
+
+def encode_daily(df: pd.DataFrame, fmt: str):
+    """日线编码为 records（对象列表）或 columnar（字段 -> 数组，不重复 ts_code）"""
+    if fmt == "columnar":
+        return {col: _clean(df[col].tolist()) for col in df.columns if col != 'ts_code'}
+    columns = {col: _clean(df[col].tolist()) for col in df.columns}
+    names = list(columns)
+    return [dict(zip(names, row)) for row in zip(*columns.values())]
+
+
+class DetailEntry:
+    """编码好的详情响应，gzip 压缩结果在第一次需要时生成并复用"""
+
+    __slots__ = ("etag", "body", "_gzipped")
+
+    def __init__(self, etag: str, body: bytes):
+        self.etag = etag
+        self.body = body
+        self._gzipped: Optional[bytes] = None
+
+    def gzipped(self) -> bytes:
+        if self._gzipped is None:
+            self._gzipped = gzip.compress(self.body, compresslevel=6)
+        return self._gzipped
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """If-None-Match 是否包含当前 ETag（弱比较）"""
+        if not if_none_match:
+            return False
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in tags or self.etag.removeprefix("W/") in tags
+
+
+def build_detail(ts_code: str, name: str, daily_data: pd.DataFrame, limit_up_periods: list,
+                 fmt: str, version: str) -> DetailEntry:
+    """编码详情，ETag 由最新日线日期和本地日线版本决定"""
+    start_date = str(daily_data['trade_date'].iloc[0])
+    last_date = str(daily_data['trade_date'].iloc[-1])
+    digest = zlib.crc32(f"{start_date}:{version}:{name}".encode())
+    etag = f'W/"{ts_code}-{last_date}-{fmt}-{digest:08x}"'
+    body = _dumps({
+        "ts_code": ts_code,
+        "name": name,
+        "format": fmt,
+        "daily_data": encode_daily(daily_data, fmt),
+        "limit_up_periods": limit_up_periods,
+    })
+    return DetailEntry(etag, body)
+
+
+class DetailCache:
+    """最近查看的股票详情（LRU），条目带本地日线版本，版本变化即失效"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[tuple, tuple[str, DetailEntry]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, version: str) -> Optional[DetailEntry]:
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None or cached[0] != version:
+                detail_cache_lookups.inc(outcome="miss")
+                return None
+            self._entries.move_to_end(key)
+        detail_cache_lookups.inc(outcome="hit")
+        return cached[1]
+
+    def put(self, key: tuple, version: str, entry: DetailEntry):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (version, entry)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 全局实例
+detail_cache = DetailCache(settings.detail_cache_size)
@@ -0,0 +1,112 @@
+"""参数扫描 - 读取一次本地日线，在矩阵上批量评估 (回溯天数 × 涨停阈值 × 最少连板数) 的全部组合"""
+import numpy as np
+import pandas as pd
+
+from .limit_up import MAIN_BOARD_LIMIT, limit_up_price
+from .panel import (
+    Panel,
+    last_valid_index,
+    streaks_from_mask,
+    stock_labels,
+    first_per_stock,
+    build_results
+)
+
+# 单次扫描允许的最大组合数
+MAX_COMBINATIONS = 500
+
+
+def combo_key(lookback_days: int, threshold: float, min_streak: int) -> str:
+    """组合的标识（写入结果的 rule 字段）"""
+    return f"L{lookback_days}/T{threshold:g}/S{min_streak}"
+
+
+def hit_matrix(lookbacks: list[int], thresholds: list[float], min_streaks: list[int],
+               counts: dict[str, int]) -> list:
+    """按组合标识的命中数还原命中数矩阵 [回溯][阈值][连板数]"""
+    return [[[counts.get(combo_key(lb, th, ms), 0) for ms in min_streaks]
+             for th in thresholds]
+            for lb in lookbacks]
+
+
+def threshold_mask(panel: Panel, rates: np.ndarray, threshold: float) -> np.ndarray:
+    """按扫描阈值标记涨停日
+
+    threshold 为主板等价的涨幅：0.10 即按涨停价判定（与常规筛选一致），
+    0.095 等较低的值把接近涨停的日子也算作涨停；其他板块按涨停幅度等比例
+    换算。涨幅明显超过涨停限制的日子（无涨跌幅限制）仍然不算。
+    """
+    scaled = rates[np.newaxis, :] * (threshold / MAIN_BOARD_LIMIT)
+    with np.errstate(invalid='ignore'):
+        by_price = panel.close >= limit_up_price(panel.pre_close, scaled) - 0.005
+        by_pct = panel.pct_chg >= scaled * 100
+        hit = np.where(np.isnan(panel.pre_close), by_pct, by_price)
+        return hit & ~(panel.pct_chg > rates[np.newaxis, :] * 100 + 1)
+
+
+def sweep_panel(
+    panel: Panel,
+    stock_info: pd.DataFrame,
+    windows: dict[int, str],
+    thresholds: list[float],
+    min_streaks: list[int]
+) -> dict:
+    """在同一个矩阵上评估全部参数组合
+
+    每个回溯天数取矩阵的一段行（视图，不复制），每个阈值计算一次涨停掩码
+    和连板区间，不同的最少连板数只是在同一组连板上的过滤。
+
+    Args:
+        panel: 覆盖最长回溯区间的 load_panel 结果
+        stock_info: 含 ts_code/name/industry 的股票列表
+        windows: 回溯天数 -> 该回溯的起始日期 (YYYYMMDD)
+        thresholds: 涨停阈值列表（见 threshold_mask）
+        min_streaks: 最少连板数列表
+
+    Returns:
+        {"lookbacks", "thresholds", "min_streaks",
+         "hits": 命中数矩阵 [回溯][阈值][连板数],
+         "results": 组合标识 -> 命中结果（按回落幅度降序，带 rule 字段）}
+    """
+    lookbacks = list(windows)
+    hits = np.zeros((len(lookbacks), len(thresholds), len(min_streaks)), dtype=int)
+    matched: dict[str, list[dict]] = {}
+    if panel.codes and len(panel.dates):
+        names, industries, rates = stock_labels(panel, stock_info)
+        last_idx = last_valid_index(panel.close)
+        current = panel.close[last_idx, np.arange(len(panel.codes))]
+    else:
+        names, industries, rates, current = [], [], np.empty(0), np.empty(0)
+
+    for i, lookback in enumerate(lookbacks):
+        lo = int(np.searchsorted(panel.dates, int(windows[lookback])))
+        window = Panel(panel.dates[lo:], panel.codes,
+                       {f: values[lo:] for f, values in panel.fields.items()})
+
+        for j, threshold in enumerate(thresholds):
+            if len(window.dates) and window.codes:
+                mask = threshold_mask(window, rates, threshold)
+                rows, cols, counts, end_rows = streaks_from_mask(mask, window.close, min(min_streaks))
+                qualified = (last_idx[cols] >= 0) & (current[cols] < window.close[rows, cols])
+            else:
+                rows = cols = counts = end_rows = np.empty(0, dtype=int)
+                qualified = np.empty(0, dtype=bool)
+
+            for k, min_streak in enumerate(min_streaks):
+                key = combo_key(lookback, threshold, min_streak)
+                pick = first_per_stock(cols, qualified & (counts >= min_streak))
+                results = build_results(window, names, industries, current,
+                                        rows[pick], cols[pick], counts[pick], end_rows[pick])
+                for result in results:
+                    result['rule'] = key
+                results.sort(key=lambda x: x['drop_ratio'], reverse=True)
+                matched[key] = results
+                hits[i, j, k] = len(results)
+
+    return {
+        "lookbacks": lookbacks,
+        "thresholds": list(thresholds),
+        "min_streaks": list(min_streaks),
+        "hits": hits.tolist(),
+        "results": matched
+    }
@@ -0,0 +1,236 @@
+"""筛选任务调度 - 任务注册表、每个任务独立的暂停/取消标志、有界优先级队列"""
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from typing import Callable, Optional
+
+from .config import settings
+from .result_log import ResultLog
+
+# 保留在注册表中的已结束任务数（更早的任务从数据库查询）
+FINISHED_TASKS_KEPT = 20
+
+QUEUED = "排队中"
+RUNNING = "running"
+PAUSED = "已暂停"
+CANCELLED = "已取消"
+INTERRUPTED = "已中断"  # 服务重启时仍在运行或排队的任务
+
+# 尚未结束的任务状态（服务重启后这些任务按中断处理）
+ACTIVE_STATUSES = (RUNNING, PAUSED, QUEUED)
+
+
+class TaskControl:
+    """单个任务的暂停/取消标志
+
+    Args:
+        cancel/pause: 可传入已有的事件对象（例如子进程中的 Manager.Event 代理），
+            默认新建 threading.Event
+    """
+
+    def __init__(self, cancel=None, pause=None):
+        self.cancel_event = cancel if cancel is not None else threading.Event()
+        self.pause_event = pause if pause is not None else threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    @property
+    def paused(self) -> bool:
+        return self.pause_event.is_set()
+
+    def cancel(self):
+        """取消任务（同时解除暂停，让等待中的线程尽快退出）"""
+        self.cancel_event.set()
+        self.pause_event.clear()
+
+    def set_paused(self, paused: bool = True):
+        if paused:
+            self.pause_event.set()
+        else:
+            self.pause_event.clear()
+
+    def wait_while_paused(self) -> bool:
+        """暂停时阻塞等待，返回是否已取消"""
+        while self.pause_event.is_set() and not self.cancel_event.is_set():
+            time.sleep(0.1)
+        return self.cancel_event.is_set()
+
+
+class ScreenTask:
+    """一个筛选任务：参数、控制标志、内存中的进度和结果"""
+
+    def __init__(self, task_id: str, params: dict, priority: int = 0):
+        self.task_id = task_id
+        self.params = params
+        self.priority = priority
+        self.control = TaskControl()
+        self.results = ResultLog()
+        self.lock = threading.Lock()
+        self.state = {
+            "current": 0,
+            "total": 0,
+            "found": 0,
+            "status": QUEUED,
+            "is_paused": False,
+            "current_batch": 0,
+            "total_batches": 0,
+        }
+
+    def update(self, **fields):
+        with self.lock:
+            self.state.update(fields)
+
+    def snapshot(self) -> dict:
+        """当前进度（供轮询接口和推送共用）"""
+        with self.lock:
+            state = dict(self.state)
+
+        batch_info = ""
+        if state["total_batches"] > 1:
+            batch_info = f" (批次 {state['current_batch']}/{state['total_batches']})"
+
+        return {
+            "current": state["current"],
+            "total": state["total"],
+            "found": state["found"],
+            "status": f"{state['status']}{batch_info}",
+            "is_paused": state["is_paused"],
+            "current_batch": state["current_batch"],
+            "total_batches": state["total_batches"],
+            "task_id": self.task_id,
+            "priority": self.priority,
+            "progress": round(state["current"] / state["total"] * 100, 1)
+                if state["total"] > 0 else 0
+        }
+
+
+class TaskQueueFull(Exception):
+    """排队任务数已达上限"""
+
+
+class TaskScheduler:
+    """任务注册表 + 有界优先级队列
+
+    最多同时运行 max_running 个任务，其余按优先级（数值大的优先，同优先级
+    先到先得）排队，排队数超过 max_queued 时拒绝新任务。每个任务在独立的
+    后台线程中执行 runner(task)，结束后自动启动下一个排队任务。
+
+    Args:
+        max_running: 同时运行的任务数上限
+        max_queued: 排队任务数上限
+    """
+
+    def __init__(self, max_running: int = 2, max_queued: int = 16):
+        self.max_running = max(max_running, 1)
+        self.max_queued = max(max_queued, 0)
+        self._tasks: dict[str, ScreenTask] = {}
+        self._queue: list[tuple[int, int, ScreenTask, Callable]] = []
+        self._running: set[str] = set()
+        self._finished: deque[str] = deque()
+        self._seq = itertools.count()
+        self._latest: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def submit(self, task: ScreenTask, runner: Callable[[ScreenTask], None]) -> bool:
+        """提交任务
+
+        Returns:
+            True 表示已立即开始运行，False 表示进入排队
+
+        Raises:
+            TaskQueueFull: 没有空闲名额且队列已满
+        """
+        with self._lock:
+            if len(self._running) >= self.max_running and len(self._queue) >= self.max_queued:
+                raise TaskQueueFull(f"排队任务已达上限 ({self.max_queued})")
+
+            self._tasks[task.task_id] = task
+            self._latest = task.task_id
+            heapq.heappush(self._queue, (-task.priority, next(self._seq), task, runner))
+            started = self._dispatch()
+
+        return task.task_id in started
+
+    def _dispatch(self) -> list[str]:
+        """在持有锁时调用：有空闲名额就启动排队的任务"""
+        started = []
+        while self._queue and len(self._running) < self.max_running:
+            _, _, task, runner = heapq.heappop(self._queue)
+            self._running.add(task.task_id)
+            task.update(status=PAUSED if task.control.paused else RUNNING)
+            thread = threading.Thread(
+                target=self._run, args=(task, runner),
+                name=f"screen-{task.task_id}", daemon=True
+            )
+            thread.start()
+            started.append(task.task_id)
+        return started
+
+    def _run(self, task: ScreenTask, runner: Callable):
+        try:
+            runner(task)
+        except Exception as e:
+            print(f"筛选任务 {task.task_id} 异常退出: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(task.task_id)
+                self._retire(task.task_id)
+                self._dispatch()
+
+    def _retire(self, task_id: str):
+        """记录已结束的任务，只保留最近 FINISHED_TASKS_KEPT 个"""
+        self._finished.append(task_id)
+        while len(self._finished) > FINISHED_TASKS_KEPT:
+            self._tasks.pop(self._finished.popleft(), None)
+
+    def dequeue(self, task_id: str) -> Optional[ScreenTask]:
+        """从队列中移除尚未开始的任务，返回该任务（不在队列中时返回 None）"""
+        with self._lock:
+            for i, entry in enumerate(self._queue):
+                if entry[2].task_id == task_id:
+                    self._queue[i] = self._queue[-1]
+                    self._queue.pop()
+                    heapq.heapify(self._queue)
+                    self._retire(task_id)
+                    return entry[2]
+        return None
+
+    def get(self, task_id: Optional[str] = None) -> Optional[ScreenTask]:
+        """按 ID 查找任务，不指定时返回最近提交的任务"""
+        with self._lock:
+            return self._tasks.get(task_id or self._latest)
+
+    def is_active(self, task_id: str) -> bool:
+        """任务是否在运行或排队中"""
+        with self._lock:
+            return task_id in self._running or any(entry[2].task_id == task_id for entry in self._queue)
+
+    def queue_position(self, task_id: str) -> int:
+        """排队位置（从 1 开始），不在队列中返回 0"""
+        with self._lock:
+            order = sorted(self._queue, key=lambda entry: entry[:2])
+            for i, entry in enumerate(order):
+                if entry[2].task_id == task_id:
+                    return i + 1
+        return 0
+
+    def tasks(self) -> list[ScreenTask]:
+        """注册表中的任务（运行中、排队中和最近结束的），按提交顺序"""
+        with self._lock:
+            return list(self._tasks.values())
+
+    @property
+    def running_count(self) -> int:
+        return len(self._running)
+
+    @property
+    def queued_count(self) -> int:
+        return len(self._queue)
+
+
+# 全局实例
+task_scheduler = TaskScheduler(settings.max_concurrent_screens, settings.screen_queue_size)
@@ -0,0 +1,202 @@
+"""交易日历 - 本地缓存的上交所交易日历，提供最近收盘交易日、前 N 个交易日等查询"""
+import bisect
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .bar_store import BAR_DIR, SETTLE_HOUR, shift_date
+
+CALENDAR_PATH = BAR_DIR.parent / "calendar.db"
+
+# 当年及以后的日历多少天重新获取一次（节假日安排可能在年内公布）
+REFRESH_DAYS = 30
+
+# 获取失败后多久再重试（期间按工作日估算）
+RETRY_SECONDS = 300
+
+
+class TradeCalendar:
+    """按年缓存的交易日历
+
+    日历按自然年整体获取并写入 SQLite，之后的查询都在内存中完成。数据源
+    不可用时按工作日估算（不写入缓存），节假日会被当作交易日，只会多请求
+    不会漏数据。
+
+    Args:
+        path: SQLite 缓存路径
+        fetcher: 获取日历的函数，参数 (start_date, end_date)，返回区间内的
+            交易日列表 (YYYYMMDD)，失败时返回 None；默认使用 data_client。
+            之后可以通过 fetcher 属性替换（例如使用合成数据源）
+    """
+
+    def __init__(self, path: Path = CALENDAR_PATH, fetcher: Optional[Callable] = None):
+        self.path = Path(path)
+        self.fetcher = fetcher
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._open: list[str] = []
+        self._years: dict[int, str] = {}
+        self._loaded = False
+        self._retry_at: dict[int, float] = {}
+        self._fetching: set[int] = set()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS trade_days (
+                    cal_date TEXT PRIMARY KEY
+                )
+            """)
+            # 已获取的年份及获取日期
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS years (
+                    year INTEGER PRIMARY KEY,
+                    fetched TEXT NOT NULL
+                )
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self):
+        """首次使用时从 SQLite 读入内存（持有锁时调用）"""
+        if self._loaded:
+            return
+        conn = self._db()
+        self._open = [r[0] for r in conn.execute("SELECT cal_date FROM trade_days ORDER BY cal_date")]
+        self._years = {r[0]: r[1] for r in conn.execute("SELECT year, fetched FROM years")}
+        self._loaded = True
+
+    def _fetch(self, start_date: str, end_date: str) -> Optional[list[str]]:
+        if self.fetcher is not None:
+            return self.fetcher(start_date, end_date)
+        from .tushare_client import data_client
+        return data_client.fetch_trade_calendar(start_date, end_date)
+
+    def _ensure(self, first_year: int, last_year: int):
+        """保证这些年份的日历已缓存
+
+        网络请求在锁外进行，同一年份同时只有一个线程获取；获取期间其他线程
+        照常使用旧缓存（没有缓存时按工作日估算），不会等待。
+        """
+        today = datetime.now()
+        with self._lock:
+            self._load()
+            pending = []
+            for year in range(first_year, last_year + 1):
+                fetched = self._years.get(year)
+                if fetched is not None and (
+                    year < today.year
+                    or (today - datetime.strptime(fetched, "%Y%m%d")).days < REFRESH_DAYS
+                ):
+                    continue
+                if year in self._fetching or time.monotonic() < self._retry_at.get(year, 0):
+                    continue
+                self._fetching.add(year)
+                pending.append(year)
+
+        for year in pending:
+            try:
+                days = self._fetch(f"{year}0101", f"{year}1231")
+            except Exception as e:
+                print(f"获取 {year} 年交易日历失败: {e}")
+                days = None
+
+            with self._lock:
+                self._fetching.discard(year)
+                if not days:
+                    self._retry_at[year] = time.monotonic() + RETRY_SECONDS
+                    continue
+
+                prefix = str(year)
+                kept = [d for d in self._open if not d.startswith(prefix)]
+                self._open = sorted(kept + [d for d in days if d.startswith(prefix)])
+                self._years[year] = today.strftime("%Y%m%d")
+
+                conn = self._db()
+                with conn:
+                    conn.execute("DELETE FROM trade_days WHERE cal_date BETWEEN ? AND ?",
+                                 (f"{year}0101", f"{year}1231"))
+                    conn.executemany("INSERT OR IGNORE INTO trade_days (cal_date) VALUES (?)",
+                                     [(d,) for d in days if d.startswith(prefix)])
+                    conn.execute("INSERT OR REPLACE INTO years (year, fetched) VALUES (?, ?)",
+                                 (year, self._years[year]))
+
+    def sessions(self, start_date: str, end_date: str) -> list[str]:
+        """区间内的交易日（含两端）"""
+        if start_date > end_date:
+            return []
+
+        first_year, last_year = int(start_date[:4]), int(end_date[:4])
+        self._ensure(first_year, last_year)
+        with self._lock:
+            if all(year in self._years for year in range(first_year, last_year + 1)):
+                lo = bisect.bisect_left(self._open, start_date)
+                hi = bisect.bisect_right(self._open, end_date)
+                return self._open[lo:hi]
+
+        return pd.bdate_range(start_date, end_date).strftime('%Y%m%d').tolist()
+
+    def is_open(self, date: str) -> bool:
+        """是否为交易日"""
+        return bool(self.sessions(date, date))
+
+    def has_session(self, start_date: str, end_date: str) -> bool:
+        """区间内是否有交易日"""
+        return bool(self.sessions(start_date, end_date))
+
+    def previous_sessions(self, n: int, end_date: Optional[str] = None) -> list[str]:
+        """截止 end_date（含，默认最近收盘交易日）的最近 n 个交易日，按日期升序"""
+        if n <= 0:
+            return []
+        end_date = end_date or self.last_closed_session()
+
+        # 每年约 240 个交易日，按需向前多取一年
+        days = max(n * 7 // 5 + 30, 60)
+        while True:
+            found = self.sessions(shift_date(end_date, -days), end_date)
+            if len(found) >= n or days > 366 * 30:
+                return found[-n:]
+            days *= 2
+
+    def lookback_start(self, n: int, end_date: Optional[str] = None) -> str:
+        """向前回溯 n 个交易日的起始日期"""
+        found = self.previous_sessions(n, end_date)
+        return found[0] if found else (end_date or self.last_closed_session())
+
+    def last_closed_session(self, now: Optional[datetime] = None) -> str:
+        """最近一个已收盘（数据已定稿）的交易日
+
+        当天是交易日且已过 SETTLE_HOUR 点时为当天，否则为之前最近的交易日。
+        """
+        now = now or datetime.now()
+        today = now.strftime("%Y%m%d")
+        if now.hour >= SETTLE_HOUR and self.is_open(today):
+            return today
+        found = self.previous_sessions(1, shift_date(today, -1))
+        return found[-1] if found else shift_date(today, -1)
+
+    def is_stale(self, last_date: Optional[str], now: Optional[datetime] = None) -> bool:
+        """截止 last_date 的数据是否落后于最近收盘交易日"""
+        return not last_date or last_date < self.last_closed_session(now)
+
+    def clear(self):
+        """清空缓存的日历"""
+        with self._lock:
+            conn = self._db()
+            with conn:
+                conn.execute("DELETE FROM trade_days")
+                conn.execute("DELETE FROM years")
+            self._open, self._years = [], {}
+            self._retry_at.clear()
+
+
+# 全局实例
+trade_calendar = TradeCalendar()
@@ -1,56 +1,75 @@
-import tushare as ts
 import pandas as pd
 from datetime import datetime, timedelta
-from typing import Optional, Callable, Generator
+from functools import lru_cache
+from typing import Optional, Callable, Generator, Union
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from .config import settings
-
-# 尝试导入 AkShare
-try:
-    import akshare as ak
-    AKSHARE_AVAILABLE = True
-except ImportError:
-    AKSHARE_AVAILABLE = False
-
-# 全局取消标志
-_cancel_flag = threading.Event()
-_pause_flag = threading.Event()
-
-def get_cancel_state() -> tuple[bool, bool]:
-    """获取当前的取消和暂停状态"""
-    return _cancel_flag.is_set(), _pause_flag.is_set()
-
-def set_cancel_state(cancel: bool = True):
-    """设置取消状态"""
-    if cancel:
-        _cancel_flag.set()
-    else:
-        _cancel_flag.clear()
-
-def set_pause_state(paused: bool = True):
-    """设置暂停状态"""
-    if paused:
-        _pause_flag.set()
+from .bar_store import bar_store, shift_date
+from .circuit import breakers
+from .limit_up import MAIN_BOARD_LIMIT, find_limit_up_periods, limit_rate
+from .panel import load_panel, screen_codes
+from .rules import screen_codes_rules
+from .sweep import sweep_panel
+from .metrics import source_call, stage_latency, stocks_screened, timed
+from .rate_limit import rate_limiters
+from .screen_memo import MISS, data_version, rules_key, screen_memo
+from .sectors import UNION, sector_index, sector_names
+from .stock_detail import DetailEntry, build_detail, detail_cache
+from .tasks import TaskControl
+from .trade_calendar import trade_calendar
+
+
+@lru_cache(maxsize=1)
+def _akshare():
+    """首次使用时导入 AkShare（依赖很多，导入需要数秒），未安装时返回 None"""
+    try:
+        import akshare
+        return akshare
+    except ImportError:
+        return None
+
+
+def _ts_code(code: str) -> str:
+    """6 位代码转换为 000001.SZ 格式"""
+    if code.startswith('6') or code.startswith('5'):
+        return f"{code}.SH"
+    elif code.startswith('8') or code.startswith('4'):
+        return f"{code}.BJ"
     else:
-        _pause_flag.clear()
-
-def reset_control_flags():
-    """重置所有控制标志"""
-    _cancel_flag.clear()
-    _pause_flag.clear()
+        return f"{code}.SZ"
 
 
 class DataClient:
     """数据客户端 - 支持 Tushare 和 AkShare 双数据源"""
 
     def __init__(self):
-        self.ts: Optional[ts.TushareAPI] = None
+        self.ts = None  # Tushare pro 接口，首次 connect 时创建
+        self.ready = False  # 数据源库是否已导入（warm_up 完成）
+        # 股票列表缓存: (exclude_st, min_list_days, 板块, 组合方式) -> (获取时间, DataFrame)
+        self._universe: dict[tuple, tuple[float, pd.DataFrame]] = {}
+        self._universe_lock = threading.Lock()
+        # ts_code -> {'name', 'industry'}，详情查询 O(1)
+        self._stock_index: dict[str, dict] = {}
 
     def connect(self):
         if not self.ts:
+            import tushare as ts
             self.ts = ts.pro_api(settings.tushare_token)
         return self.ts
 
+    def warm_up(self):
+        """预先导入 Tushare 和 AkShare，避免第一次筛选时等待导入（在后台线程调用）"""
+        started = time.perf_counter()
+        try:
+            import tushare  # noqa: F401
+        except ImportError as e:
+            print(f"导入 Tushare 失败: {e}")
+        _akshare()
+        self.ready = True
+        print(f"数据源库加载完成，耗时 {time.perf_counter() - started:.1f} 秒")
+
     def verify_token(self) -> dict:
         """
         验证 Tushare Token 是否有效
@@ -62,7 +81,9 @@ class DataClient:
             today = datetime.now().strftime("%Y%m%d")
             start_date = (datetime.now() - timedelta(days=7)).strftime("%Y%m%d")
 
-            cal_data = pro.trade_cal(exchange='SSE', start_date=start_date, end_date=today, fields='cal_date,is_open')
+            rate_limiters['tushare'].acquire()
+            with source_call('tushare', 'trade_cal'):
+                cal_data = pro.trade_cal(exchange='SSE', start_date=start_date, end_date=today, fields='cal_date,is_open')
 
             if cal_data is not None and not cal_data.empty:
                 return {
@@ -83,23 +104,88 @@ class DataClient:
             "last_trade_date": ""
         }
 
-    def get_stock_list(self, exclude_st: bool = True, min_list_days: int = 180, sector: str = None) -> pd.DataFrame:
-        """获取股票列表，优先使用 AkShare（Tushare免费账户受限）
+    def get_stock_list(self, exclude_st: bool = True, min_list_days: int = 180,
+                       sector: Union[str, list[str], None] = None, refresh: bool = False,
+                       sector_mode: str = UNION) -> pd.DataFrame:
+        """获取股票列表（带缓存，有效期 stock_list_ttl 秒），按 ts_code 排序
+
+        返回的 DataFrame 为共享缓存，调用方不要原地修改。顺序固定，分批筛选
+        的断点可以按代码定位。
 
         Args:
             exclude_st: 是否排除ST股票
             min_list_days: 最小上市天数
-            sector: 板块名称（如"新能源"、"半导体"等）
+            sector: 板块名称或名称列表（如"新能源"、"半导体"等），按本地板块
+                索引过滤全市场列表
+            refresh: 忽略缓存重新获取
+            sector_mode: 多个板块时取并集 (union) 或交集 (intersection)
         """
-
-        # 方法1: 使用 AkShare
-        if AKSHARE_AVAILABLE:
-            try:
-                if sector:
-                    # 按板块获取股票
-                    df = self._get_stocks_by_sector(sector)
+        names = sector_names(sector)
+        key = (exclude_st, min_list_days, tuple(names), sector_mode if len(names) > 1 else UNION)
+        with self._universe_lock:
+            cached = self._universe.get(key)
+            if cached and not refresh and time.monotonic() - cached[0] < settings.stock_list_ttl:
+                return cached[1]
+
+        if names:
+            df = self._filter_by_sectors(self.get_stock_list(exclude_st, min_list_days, refresh=refresh),
+                                         names, sector_mode)
+            with self._universe_lock:
+                self._universe[key] = (time.monotonic(), df)
+            return df
+
+        df = self._fetch_stock_list(exclude_st, min_list_days)
+        if df.empty:
+            return df
+
+        df = df.sort_values('ts_code', kind='stable').reset_index(drop=True)
+        with self._universe_lock:
+            self._universe[key] = (time.monotonic(), df)
+            for ts_code, name, industry in df[['ts_code', 'name', 'industry']].itertuples(index=False):
+                entry = self._stock_index.get(ts_code)
+                industry = industry if isinstance(industry, str) else ''
+                if entry is None or not entry['industry']:
+                    self._stock_index[ts_code] = {'name': name, 'industry': industry}
                 else:
-                    # 获取A股实时行情数据
+                    entry['name'] = name
+        return df
+
+    @staticmethod
+    def _filter_by_sectors(market: pd.DataFrame, names: list[str], mode: str) -> pd.DataFrame:
+        """按板块成分股过滤全市场列表，行业为空时标注所属板块"""
+        if market.empty:
+            return market
+        members = sector_index.select(names, mode)
+        df = market[market['ts_code'].isin(members)].reset_index(drop=True)
+        unlabeled = df['industry'].fillna('') == ''
+        if unlabeled.any():
+            df.loc[unlabeled, 'industry'] = df.loc[unlabeled, 'ts_code'].map(sector_index.labels(names))
+        joiner = " ∩ " if mode != UNION and len(names) > 1 else " ∪ "
+        print(f"板块 {joiner.join(names)}: {len(df)} 只股票")
+        return df
+
+    def lookup_stock(self, ts_code: str) -> Optional[dict]:
+        """按代码查询股票名称和行业，索引为空时先加载全市场列表"""
+        if not self._stock_index:
+            self.get_stock_list()
+        return self._stock_index.get(ts_code)
+
+    def invalidate_stock_list(self):
+        """清空股票列表缓存和代码索引"""
+        with self._universe_lock:
+            self._universe.clear()
+            self._stock_index.clear()
+
+    def _fetch_stock_list(self, exclude_st: bool = True, min_list_days: int = 180) -> pd.DataFrame:
+        """从数据源获取全市场股票列表，优先使用 AkShare（Tushare免费账户受限）"""
+
+        # 方法1: 使用 AkShare（熔断期间跳过）
+        ak = _akshare()
+        if ak is not None and breakers['akshare'].allow():
+            try:
+                # 获取A股实时行情数据
+                rate_limiters['akshare'].acquire()
+                with breakers['akshare'].guard(), source_call('akshare', 'stock_zh_a_spot_em'):
                     df = ak.stock_zh_a_spot_em()
 
                 # 转换列名 - AkShare 的列名是中文
@@ -112,15 +198,7 @@ class DataClient:
                 })
 
                 # 格式化股票代码 (000001.SZ 格式)
-                def format_code(code):
-                    if code.startswith('6') or code.startswith('5'):
-                        return f"{code}.SH"
-                    elif code.startswith('8') or code.startswith('4'):
-                        return f"{code}.BJ"
-                    else:
-                        return f"{code}.SZ"
-
-                df['ts_code'] = df['ts_code'].apply(format_code)
+                df['ts_code'] = df['ts_code'].apply(_ts_code)
 
                 # 排除ST股票
                 if exclude_st:
@@ -129,22 +207,26 @@ class DataClient:
                 # 排除北交所
                 df = df[~df['ts_code'].str.endswith('.BJ')]
 
-                # 添加板块/行业信息
+                # 添加行业信息（行情接口不带行业，按板块筛选时用板块名称标注）
                 if 'industry' not in df.columns:
-                    df['industry'] = sector if sector else ''
+                    df['industry'] = ''
 
-                print(f"AkShare 获取到 {len(df)} 只股票" + (f" (板块: {sector})" if sector else ""))
+                print(f"AkShare 获取到 {len(df)} 只股票")
                 return df[['ts_code', 'name', 'industry']]
             except Exception as e:
                 print(f"AkShare 获取股票列表失败: {e}")
 
-        # 方法2: 使用 Tushare
+        # 方法2: 使用 Tushare（熔断期间跳过）
+        if not breakers['tushare'].allow():
+            return pd.DataFrame()
         try:
             pro = self.connect()
 
             # 使用更通用的接口
-            df = pro.stock_basic(exchange='', list_status='L',
-                                fields='ts_code,name,area,industry,list_date,market')
+            rate_limiters['tushare'].acquire()
+            with breakers['tushare'].guard(), source_call('tushare', 'stock_basic'):
+                df = pro.stock_basic(exchange='', list_status='L',
+                                     fields='ts_code,name,area,industry,list_date,market')
 
             if df is not None and not df.empty:
                 # 排除ST股票
@@ -166,72 +248,346 @@ class DataClient:
 
         return pd.DataFrame()
 
-    def get_daily_data(self, ts_code: str, start_date: str, end_date: str) -> pd.DataFrame:
-        """获取股票日线数据，优先使用 AkShare"""
+    def get_daily_data(self, ts_code: str, start_date: str, end_date: str,
+                       control: Optional[TaskControl] = None) -> pd.DataFrame:
+        """获取股票日线数据，优先读取本地存储，只向数据源补齐缺失的日期
+
+        盘中只使用已定稿（前一交易日及之前）的数据，当日行情收盘后才会入库。
+        本地数据超过 cache_days 天未全量同步时重新拉取整个区间。
+        control 为所属任务的控制标志，任务取消时不再等待调用频率。
+        """
+        start_date = start_date.replace('-', '')
+        end_date = min(end_date.replace('-', ''), trade_calendar.last_closed_session())
+        if start_date > end_date:
+            return pd.DataFrame()
+        return self._load_daily(ts_code, start_date, end_date, control)[0]
+
+    def stock_detail(self, ts_code: str, lookback_days: int = 180, trading_days: bool = False,
+                     fmt: str = "records") -> Optional[DetailEntry]:
+        """单只股票的日线和涨停区间（已编码），本地日线未变化时直接返回缓存
 
-        # 方法1: 使用 AkShare
-        if AKSHARE_AVAILABLE:
+        Returns:
+            编码好的详情，区间内没有日线时返回 None
+        """
+        start_date, end_date = self.screen_window(lookback_days, trading_days)
+        key = (ts_code, start_date, end_date, fmt)
+
+        # 本地数据已覆盖整个区间且版本未变时，不再读取日线
+        cov = bar_store.coverage(ts_code)
+        if cov is not None and not self._missing_ranges(cov, start_date, end_date):
+            entry = detail_cache.get(key, data_version(cov))
+            if entry is not None:
+                return entry
+
+        # 名称用于识别 ST 涨停幅度
+        stock_info = self.lookup_stock(ts_code)
+        name = stock_info['name'] if stock_info else ""
+
+        daily_data, cov = self._load_daily(ts_code, start_date, end_date)
+        if daily_data.empty:
+            return None
+
+        limit_up_periods = self.find_consecutive_limit_up(daily_data, name=name)
+        version = data_version(cov) if cov is not None else ""
+        entry = build_detail(ts_code, name, daily_data, limit_up_periods, fmt, version)
+        if cov is not None:
+            detail_cache.put(key, version, entry)
+        return entry
+
+    @staticmethod
+    def _needs_full_sync(cov: Optional[dict]) -> bool:
+        """没有本地数据，或超过 cache_days 天未全量同步"""
+        return cov is None or (
+            datetime.now() - datetime.strptime(cov['full_sync'], "%Y%m%d")
+        ).days >= settings.cache_days
+
+    @classmethod
+    def _missing_ranges(cls, cov: Optional[dict], start_date: str, end_date: str) -> list[tuple[str, str]]:
+        """本地数据缺失（或已过期需要全量同步）的区间
+
+        缺口中没有交易日（周末、节假日）时不算缺失，不会产生请求。
+        """
+        if cls._needs_full_sync(cov):
+            return [(start_date, end_date)]
+
+        missing = []
+        if start_date < cov['cov_start']:
+            gap = (start_date, shift_date(cov['cov_start'], -1))
+            if trade_calendar.has_session(*gap):
+                missing.append(gap)
+        if end_date > cov['cov_end']:
+            gap = (shift_date(cov['cov_end'], 1), end_date)
+            if trade_calendar.has_session(*gap):
+                missing.append(gap)
+        return missing
+
+    @timed(stage_latency, stage="daily_data")
+    def _load_daily(self, ts_code: str, start_date: str, end_date: str,
+                    control: Optional[TaskControl] = None) -> tuple[pd.DataFrame, Optional[dict]]:
+        """补齐并读取日线（日期已规整），同时返回读取时的覆盖记录"""
+        with bar_store.symbol_lock(ts_code):
+            cov = bar_store.coverage(ts_code)
+            missing = self._missing_ranges(cov, start_date, end_date)
+            full_sync = self._needs_full_sync(cov)
+
+            for i, (fetch_start, fetch_end) in enumerate(missing):
+                df = self._fetch_daily_data(ts_code, fetch_start, fetch_end, control)
+                if df is None:
+                    # 数据源失败时不记录覆盖区间，下次重试
+                    continue
+                bar_store.merge(ts_code, df, fetch_start, fetch_end, full_sync=full_sync and i == 0)
+
+            if missing:
+                cov = bar_store.coverage(ts_code)
+            return bar_store.read(ts_code, start_date, end_date), cov
+
+    def _fetch_daily_data(self, ts_code: str, start_date: str, end_date: str,
+                          control: Optional[TaskControl] = None) -> Optional[pd.DataFrame]:
+        """从数据源获取日线数据，优先使用 AkShare
+
+        Returns:
+            日线数据（区间内无交易时为空表），所有数据源都失败时返回 None
+        """
+        cancel_event = control.cancel_event if control else None
+
+        # 方法1: 使用 AkShare（熔断期间直接使用 Tushare）
+        ak = _akshare()
+        if ak is not None and breakers['akshare'].allow():
             try:
                 # 转换代码格式 (000001.SZ -> 000001)
                 ak_code = ts_code.split('.')[0]
 
-                # 获取历史数据（不复权）
-                df = ak.stock_zh_a_hist(symbol=ak_code, period="daily",
-                                       start_date=start_date.replace('-', ''),
-                                       end_date=end_date.replace('-', ''),
-                                       adjust="")
+                # 获取历史数据（不复权）；等待令牌时任务被取消则不再调用
+                if not rate_limiters['akshare'].acquire(cancel_event):
+                    return None
+                with breakers['akshare'].guard(), source_call('akshare', 'stock_zh_a_hist'):
+                    df = ak.stock_zh_a_hist(symbol=ak_code, period="daily",
+                                            start_date=start_date.replace('-', ''),
+                                            end_date=end_date.replace('-', ''),
+                                            adjust="")
 
                 if df is None or df.empty:
                     return pd.DataFrame()
 
-                # 转换列名 - AkShare 的列名是中文
-                df = df.rename(columns={
-                    '日期': 'trade_date',
-                    '股票代码': 'code',
-                    '开盘': 'open',
-                    '收盘': 'close',
-                    '最高': 'high',
-                    '最低': 'low',
-                    '成交量': 'vol',
-                    '成交额': 'amount',
-                    '涨跌幅': 'pct_chg',
-                    '涨跌额': 'change',
-                    '换手率': 'turnover'
-                })
-
-                # 添加 ts_code 列
-                df['ts_code'] = ts_code
-
-                # 计算前收盘价
-                df = df.sort_values('trade_date').reset_index(drop=True)
-                df['pre_close'] = df['close'].shift(1)
-
-                # 格式化日期为 YYYYMMDD
-                df['trade_date'] = pd.to_datetime(df['trade_date']).dt.strftime('%Y%m%d')
-
-                # 返回需要的列
-                return df[['ts_code', 'trade_date', 'open', 'high', 'low', 'close', 'pre_close', 'pct_chg', 'vol', 'amount']]
+                with stage_latency.time(stage="parse"):
+                    return self._normalize_akshare_daily(df, ts_code)
             except Exception as e:
                 print(f"AkShare 获取 {ts_code} 数据失败: {e}")
 
-        # 方法2: 使用 Tushare
+        # 方法2: 使用 Tushare（熔断期间跳过）
+        if not breakers['tushare'].allow():
+            return None
         try:
             pro = self.connect()
-            df = pro.daily(ts_code=ts_code, start_date=start_date,
-                          end_date=end_date,
-                          fields='ts_code,trade_date,open,high,low,close,pre_close,pct_chg,vol,amount')
+            if not rate_limiters['tushare'].acquire(cancel_event):
+                return None
+            with breakers['tushare'].guard(), source_call('tushare', 'daily'):
+                df = pro.daily(ts_code=ts_code, start_date=start_date,
+                               end_date=end_date,
+                               fields='ts_code,trade_date,open,high,low,close,pre_close,pct_chg,vol,amount')
 
             if df is not None and not df.empty:
                 df = df.sort_values('trade_date').reset_index(drop=True)
                 return df
+            return pd.DataFrame()
         except Exception as e:
             print(f"Tushare 获取 {ts_code} 数据失败: {e}")
 
-        return pd.DataFrame()
+        return None
+
+    @staticmethod
+    def _normalize_akshare_daily(df: pd.DataFrame, ts_code: str) -> pd.DataFrame:
+        """AkShare 日线转换为 Tushare 格式的列"""
+        # 转换列名 - AkShare 的列名是中文
+        df = df.rename(columns={
+            '日期': 'trade_date',
+            '股票代码': 'code',
+            '开盘': 'open',
+            '收盘': 'close',
+            '最高': 'high',
+            '最低': 'low',
+            '成交量': 'vol',
+            '成交额': 'amount',
+            '涨跌幅': 'pct_chg',
+            '涨跌额': 'change',
+            '换手率': 'turnover'
+        })
+
+        # 添加 ts_code 列
+        df['ts_code'] = ts_code
+
+        # 前收盘价：AkShare 取的是不复权数据，除权除息日的前收盘价（交易所
+        # 的除权参考价）低于上一日收盘价，因此优先由涨跌额/涨跌幅反推，
+        # 两列都没有时才用上一行收盘价
+        df = df.sort_values('trade_date').reset_index(drop=True)
+        if 'change' in df.columns:
+            df['pre_close'] = (df['close'] - df['change']).round(2)
+        elif 'pct_chg' in df.columns:
+            df['pre_close'] = (df['close'] / (1 + df['pct_chg'] / 100)).round(2)
+        else:
+            df['pre_close'] = df['close'].shift(1)
+
+        # 格式化日期为 YYYYMMDD
+        df['trade_date'] = pd.to_datetime(df['trade_date']).dt.strftime('%Y%m%d')
+
+        # 返回需要的列
+        return df[['ts_code', 'trade_date', 'open', 'high', 'low', 'close', 'pre_close', 'pct_chg', 'vol', 'amount']]
+
+    def get_trade_dates(self, start_date: str, end_date: str) -> list[str]:
+        """获取区间内的交易日（本地缓存的 SSE 交易日历），日历不可用时退化为工作日"""
+        return trade_calendar.sessions(start_date, end_date)
+
+    def fetch_trade_calendar(self, start_date: str, end_date: str) -> Optional[list[str]]:
+        """从数据源获取区间内的交易日（供 trade_calendar 缓存），优先使用 Tushare
+
+        Returns:
+            交易日列表 (YYYYMMDD)，所有数据源都失败时返回 None
+        """
+        # 方法1: 使用 Tushare（熔断期间跳过）
+        if breakers['tushare'].allow():
+            try:
+                pro = self.connect()
+                rate_limiters['tushare'].acquire()
+                with breakers['tushare'].guard(), source_call('tushare', 'trade_cal'):
+                    cal = pro.trade_cal(exchange='SSE', start_date=start_date, end_date=end_date,
+                                        fields='cal_date,is_open')
+                if cal is not None and not cal.empty:
+                    return sorted(cal[cal['is_open'] == 1]['cal_date'].astype(str).tolist())
+            except Exception as e:
+                print(f"Tushare 获取交易日历失败: {e}")
+
+        # 方法2: 使用 AkShare（新浪历史交易日）
+        ak = _akshare()
+        if ak is not None and breakers['akshare'].allow():
+            try:
+                rate_limiters['akshare'].acquire()
+                with breakers['akshare'].guard(), source_call('akshare', 'tool_trade_date_hist_sina'):
+                    df = ak.tool_trade_date_hist_sina()
+                if df is not None and not df.empty:
+                    days = pd.to_datetime(df['trade_date']).dt.strftime('%Y%m%d')
+                    return sorted(d for d in days if start_date <= d <= end_date)
+            except Exception as e:
+                print(f"AkShare 获取交易日历失败: {e}")
+
+        return None
 
-    def find_consecutive_limit_up(self, df: pd.DataFrame, threshold: float = 9.5) -> list[dict]:
+    def screen_window(self, lookback_days: int, trading_days: bool = False) -> tuple[str, str]:
+        """筛选使用的日线区间 (start_date, end_date)
+
+        结束于最近收盘的交易日；trading_days 为 True 时按交易日回溯
+        lookback_days 个交易日，否则按自然日回溯。
+        """
+        end_date = trade_calendar.last_closed_session()
+        if trading_days:
+            return trade_calendar.lookback_start(lookback_days, end_date), end_date
+        start_date = (datetime.now() - timedelta(days=lookback_days)).strftime("%Y%m%d")
+        return start_date, end_date
+
+    def bulk_load_daily(
+        self,
+        start_date: str,
+        end_date: str,
+        progress_callback: Optional[Callable] = None,
+        control: Optional[TaskControl] = None
+    ) -> int:
+        """按交易日批量获取全市场日线（Tushare daily(trade_date=...)）并写入本地存储
+
+        每个交易日一次调用即可拿到全市场数据，180 个自然日约 120 次调用；
+        已入库的交易日会被跳过。拉取完成后按股票拆分，合并到各自的本地日线中，
+        之后 get_daily_data 可直接命中本地数据。
+
+        Args:
+            start_date: 开始日期 YYYYMMDD
+            end_date: 结束日期 YYYYMMDD（盘中会截止到前一天）
+            progress_callback: 进度回调，参数 (current, total, found, status)
+            control: 所属任务的控制标志，取消后停止拉取
+
+        Returns:
+            本次新获取的交易日数量
         """
-        查找连续涨停
+        end_date = min(end_date, trade_calendar.last_closed_session())
+        if start_date > end_date:
+            return 0
+
+        trade_dates = self.get_trade_dates(start_date, end_date)
+        done = bar_store.ingested_dates(start_date, end_date)
+        pending = [d for d in trade_dates if d not in done]
+        if not pending:
+            return 0
+
+        pro = self.connect()
+        control = control or TaskControl()
+        frames = []
+        fetched = []
+
+        for i, trade_date in enumerate(pending):
+            if control.cancelled:
+                break
+
+            if progress_callback:
+                progress_callback(i, len(pending), 0, f"批量获取 {trade_date} 全市场日线 ({i + 1}/{len(pending)})")
+
+            # Tushare 熔断时停止批量获取，之后逐只获取会改用 AkShare
+            if not breakers['tushare'].allow():
+                break
+
+            # 与其他 Tushare 调用共享频率限制（免费账户每分钟 120 次）
+            if not rate_limiters['tushare'].acquire(control.cancel_event):
+                break
+            try:
+                with breakers['tushare'].guard(), source_call('tushare', 'daily_by_date'):
+                    df = pro.daily(trade_date=trade_date,
+                                   fields='ts_code,trade_date,open,high,low,close,pre_close,pct_chg,vol,amount')
+            except Exception as e:
+                # 中途失败则停止，保证已入库的日期是连续的
+                print(f"Tushare 获取 {trade_date} 全市场日线失败: {e}")
+                break
+
+            # 交易日返回空表通常是数据尚未发布，与失败一样停止，该日不入库也不计入覆盖
+            if df is None or df.empty:
+                print(f"Tushare {trade_date} 全市场日线为空（可能尚未发布），停止批量获取")
+                break
+
+            frames.append(df)
+            fetched.append((trade_date, len(df)))
+
+        if not frames:
+            return 0
+
+        # 按股票拆分后合并到本地存储，覆盖区间只记到第一个未获取的交易日之前
+        if len(fetched) < len(pending):
+            covered_end = shift_date(pending[len(fetched)], -1)
+        else:
+            covered_end = end_date
+
+        market = pd.concat(frames, ignore_index=True)
+        for ts_code, bars in market.groupby('ts_code', sort=False):
+            with bar_store.symbol_lock(ts_code):
+                bar_store.merge(ts_code, bars, start_date, covered_end)
+
+        for trade_date, rows in fetched:
+            bar_store.mark_ingested(trade_date, rows)
+
+        print(f"Tushare 批量获取 {len(fetched)} 个交易日, {market['ts_code'].nunique()} 只股票")
+        return len(fetched)
+
+    @timed(stage_latency, stage="limit_up_detection")
+    def find_consecutive_limit_up(
+        self,
+        df: pd.DataFrame,
+        threshold: Optional[float] = None,
+        name: str = "",
+        min_count: int = 3
+    ) -> list[dict]:
+        """
+        查找连续涨停（按板块涨停价判定，不修改传入的 DataFrame）
+
+        Args:
+            df: 日线数据（按日期升序）
+            threshold: 指定时按统一涨幅阈值（%）判定，否则按板块规则：
+                主板 10%、创业板/科创板 20%、ST 5%、北交所 30%
+            name: 股票名称（用于识别 ST）
+            min_count: 最少连续涨停次数
 
         返回符合条件的涨停区间列表：
         [{
@@ -244,48 +600,34 @@ class DataClient:
         if df.empty:
             return []
 
-        # 标记涨停日（涨幅 >= threshold%）
-        df['is_limit_up'] = df['pct_chg'] >= threshold
-
-        result = []
-        current_streak = []
-
-        for idx, row in df.iterrows():
-            if row['is_limit_up']:
-                current_streak.append({
-                    'date': row['trade_date'],
-                    'close': row['close'],
-                    'pct_chg': row['pct_chg']
-                })
-            else:
-                # 检查连续涨停是否满足条件（3次及以上）
-                if len(current_streak) >= 3:
-                    result.append({
-                        'start_date': current_streak[0]['date'],
-                        'start_price': current_streak[0]['close'],
-                        'count': len(current_streak),
-                        'limit_up_days': [x['date'] for x in current_streak]
-                    })
-                current_streak = []
-
-        # 检查最后一段
-        if len(current_streak) >= 3:
-            result.append({
-                'start_date': current_streak[0]['date'],
-                'start_price': current_streak[0]['close'],
-                'count': len(current_streak),
-                'limit_up_days': [x['date'] for x in current_streak]
-            })
-
-        return result
+        ts_code = str(df['ts_code'].iloc[0]) if 'ts_code' in df.columns else ""
+        return find_limit_up_periods(
+            df['trade_date'].to_numpy(dtype=object),
+            df['close'].to_numpy(dtype=float),
+            df['pre_close'].to_numpy(dtype=float),
+            df['pct_chg'].to_numpy(dtype=float),
+            rate=limit_rate(ts_code, name),
+            min_count=min_count,
+            threshold=threshold,
+            fallback_ratio=settings.limit_up_threshold / MAIN_BOARD_LIMIT
+        )
 
+    @timed(stage_latency, stage="screen_batch")
     def screen_stocks_progressive(
         self,
         lookback_days: int = 180,
         max_stocks: int = 200,
         progress_callback: Optional[Callable] = None,
         start_offset: int = 0,
-        reset_flags: bool = False
+        bulk: bool = False,
+        sector: Union[str, list[str], None] = None,
+        result_callback: Optional[Callable] = None,
+        control: Optional[TaskControl] = None,
+        workers: Optional[int] = None,
+        checkpoint_callback: Optional[Callable] = None,
+        trading_days: bool = False,
+        sector_mode: str = UNION,
+        stock_list: Optional[pd.DataFrame] = None
     ) -> list:
         """
         筛选股票（带进度回调，支持暂停/取消）
@@ -295,23 +637,37 @@ class DataClient:
             max_stocks: 最多处理的股票数量（免费账户建议100-200）
             progress_callback: 进度回调函数，参数 (current, total, found)
             start_offset: 从第几只股票开始（用于分批筛选）
-            reset_flags: 是否重置控制标志（分批筛选时仅第一批重置）
+            bulk: 是否先按交易日批量获取全市场日线（需要 Tushare 权限）
+            sector: 板块名称或名称列表（与分批前获取列表时一致，股票列表来自缓存）
+            result_callback: 每发现一只符合条件的股票时回调，参数为结果字典
+            control: 所属任务的暂停/取消标志（不传时不可暂停/取消）
+            workers: 并发获取线程数（默认 fetch_workers）
+            checkpoint_callback: 断点回调，参数 (offset, 新结果)。offset 之前的股票
+                已全部处理完，新结果为上次断点以来的结果；每 checkpoint_interval
+                只股票回调一次，结束（含取消）时回调剩余结果
+            trading_days: lookback_days 是否按交易日计算
+            sector_mode: 多个板块时取并集 (union) 或交集 (intersection)
+            stock_list: 任务开始时取得的股票列表快照（分批筛选时每批传入同一份，
+                start_offset 为其中的位置）；不传时按 sector 获取
 
         Returns:
             符合条件的股票列表
         """
-        if reset_flags:
-            reset_control_flags()  # 仅在第一批时重置控制标志
-
-        end_date_obj = datetime.now()
-        start_date_obj = end_date_obj - timedelta(days=lookback_days)
-
-        # AkShare 使用日期格式 YYYYMMDD
-        start_date = start_date_obj.strftime("%Y%m%d")
-        end_date = end_date_obj.strftime("%Y%m%d")
+        control = control or TaskControl()
+        start_date, end_date = self.screen_window(lookback_days, trading_days)
+
+        # 批量模式：按交易日一次拉取全市场，后续逐只读取时直接命中本地存储
+        if bulk:
+            self.bulk_load_daily(
+                start_date, end_date,
+                progress_callback=(lambda c, t, f, s: progress_callback(start_offset, start_offset, 0, s))
+                if progress_callback else None,
+                control=control
+            )
 
         # 获取股票列表
-        stock_list = self.get_stock_list()
+        if stock_list is None:
+            stock_list = self.get_stock_list(sector=sector, sector_mode=sector_mode)
         if stock_list.empty:
             if progress_callback:
                 progress_callback(start_offset, start_offset, 0, "未获取到股票列表")
@@ -326,72 +682,316 @@ class DataClient:
             progress_callback(start_offset, end_offset, 0, f"开始筛选 {batch_total} 只股票...")
 
         results = []
-
-        for idx, stock in stock_list.iterrows():
-            # 检查取消标志
-            if _cancel_flag.is_set():
-                if progress_callback:
-                    progress_callback(start_offset + idx, end_offset, len(results), "已取消")
-                break
-
-            # 检查暂停标志
-            while _pause_flag.is_set():
-                if _cancel_flag.is_set():
+        processed = 0
+        workers = max(workers or settings.fetch_workers, 1)
+        stocks = enumerate(stock_list[['ts_code', 'name', 'industry']].itertuples(index=False))
+        exhausted = False
+        pending = {}
+
+        # 断点水位：水位之前的股票都已处理完（线程池完成顺序是乱的）
+        completed = set()
+        watermark = checkpointed = 0
+        unsaved = {}
+
+        # 线程池并发获取，最多保持 2 × workers 个在途任务，完成一个处理一个
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="fetch") as pool:
+            while True:
+                # 暂停时不再提交新任务，已提交的任务在 worker 中等待
+                while not exhausted and len(pending) < workers * 2 \
+                        and not control.paused and not control.cancelled:
+                    position, stock = next(stocks, (None, None))
+                    if stock is None:
+                        exhausted = True
+                        break
+                    industry = stock.industry if isinstance(stock.industry, str) else ''
+                    future = pool.submit(self._screen_one, stock.ts_code, stock.name,
+                                         industry, start_date, end_date, control)
+                    pending[future] = position
+
+                if control.cancelled:
+                    for future in pending:
+                        future.cancel()
+                    if progress_callback:
+                        progress_callback(start_offset + processed, end_offset, len(results), "已取消")
                     break
-                import time
-                time.sleep(0.1)
-
-            if _cancel_flag.is_set():
-                break
 
-            ts_code = stock['ts_code']
-            name = stock['name']
-            industry = stock.get('industry', '')
-
-            # 获取日线数据
-            daily_data = self.get_daily_data(ts_code, start_date, end_date)
-            if daily_data.empty:
-                continue
-
-            # 查找连续涨停
-            limit_up_periods = self.find_consecutive_limit_up(daily_data)
-
-            # 检查是否满足条件
-            current_price = daily_data.iloc[-1]['close']
-
-            for period in limit_up_periods:
-                if current_price < period['start_price']:
-                    drop_ratio = (period['start_price'] - current_price) / period['start_price'] * 100
-                    results.append({
-                        'ts_code': ts_code,
-                        'name': name,
-                        'industry': industry,
-                        'start_date': period['start_date'],
-                        'start_price': float(period['start_price']),
-                        'current_price': float(current_price),
-                        'limit_up_count': period['count'],
-                        'drop_ratio': float(drop_ratio),
-                        'limit_up_days': period['limit_up_days']
-                    })
-                    break  # 只取第一个符合条件的
-
-            # 进度回调 - 使用全局索引
-            global_idx = start_offset + idx
-            if progress_callback and (global_idx + 1) % 10 == 0:
-                status = f"正在处理: {ts_code} {name}"
-                progress_callback(global_idx + 1, end_offset, len(results), status)
+                if not pending:
+                    if exhausted:
+                        break
+                    time.sleep(0.1)  # 暂停中
+                    continue
+
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = pending.pop(future)
+                    processed += 1
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        print(f"筛选股票失败: {e}")
+                        result = None
+                    completed.add(position)
+                    if result:
+                        results.append(result)
+                        unsaved[position] = result
+                        if result_callback:
+                            result_callback(result)
+
+                    # 进度回调 - 使用全局索引
+                    global_idx = start_offset + processed
+                    if progress_callback and global_idx % 10 == 0:
+                        status = f"正在处理: {result['ts_code']} {result['name']}" if result else "正在处理..."
+                        progress_callback(global_idx, end_offset, len(results), status)
+
+                if checkpoint_callback:
+                    while watermark in completed:
+                        completed.discard(watermark)
+                        watermark += 1
+                    if watermark - checkpointed >= settings.checkpoint_interval:
+                        saved = [unsaved.pop(i) for i in sorted(k for k in unsaved if k < watermark)]
+                        checkpoint_callback(start_offset + watermark, saved)
+                        checkpointed = watermark
+
+        if checkpoint_callback:
+            # 取消时水位之后已完成的结果也一并保存，断点仍记在水位处
+            while watermark in completed:
+                watermark += 1
+            checkpoint_callback(start_offset + watermark, [unsaved[i] for i in sorted(unsaved)])
+
+        screen_memo.flush()
 
         # 按回落幅度排序
         results.sort(key=lambda x: x['drop_ratio'], reverse=True)
 
         if progress_callback:
-            if _cancel_flag.is_set():
+            if control.cancelled:
                 progress_callback(end_offset, end_offset, len(results), "已取消")
             else:
                 progress_callback(end_offset, end_offset, len(results), "筛选完成")
 
         return results
 
+    @timed(stage_latency, stage="screen_stock")
+    def _screen_one(self, ts_code: str, name: str, industry: str,
+                    start_date: str, end_date: str,
+                    control: Optional[TaskControl] = None) -> Optional[dict]:
+        """筛选单只股票，返回第一个满足条件的连板区间（在线程池中执行）
+
+        本地日线已覆盖区间时先查筛选备忘，数据和判定规则都没变就直接复用上次的结果。
+        """
+        if control is not None and control.wait_while_paused():
+            return None
+
+        start_date = start_date.replace('-', '')
+        end_date = min(end_date.replace('-', ''), trade_calendar.last_closed_session())
+        if start_date > end_date:
+            return None
+
+        rules = rules_key(limit_rate(ts_code, name), 3, settings.limit_up_threshold / MAIN_BOARD_LIMIT)
+        cov = bar_store.coverage(ts_code)
+        if not self._missing_ranges(cov, start_date, end_date):
+            memo = screen_memo.get(ts_code, start_date, end_date, rules, data_version(cov))
+            if memo is not MISS:
+                stocks_screened.inc(outcome="memo")
+                result = memo[1]
+                return {**result, 'name': name, 'industry': industry} if result else None
+
+        # 获取日线数据
+        daily_data, cov = self._load_daily(ts_code, start_date, end_date, control)
+
+        # 查找连续涨停
+        limit_up_periods = self.find_consecutive_limit_up(daily_data, name=name)
+        result = self._first_qualifying(ts_code, name, industry, daily_data, limit_up_periods)
+        stocks_screened.inc(outcome="computed")
+
+        # 数据源失败导致区间不完整时不记录
+        if not self._missing_ranges(cov, start_date, end_date):
+            screen_memo.put(ts_code, start_date, end_date, rules, data_version(cov),
+                            limit_up_periods, result)
+        return result
+
+    @staticmethod
+    def _first_qualifying(ts_code: str, name: str, industry: str,
+                          daily_data: pd.DataFrame, limit_up_periods: list[dict]) -> Optional[dict]:
+        """第一个当前价已跌破启动价的连板区间"""
+        if daily_data.empty:
+            return None
+
+        # 检查是否满足条件
+        current_price = daily_data['close'].iat[-1]
+
+        for period in limit_up_periods:
+            if current_price < period['start_price']:
+                drop_ratio = (period['start_price'] - current_price) / period['start_price'] * 100
+                return {
+                    'ts_code': ts_code,
+                    'name': name,
+                    'industry': industry,
+                    'start_date': period['start_date'],
+                    'start_price': float(period['start_price']),
+                    'current_price': float(current_price),
+                    'limit_up_count': period['count'],
+                    'drop_ratio': float(drop_ratio),
+                    'limit_up_days': period['limit_up_days']
+                }  # 只取第一个符合条件的
+
+        return None
+
+    def screen_stocks_panel(
+        self,
+        lookback_days: int = 180,
+        max_stocks: Optional[int] = None,
+        sector: Union[str, list[str], None] = None,
+        progress_callback: Optional[Callable] = None,
+        bulk: bool = False,
+        control: Optional[TaskControl] = None,
+        trading_days: bool = False,
+        rules: Optional[list] = None,
+        sector_mode: str = UNION
+    ) -> list:
+        """
+        矩阵引擎筛选：先补齐本地缺失的日线，再把全部股票对齐成
+        (交易日 × 股票) 矩阵一次性计算，本地数据齐全时全市场不到一秒
+
+        Args:
+            lookback_days: 回溯天数
+            max_stocks: 最多处理的股票数量（None 表示全部）
+            sector: 板块名称或名称列表
+            progress_callback: 进度回调函数，参数 (current, total, found, status)
+            bulk: 是否先按交易日批量获取全市场日线
+            control: 所属任务的暂停/取消标志
+            trading_days: lookback_days 是否按交易日计算
+            rules: Rule 列表，在同一个矩阵上一次评估全部规则（默认使用
+                固定规则）；一只股票命中多条规则时每条规则各一行，rule 字段
+                为规则名称
+            sector_mode: 多个板块时取并集 (union) 或交集 (intersection)
+
+        Returns:
+            符合条件的股票列表（按回落幅度降序）
+        """
+        control = control or TaskControl()
+        start_date, end_date = self.screen_window(lookback_days, trading_days)
+
+        if bulk:
+            self.bulk_load_daily(
+                start_date, end_date,
+                progress_callback=(lambda c, t, f, s: progress_callback(0, 0, 0, s))
+                if progress_callback else None,
+                control=control
+            )
+
+        stock_list = self.get_stock_list(sector=sector, sector_mode=sector_mode)
+        if stock_list.empty:
+            if progress_callback:
+                progress_callback(0, 0, 0, "未获取到股票列表")
+            return []
+        if max_stocks:
+            stock_list = stock_list.iloc[:max_stocks]
+        total = len(stock_list)
+
+        if not self._sync_local(stock_list, start_date, end_date, control, progress_callback):
+            return []
+
+        fallback_ratio = settings.limit_up_threshold / MAIN_BOARD_LIMIT
+        if rules:
+            matched = screen_codes_rules(stock_list, start_date, end_date, rules, fallback_ratio)
+            results = sorted((r for hits in matched.values() for r in hits),
+                             key=lambda x: x['drop_ratio'], reverse=True)
+        else:
+            results = screen_codes(stock_list, start_date, end_date, fallback_ratio=fallback_ratio)
+
+        if progress_callback:
+            progress_callback(total, total, len(results), "筛选完成")
+
+        return results
+
+    def _sync_local(
+        self,
+        stock_list: pd.DataFrame,
+        start_date: str,
+        end_date: str,
+        control: TaskControl,
+        progress_callback: Optional[Callable] = None
+    ) -> bool:
+        """补齐本地缺失的日线（已覆盖的股票不会产生请求），返回 False 表示已取消"""
+        total = len(stock_list)
+        for i, ts_code in enumerate(stock_list['ts_code']):
+            if control.wait_while_paused():
+                if progress_callback:
+                    progress_callback(i, total, 0, "已取消")
+                return False
+
+            if self._missing_ranges(bar_store.coverage(ts_code), start_date, end_date):
+                self.get_daily_data(ts_code, start_date, end_date, control)
+
+            if progress_callback and (i + 1) % 10 == 0:
+                progress_callback(i + 1, total, 0, f"正在同步: {ts_code}")
+
+        if progress_callback:
+            progress_callback(total, total, 0, "正在计算...")
+        return True
+
+    def screen_stocks_sweep(
+        self,
+        lookbacks: list[int],
+        thresholds: list[float],
+        min_streaks: list[int],
+        max_stocks: Optional[int] = None,
+        sector: Union[str, list[str], None] = None,
+        progress_callback: Optional[Callable] = None,
+        bulk: bool = False,
+        control: Optional[TaskControl] = None,
+        trading_days: bool = False,
+        sector_mode: str = UNION
+    ) -> Optional[dict]:
+        """
+        参数扫描：按最长的回溯天数补齐一次本地日线并读成矩阵，在同一个矩阵
+        上评估 (回溯天数 × 涨停阈值 × 最少连板数) 的全部组合
+
+        Args:
+            lookbacks: 回溯天数列表
+            thresholds: 涨停阈值列表（主板等价涨幅，0.10 即按涨停价判定）
+            min_streaks: 最少连板数列表
+            其余参数同 screen_stocks_panel
+
+        Returns:
+            sweep_panel 的结果；已取消或未获取到股票列表时返回 None
+        """
+        control = control or TaskControl()
+        windows = {lookback: self.screen_window(lookback, trading_days) for lookback in lookbacks}
+        start_date = min(start for start, _ in windows.values())
+        end_date = max(end for _, end in windows.values())
+
+        if bulk:
+            self.bulk_load_daily(
+                start_date, end_date,
+                progress_callback=(lambda c, t, f, s: progress_callback(0, 0, 0, s))
+                if progress_callback else None,
+                control=control
+            )
+
+        stock_list = self.get_stock_list(sector=sector, sector_mode=sector_mode)
+        if stock_list.empty:
+            if progress_callback:
+                progress_callback(0, 0, 0, "未获取到股票列表")
+            return None
+        if max_stocks:
+            stock_list = stock_list.iloc[:max_stocks]
+        total = len(stock_list)
+
+        if not self._sync_local(stock_list, start_date, end_date, control, progress_callback):
+            return None
+
+        panel = load_panel(stock_list['ts_code'].tolist(), start_date, end_date)
+        sweep = sweep_panel(panel, stock_list, {lb: start for lb, (start, _) in windows.items()},
+                            thresholds, min_streaks)
+
+        if progress_callback:
+            found = sum(len(results) for results in sweep["results"].values())
+            progress_callback(total, total, found, "扫描完成")
+
+        return sweep
+
     def screen_stocks(self, lookback_days: int = 180, max_stocks: int = 200) -> list:
         """
         筛选股票（简化版，不带进度回调）
@@ -408,97 +1008,105 @@ class DataClient:
         )
 
     def get_sector_list(self) -> list:
-        """获取板块列表（使用 AkShare）
+        """获取板块列表（本地板块目录，过期时后台刷新）
 
         Returns:
-            板块列表，每个元素包含板块名称和代码
+            板块列表，每个元素包含板块名称、代码、类型和已知的成分股数
         """
-        if not AKSHARE_AVAILABLE:
-            return []
+        return sector_index.catalog()
 
-        try:
-            sectors = []
+    def fetch_sector_catalog(self) -> Optional[list[dict]]:
+        """从数据源获取板块目录（申万行业 + 概念板块，供 sector_index 缓存）
 
-            # 获取申万行业分类
-            try:
+        Returns:
+            板块列表 [{name, code, type}]，全部失败时返回 None
+        """
+        ak = _akshare()
+        if ak is None or not breakers['akshare'].allow():
+            return None
+
+        sectors = []
+
+        # 获取申万行业分类
+        try:
+            rate_limiters['akshare'].acquire()
+            with breakers['akshare'].guard(), source_call('akshare', 'sw_index_cons'):
                 df = ak.sw_index_cons(symbol="sw")
-                if df is not None and not df.empty:
-                    for idx, row in df.iterrows():
-                        sector_name = row.get('指数名称', row.get('name', ''))
-                        sector_code = row.get('指数代码', row.get('code', ''))
-                        if sector_name and '行业' in sector_name:
-                            # 简化名称
-                            name = sector_name.replace('申万-', '').replace('行业指数', '')
-                            sectors.append({
-                                'name': name,
-                                'code': sector_code,
-                                'type': 'sw'
-                            })
-            except Exception as e:
-                print(f"获取申万行业失败: {e}")
+            if df is not None and not df.empty:
+                name_col = '指数名称' if '指数名称' in df.columns else 'name'
+                code_col = '指数代码' if '指数代码' in df.columns else 'code'
+                names = df[name_col].fillna('').astype(str)
+                codes = df[code_col].fillna('') if code_col in df.columns else pd.Series('', index=df.index)
+                industry = names.str.contains('行业')
+                for name, code in zip(names[industry], codes[industry]):
+                    # 简化名称
+                    name = name.replace('申万-', '').replace('行业指数', '')
+                    sectors.append({'name': name, 'code': str(code), 'type': 'sw'})
+        except Exception as e:
+            print(f"获取申万行业失败: {e}")
 
-            # 获取概念板块
-            try:
+        # 获取概念板块
+        try:
+            rate_limiters['akshare'].acquire()
+            with breakers['akshare'].guard(), source_call('akshare', 'stock_board_concept_name_em'):
                 df = ak.stock_board_concept_name_em()
-                if df is not None and not df.empty:
-                    for idx, row in df.head(100).iterrows():
-                        sector_name = row.get('板块名称', '')
-                        if sector_name and len(sector_name) < 8:  # 过滤掉过长的名称
-                            sectors.append({
-                                'name': sector_name,
-                                'code': '',
-                                'type': 'concept'
-                            })
-            except Exception as e:
-                print(f"获取概念板块失败: {e}")
-
-            # 去重并排序
-            seen = set()
-            unique_sectors = []
-            for s in sectors:
-                key = s['name']
-                if key not in seen:
-                    seen.add(key)
-                    unique_sectors.append(s)
-
-            return sorted(unique_sectors, key=lambda x: x['name'])
+            if df is not None and not df.empty:
+                names = df['板块名称'].head(100).dropna()
+                for name in names[names.str.len() < 8]:  # 过滤掉过长的名称
+                    sectors.append({'name': name, 'code': '', 'type': 'concept'})
         except Exception as e:
-            print(f"获取板块列表失败: {e}")
-            return []
+            print(f"获取概念板块失败: {e}")
 
-    def _get_stocks_by_sector(self, sector_name: str) -> pd.DataFrame:
-        """根据板块名称获取股票列表
+        if not sectors:
+            return None
 
-        Args:
-            sector_name: 板块名称
+        # 去重（申万行业优先）
+        return list({s['name']: s for s in reversed(sectors)}.values())
+
+    def fetch_sector_members(self, name: str, kind: str = '') -> Optional[list[str]]:
+        """从数据源获取板块成分股（供 sector_index 缓存）
+
+        概念板块先查概念接口，其余先查行业接口，查不到时再试另一个。
 
         Returns:
-            股票数据框
+            成分股代码列表 (000001.SZ 格式)，全部失败时返回 None
         """
-        if not AKSHARE_AVAILABLE:
-            return pd.DataFrame()
+        ak = _akshare()
+        if ak is None:
+            return None
+
+        endpoints = ['stock_board_concept_cons_em', 'stock_board_industry_cons_em']
+        if kind != 'concept':
+            endpoints.reverse()
+
+        failed = False
+        for endpoint in endpoints:
+            if not breakers['akshare'].allow():
+                return None
+            try:
+                rate_limiters['akshare'].acquire()
+                with breakers['akshare'].guard(), source_call('akshare', endpoint):
+                    df = getattr(ak, endpoint)(symbol=name)
+                if df is not None and not df.empty:
+                    return [_ts_code(str(code)) for code in df['代码']]
+            except Exception as e:
+                failed = True
+                print(f"获取板块 {name} 成分股失败 ({endpoint}): {e}")
 
-        try:
-            # 尝试从概念板块获取
-            df = ak.stock_board_concept_cons_em(symbol=sector_name)
-            if df is not None and not df.empty:
-                return df
-        except Exception as e:
-            print(f"从概念板块获取失败: {e}")
+        # 两个接口都返回空表时记为空板块，出错时下次重试
+        return None if failed else []
 
-        try:
-            # 尝试从行业板块获取
-            df = ak.stock_board_industry_cons_em(symbol=sector_name)
-            if df is not None and not df.empty:
-                return df
-        except Exception as e:
-            print(f"从行业板块获取失败: {e}")
 
-        return pd.DataFrame()
+def _create_client() -> DataClient:
+    """按 data_source 配置创建数据客户端"""
+    if settings.data_source == "fake":
+        from .fake_client import FakeDataClient
+        return FakeDataClient()
+    return DataClient()
 
 
 # 全局实例
-data_client = DataClient()
+data_client = _create_client()
 
 # 兼容旧代码
 tushare_client = data_client
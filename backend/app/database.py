@@ -1,86 +1,166 @@
 """SQLite database for task history storage."""
 import sqlite3
 import json
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 import threading
 
-DB_PATH = Path(__file__).parent.parent / "data" / "tasks.db"
+from .core.metrics import db_write_latency, timed
+from .core.tasks import ACTIVE_STATUSES, INTERRUPTED, RUNNING
+
+# SCREENER_DATA_DIR overrides the data directory (e.g. a scratch dir for benchmarks)
+DB_PATH = Path(os.environ.get("SCREENER_DATA_DIR") or Path(__file__).parent.parent / "data") / "tasks.db"
+
+# Writes are serialized (SQLite allows one writer); reads need no lock in WAL mode
 _db_lock = threading.Lock()
+_init_lock = threading.Lock()
+_initialized = False
+_local = threading.local()
+
+def _get_conn() -> sqlite3.Connection:
+    """Get the long-lived connection for the current thread."""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        _init_db()
+        conn = sqlite3.connect(DB_PATH, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -16000")
+        _local.conn = conn
+    return conn
 
 
 def _init_db():
-    """Initialize database and create tables if not exist."""
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    # Tasks table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_id TEXT UNIQUE NOT NULL,
-            status TEXT NOT NULL,
-            lookback_days INTEGER,
-            max_stocks INTEGER,
-            total_stocks INTEGER DEFAULT 0,
-            processed_stocks INTEGER DEFAULT 0,
-            found_count INTEGER DEFAULT 0,
-            start_time TEXT,
-            end_time TEXT,
-            error_message TEXT,
-            created_at TEXT NOT NULL
-        )
-    """)
-
-    # Task results table (stores stock results separately for efficiency)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS task_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_id TEXT NOT NULL,
-            ts_code TEXT NOT NULL,
-            name TEXT,
-            start_date TEXT,
-            start_price REAL,
-            current_price REAL,
-            limit_up_count INTEGER,
-            drop_ratio REAL,
-            industry TEXT,
-            FOREIGN KEY (task_id) REFERENCES tasks (task_id)
-        )
-    """)
+    """Initialize database and create tables if not exist (once per process)."""
+    global _initialized
+    if _initialized:
+        return
 
-    conn.commit()
-    conn.close()
+    with _init_lock:
+        if _initialized:
+            return
 
+        DB_PATH.parent.mkdir(parents=True, exist_ok=True)
 
-def create_task(
-    task_id: str,
-    lookback_days: int,
-    max_stocks: int,
-    total_stocks: int = 0
-) -> int:
-    """Create a new task record."""
-    with _db_lock:
-        _init_db()
         conn = sqlite3.connect(DB_PATH)
         cursor = conn.cursor()
 
-        now = datetime.now().isoformat()
+        # WAL lets readers run alongside the writer; the mode persists in the file
+        cursor.execute("PRAGMA journal_mode = WAL")
+
+        # Tasks table
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT UNIQUE NOT NULL,
+                status TEXT NOT NULL,
+                lookback_days INTEGER,
+                max_stocks INTEGER,
+                total_stocks INTEGER DEFAULT 0,
+                processed_stocks INTEGER DEFAULT 0,
+                found_count INTEGER DEFAULT 0,
+                start_time TEXT,
+                end_time TEXT,
+                error_message TEXT,
+                created_at TEXT NOT NULL
+            )
+        """)
+
+        # Task results table (stores stock results separately for efficiency)
         cursor.execute("""
-            INSERT INTO tasks
-            (task_id, status, lookback_days, max_stocks, total_stocks, start_time, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (task_id, "running", lookback_days, max_stocks, total_stocks, now, now))
+            CREATE TABLE IF NOT EXISTS task_results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task_id TEXT NOT NULL,
+                ts_code TEXT NOT NULL,
+                name TEXT,
+                start_date TEXT,
+                start_price REAL,
+                current_price REAL,
+                limit_up_count INTEGER,
+                drop_ratio REAL,
+                industry TEXT,
+                FOREIGN KEY (task_id) REFERENCES tasks (task_id)
+            )
+        """)
+
+        # Migration: limit_up_days was added after the first release
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(task_results)")}
+        if "limit_up_days" not in columns:
+            cursor.execute("ALTER TABLE task_results ADD COLUMN limit_up_days TEXT")
+        # Migration: name of the matching rule for multi-rule screens
+        if "rule" not in columns:
+            cursor.execute("ALTER TABLE task_results ADD COLUMN rule TEXT DEFAULT ''")
+
+        # Migration: checkpoint columns so interrupted tasks can be resumed
+        columns = {row[1] for row in cursor.execute("PRAGMA table_info(tasks)")}
+        if "params" not in columns:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN params TEXT")
+        if "checkpoint_offset" not in columns:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN checkpoint_offset INTEGER DEFAULT 0")
+        # Migration: last screened ts_code, so resume does not depend on list positions
+        if "checkpoint_code" not in columns:
+            cursor.execute("ALTER TABLE tasks ADD COLUMN checkpoint_code TEXT DEFAULT ''")
+
+        # Indexes for history queries
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_task_results_task
+            ON task_results (task_id, drop_ratio DESC)
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_created ON tasks (created_at)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks (status)")
+
+        # After-close prefetch runs (one row per run)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS prefetch_runs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total_symbols INTEGER DEFAULT 0,
+                processed INTEGER DEFAULT 0,
+                fetched INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                covered INTEGER DEFAULT 0,
+                start_time TEXT NOT NULL,
+                end_time TEXT
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_prefetch_session ON prefetch_runs (session)")
 
-        task_db_id = cursor.lastrowid
         conn.commit()
         conn.close()
-        return task_db_id
+        _initialized = True
+
+
+@timed(db_write_latency, op="create_task")
+def create_task(
+    task_id: str,
+    lookback_days: int,
+    max_stocks: int,
+    total_stocks: int = 0,
+    status: str = RUNNING,
+    params: Optional[Dict[str, Any]] = None
+) -> int:
+    """Create a new task record.
+
+    `params` holds the screening parameters needed to resume the task.
+    """
+    with _db_lock:
+        conn = _get_conn()
+        now = datetime.now().isoformat()
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO tasks
+                (task_id, status, lookback_days, max_stocks, total_stocks, start_time, created_at, params)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (task_id, status, lookback_days, max_stocks, total_stocks, now, now,
+                  json.dumps(params) if params is not None else None))
+        return cursor.lastrowid
 
 
+@timed(db_write_latency, op="update_task_progress")
 def update_task_progress(
     task_id: str,
     processed_stocks: int,
@@ -89,26 +169,103 @@ def update_task_progress(
 ):
     """Update task progress."""
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        if status:
-            cursor.execute("""
-                UPDATE tasks
-                SET processed_stocks = ?, found_count = ?, status = ?
-                WHERE task_id = ?
-            """, (processed_stocks, found_count, status, task_id))
-        else:
-            cursor.execute("""
-                UPDATE tasks
-                SET processed_stocks = ?, found_count = ?
-                WHERE task_id = ?
-            """, (processed_stocks, found_count, task_id))
-
-        conn.commit()
-        conn.close()
-
-
+        conn = _get_conn()
+        with conn:
+            if status:
+                conn.execute("""
+                    UPDATE tasks
+                    SET processed_stocks = ?, found_count = ?, status = ?
+                    WHERE task_id = ?
+                """, (processed_stocks, found_count, status, task_id))
+            else:
+                conn.execute("""
+                    UPDATE tasks
+                    SET processed_stocks = ?, found_count = ?
+                    WHERE task_id = ?
+                """, (processed_stocks, found_count, task_id))
+
+
+class ProgressWriter:
+    """Coalesces task progress updates and writes them from a background thread.
+
+    submit() only touches memory, so the screening loop and the progress
+    endpoint never wait on SQLite. Pending updates are flushed every
+    `interval` seconds, or right away when a task's status changes.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self._pending: Dict[str, tuple] = {}
+        self._written_status: Dict[str, Optional[str]] = {}
+        self._cond = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._urgent = False
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        task_id: str,
+        processed_stocks: int,
+        found_count: int,
+        status: Optional[str] = None
+    ):
+        """Queue the latest progress for a task (non-blocking)."""
+        with self._cond:
+            was_idle = not self._pending
+            previous = self._pending.get(task_id)
+            if status is None and previous is not None:
+                status = previous[2]
+            self._pending[task_id] = (processed_stocks, found_count, status)
+
+            if status is not None and status != self._written_status.get(task_id):
+                self._urgent = True
+                self._cond.notify()
+            elif was_idle:
+                self._cond.notify()
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write all pending updates now."""
+        with self._flush_lock:
+            with self._cond:
+                pending, self._pending = self._pending, {}
+                self._urgent = False
+            for task_id, (processed, found, status) in pending.items():
+                try:
+                    update_task_progress(task_id, processed, found, status)
+                except sqlite3.Error as e:
+                    print(f"Failed to write progress for {task_id}: {e}")
+                if status is not None:
+                    self._written_status[task_id] = status
+
+    def discard(self, task_id: str):
+        """Drop pending updates for a task that is being finalized.
+
+        Waits for an in-flight flush so a stale 'running' status can
+        never land after the final status.
+        """
+        with self._flush_lock:
+            with self._cond:
+                self._pending.pop(task_id, None)
+            self._written_status.pop(task_id, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                if not self._urgent:
+                    self._cond.wait(timeout=self.interval)
+            self.flush()
+
+
+progress_writer = ProgressWriter()
+
+
+@timed(db_write_latency, op="complete_task")
 def complete_task(
     task_id: str,
     status: str,
@@ -116,164 +273,311 @@ def complete_task(
     error_message: str = None
 ):
     """Mark task as completed."""
+    progress_writer.discard(task_id)
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
+        conn = _get_conn()
         end_time = datetime.now().isoformat()
 
-        if found_count is not None:
-            cursor.execute("""
-                UPDATE tasks
-                SET status = ?, end_time = ?, found_count = ?, error_message = ?
-                WHERE task_id = ?
-            """, (status, end_time, found_count, error_message, task_id))
-        else:
-            cursor.execute("""
-                UPDATE tasks
-                SET status = ?, end_time = ?, error_message = ?
-                WHERE task_id = ?
-            """, (status, end_time, error_message, task_id))
+        with conn:
+            if found_count is not None:
+                conn.execute("""
+                    UPDATE tasks
+                    SET status = ?, end_time = ?, found_count = ?, error_message = ?
+                    WHERE task_id = ?
+                """, (status, end_time, found_count, error_message, task_id))
+            else:
+                conn.execute("""
+                    UPDATE tasks
+                    SET status = ?, end_time = ?, error_message = ?
+                    WHERE task_id = ?
+                """, (status, end_time, error_message, task_id))
+
+
+def _result_rows(task_id: str, results: List[Dict[str, Any]]) -> List[tuple]:
+    """Convert result dicts to task_results rows."""
+    return [
+        (
+            task_id,
+            r.get("ts_code"),
+            r.get("name"),
+            r.get("start_date"),
+            r.get("start_price"),
+            r.get("current_price"),
+            r.get("limit_up_count"),
+            r.get("drop_ratio"),
+            r.get("industry", ""),
+            json.dumps(list(r.get("limit_up_days") or [])),
+            r.get("rule", "")
+        )
+        for r in results
+    ]
 
-        conn.commit()
-        conn.close()
 
+_INSERT_RESULT_SQL = """
+    INSERT INTO task_results
+    (task_id, ts_code, name, start_date, start_price, current_price,
+     limit_up_count, drop_ratio, industry, limit_up_days, rule)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
-def save_task_results(task_id: str, results: List[Dict[str, Any]]):
-    """Save screening results for a task."""
-    with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
 
-        # Clear existing results for this task
-        cursor.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
-
-        # Insert new results
-        for r in results:
-            cursor.execute("""
-                INSERT INTO task_results
-                (task_id, ts_code, name, start_date, start_price, current_price,
-                 limit_up_count, drop_ratio, industry)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                task_id,
-                r.get("ts_code"),
-                r.get("name"),
-                r.get("start_date"),
-                r.get("start_price"),
-                r.get("current_price"),
-                r.get("limit_up_count"),
-                r.get("drop_ratio"),
-                r.get("industry", "")
-            ))
+@timed(db_write_latency, op="append_task_results")
+def append_task_results(task_id: str, results: List[Dict[str, Any]]):
+    """Append a batch of new results for a task in one transaction.
 
-        conn.commit()
-        conn.close()
+    Existing rows are kept, so each result is written exactly once over
+    the lifetime of a task.
+    """
+    if not results:
+        return
 
+    rows = _result_rows(task_id, results)
 
-def get_tasks(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
-    """Get list of tasks."""
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        conn = _get_conn()
+        with conn:
+            conn.executemany(_INSERT_RESULT_SQL, rows)
 
-        cursor.execute("""
-            SELECT * FROM tasks
-            ORDER BY created_at DESC
-            LIMIT ? OFFSET ?
-        """, (limit, offset))
 
-        rows = cursor.fetchall()
-        conn.close()
+@timed(db_write_latency, op="checkpoint_task")
+def checkpoint_task(task_id: str, offset: int, results: List[Dict[str, Any]], last_code: str = "") -> int:
+    """Append new results and record the resume point in one transaction.
 
-        return [dict(row) for row in rows]
+    Every stock before `offset` has been screened and its result (if any)
+    is stored. The stock list is ordered by ts_code, so `last_code` (the
+    code at `offset - 1`) lets a resumed task continue after it even if the
+    list has changed since.
 
+    Returns:
+        Number of stored results for the task.
+    """
+    rows = _result_rows(task_id, results)
 
-def get_task(task_id: str) -> Optional[Dict[str, Any]]:
-    """Get a single task by task_id."""
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        conn = _get_conn()
+        with conn:
+            if rows:
+                conn.executemany(_INSERT_RESULT_SQL, rows)
+            found_count = conn.execute(
+                "SELECT COUNT(*) FROM task_results WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+            conn.execute("""
+                UPDATE tasks
+                SET checkpoint_offset = ?, checkpoint_code = ?, processed_stocks = ?, found_count = ?
+                WHERE task_id = ?
+            """, (offset, last_code, offset, found_count, task_id))
+        return found_count
 
-        cursor.execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,))
-        row = cursor.fetchone()
-        conn.close()
 
-        return dict(row) if row else None
+@timed(db_write_latency, op="mark_interrupted_tasks")
+def mark_interrupted_tasks(status: str = INTERRUPTED) -> List[Dict[str, Any]]:
+    """Flag tasks left queued or running by a previous process.
 
+    Call once at startup, before any task is scheduled.
 
-def get_task_results(task_id: str) -> List[Dict[str, Any]]:
-    """Get results for a specific task."""
+    Returns:
+        The interrupted tasks (with their previous status).
+    """
+    placeholders = ", ".join("?" * len(ACTIVE_STATUSES))
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT ts_code, name, start_date, start_price, current_price,
-                   limit_up_count, drop_ratio, industry
-            FROM task_results
-            WHERE task_id = ?
-            ORDER BY drop_ratio DESC
-        """, (task_id,))
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        return [dict(row) for row in rows]
-
+        conn = _get_conn()
+        with conn:
+            rows = conn.execute(
+                f"SELECT * FROM tasks WHERE status IN ({placeholders})", ACTIVE_STATUSES
+            ).fetchall()
+            conn.execute(
+                f"UPDATE tasks SET status = ? WHERE status IN ({placeholders})",
+                (status, *ACTIVE_STATUSES)
+            )
+    return [dict(row) for row in rows]
+
+
+def get_interrupted_tasks(status: str = INTERRUPTED) -> List[Dict[str, Any]]:
+    """Get tasks that were interrupted and not resumed yet."""
+    rows = _get_conn().execute(
+        "SELECT * FROM tasks WHERE status = ? ORDER BY created_at DESC", (status,)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+@timed(db_write_latency, op="reopen_task")
+def reopen_task(task_id: str, status: str, clear_results: bool = False):
+    """Put an interrupted task back into an active status before resuming it.
+
+    With clear_results the partial results and checkpoint are dropped and
+    the task starts over.
+    """
+    progress_writer.discard(task_id)
+    with _db_lock:
+        conn = _get_conn()
+        with conn:
+            if clear_results:
+                conn.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+                conn.execute("""
+                    UPDATE tasks
+                    SET checkpoint_offset = 0, checkpoint_code = '', processed_stocks = 0, found_count = 0
+                    WHERE task_id = ?
+                """, (task_id,))
+            conn.execute(
+                "UPDATE tasks SET status = ?, end_time = NULL, error_message = NULL WHERE task_id = ?",
+                (status, task_id)
+            )
+
+
+@timed(db_write_latency, op="finalize_task_results")
+def finalize_task_results(
+    task_id: str,
+    status: str,
+    error_message: str = None
+) -> int:
+    """Mark a task as finished, taking found_count from its stored results.
 
-def delete_task(task_id: str) -> bool:
-    """Delete a task and its results."""
+    Returns:
+        Number of stored results for the task.
+    """
+    progress_writer.discard(task_id)
     with _db_lock:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+        conn = _get_conn()
+        with conn:
+            found_count = conn.execute(
+                "SELECT COUNT(*) FROM task_results WHERE task_id = ?", (task_id,)
+            ).fetchone()[0]
+            conn.execute("""
+                UPDATE tasks
+                SET status = ?, end_time = ?, found_count = ?, error_message = ?
+                WHERE task_id = ?
+            """, (status, datetime.now().isoformat(), found_count, error_message, task_id))
+        return found_count
 
-        cursor.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
-        cursor.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
 
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+def get_tasks(limit: int = 50, offset: int = 0) -> List[Dict[str, Any]]:
+    """Get list of tasks."""
+    rows = _get_conn().execute("""
+        SELECT * FROM tasks
+        ORDER BY created_at DESC
+        LIMIT ? OFFSET ?
+    """, (limit, offset)).fetchall()
 
-        return deleted
+    return [dict(row) for row in rows]
 
 
-def get_task_stats() -> Dict[str, Any]:
-    """Get overall statistics."""
+def get_task(task_id: str) -> Optional[Dict[str, Any]]:
+    """Get a single task by task_id."""
+    row = _get_conn().execute("SELECT * FROM tasks WHERE task_id = ?", (task_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def get_task_results(task_id: str, rule: str = None) -> List[Dict[str, Any]]:
+    """Get results for a specific task, optionally only those of one rule."""
+    rows = _get_conn().execute("""
+        SELECT ts_code, name, start_date, start_price, current_price,
+               limit_up_count, drop_ratio, industry, limit_up_days, rule
+        FROM task_results
+        WHERE task_id = ? AND (? IS NULL OR rule = ?)
+        ORDER BY drop_ratio DESC
+    """, (task_id, rule, rule)).fetchall()
+
+    results = []
+    for row in rows:
+        result = dict(row)
+        result["limit_up_days"] = json.loads(result["limit_up_days"]) if result["limit_up_days"] else []
+        result["rule"] = result["rule"] or ""
+        results.append(result)
+    return results
+
+
+def count_task_results_by_rule(task_id: str) -> Dict[str, int]:
+    """Count the results of a task per rule name."""
+    rows = _get_conn().execute("""
+        SELECT rule, COUNT(*) FROM task_results
+        WHERE task_id = ?
+        GROUP BY rule
+    """, (task_id,)).fetchall()
+    return {row[0] or "": row[1] for row in rows}
+
+
+@timed(db_write_latency, op="delete_task")
+def delete_task(task_id: str) -> bool:
+    """Delete a task and its results."""
+    progress_writer.discard(task_id)
     with _db_lock:
-        _init_db()  # Ensure tables exist
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        # Total tasks
-        cursor.execute("SELECT COUNT(*) FROM tasks")
-        total = cursor.fetchone()[0]
-
-        # Completed tasks
-        cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = '完成'")
-        completed = cursor.fetchone()[0]
+        conn = _get_conn()
+        with conn:
+            conn.execute("DELETE FROM task_results WHERE task_id = ?", (task_id,))
+            cursor = conn.execute("DELETE FROM tasks WHERE task_id = ?", (task_id,))
+        return cursor.rowcount > 0
 
-        # Running tasks
-        cursor.execute("SELECT COUNT(*) FROM tasks WHERE status = 'running'")
-        running = cursor.fetchone()[0]
 
-        # Failed tasks
-        cursor.execute("SELECT COUNT(*) FROM tasks WHERE status LIKE '错误%'")
-        failed = cursor.fetchone()[0]
-
-        # Total stocks found across all tasks
-        cursor.execute("SELECT SUM(found_count) FROM tasks WHERE found_count IS NOT NULL")
-        total_found = cursor.fetchone()[0] or 0
+@timed(db_write_latency, op="start_prefetch_run")
+def start_prefetch_run(session: str, total_symbols: int) -> int:
+    """Record the start of a prefetch run for a trading session."""
+    with _db_lock:
+        conn = _get_conn()
+        with conn:
+            cursor = conn.execute("""
+                INSERT INTO prefetch_runs (session, status, total_symbols, start_time)
+                VALUES (?, ?, ?, ?)
+            """, (session, "running", total_symbols, datetime.now().isoformat()))
+        return cursor.lastrowid
+
+
+@timed(db_write_latency, op="update_prefetch_run")
+def update_prefetch_run(
+    run_id: int,
+    processed: int,
+    fetched: int,
+    failed: int,
+    covered: int = None,
+    status: str = None
+):
+    """Update counters of a prefetch run; a status other than running closes it."""
+    with _db_lock:
+        conn = _get_conn()
+        with conn:
+            conn.execute("""
+                UPDATE prefetch_runs
+                SET processed = ?, fetched = ?, failed = ?,
+                    covered = COALESCE(?, covered),
+                    status = COALESCE(?, status),
+                    end_time = CASE WHEN ? IS NOT NULL AND ? != 'running' THEN ? ELSE end_time END
+                WHERE id = ?
+            """, (processed, fetched, failed, covered, status, status, status,
+                  datetime.now().isoformat(), run_id))
+
+
+def get_prefetch_runs(limit: int = 10) -> List[Dict[str, Any]]:
+    """Get the most recent prefetch runs."""
+    rows = _get_conn().execute(
+        "SELECT * FROM prefetch_runs ORDER BY id DESC LIMIT ?", (limit,)
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+def get_last_completed_prefetch() -> Optional[Dict[str, Any]]:
+    """Get the latest prefetch run that finished without interruption."""
+    row = _get_conn().execute("""
+        SELECT * FROM prefetch_runs WHERE status = 'completed'
+        ORDER BY session DESC, id DESC LIMIT 1
+    """).fetchone()
+    return dict(row) if row else None
 
-        conn.close()
 
-        return {
-            "total_tasks": total,
-            "completed_tasks": completed,
-            "running_tasks": running,
-            "failed_tasks": failed,
-            "total_stocks_found": total_found
-        }
+def get_task_stats() -> Dict[str, Any]:
+    """Get overall statistics (single aggregate scan)."""
+    row = _get_conn().execute("""
+        SELECT
+            COUNT(*) AS total,
+            SUM(status = '完成') AS completed,
+            SUM(status = 'running') AS running,
+            SUM(status LIKE '错误%') AS failed,
+            SUM(found_count) AS total_found
+        FROM tasks
+    """).fetchone()
+
+    return {
+        "total_tasks": row["total"] or 0,
+        "completed_tasks": row["completed"] or 0,
+        "running_tasks": row["running"] or 0,
+        "failed_tasks": row["failed"] or 0,
+        "total_stocks_found": row["total_found"] or 0
+    }
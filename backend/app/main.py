@@ -1,16 +1,43 @@
+import threading
+from contextlib import asynccontextmanager
+from datetime import datetime
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 from pathlib import Path
 
-from app.api.screen import router as screen_router
+from app.api.screen import router as screen_router, recover_interrupted_tasks
+from app.api.prefetch import router as prefetch_router
+from app.api.metrics import router as metrics_router
+from app.api.sources import router as sources_router
+from app.core.config import settings
+from app.core.prefetch import prefetcher
+from app.core.screen_memo import screen_memo
+from app.core.tushare_client import data_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """启动时处理上次进程中断的筛选任务、清理过期的筛选备忘、启动收盘后预取，后台预先导入数据源库"""
+    if settings.warm_up_data_sources:
+        threading.Thread(target=data_client.warm_up, name="warm-up", daemon=True).start()
+    recover_interrupted_tasks()
+    screen_memo.prune(datetime.now().strftime("%Y%m%d"))
+    if settings.prefetch_enabled:
+        prefetcher.start()
+    yield
+    prefetcher.stop()
+    screen_memo.flush()
+
 
 # 创建 FastAPI 应用
 app = FastAPI(
     title="A股股票筛选器",
     description="筛选半年内有过连续涨停且回落至启动价下方的股票",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 配置 CORS
@@ -24,6 +51,9 @@ app.add_middleware(
 
 # 注册路由
 app.include_router(screen_router)
+app.include_router(prefetch_router)
+app.include_router(metrics_router)
+app.include_router(sources_router)
 
 # 前端静态文件服务
 frontend_path = Path(__file__).parent.parent / "frontend" / "out"
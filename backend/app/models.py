@@ -1,5 +1,6 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import date
+from typing import Optional
 
 
 class StockInfo(BaseModel):
@@ -11,6 +12,25 @@ class StockInfo(BaseModel):
     limit_up_count: int  # 连续涨停次数
     drop_ratio: float  # 回落幅度
     industry: str  # 所属行业
+    limit_up_days: list[str] = []  # 涨停日期列表
+    rule: str = ""  # 命中的规则名称（多规则筛选时）
+
+
+class ScreenRule(BaseModel):
+    """声明式筛选规则，所有设置了的条件同时满足才算命中
+
+    默认值即原来的固定筛选：至少 3 连板，当前价低于启动价。
+    """
+    name: str = Field("default", min_length=1, max_length=32)  # 规则名称（结果中标注）
+    min_streak: int = Field(3, ge=1)  # 最少连续涨停次数
+    max_streak: Optional[int] = Field(None, ge=1)  # 最多连续涨停次数
+    min_drop: float = 0.0  # 回落幅度下限（%，不含）
+    max_drop: Optional[float] = None  # 回落幅度上限（%）
+    min_days_since: Optional[int] = Field(None, ge=0)  # 连板结束后至少经过的交易日数
+    max_days_since: Optional[int] = Field(None, ge=0)  # 连板结束后至多经过的交易日数
+    volume_days: int = Field(20, ge=1, le=250)  # 量能均值统计的交易日数
+    min_avg_vol: Optional[float] = None  # 近 volume_days 日平均成交量下限（手）
+    min_avg_amount: Optional[float] = None  # 近 volume_days 日平均成交额下限（千元）
 
 
 class StockDetail(BaseModel):
@@ -0,0 +1,122 @@
+"""连板识别微基准：原 iterrows 循环 vs NumPy 向量化实现
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_limit_up [--years 8] [--series 200]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.limit_up import find_limit_up_periods, MAIN_BOARD_LIMIT
+
+
+def make_series(n_bars: int, seed: int, drift: float = 0.0) -> pd.DataFrame:
+    """生成带随机连板的日线序列（drift 为平日涨跌幅均值，%）"""
+    rng = np.random.default_rng(seed)
+    pct = rng.normal(drift, 2, n_bars).clip(-9.4, 9.4)
+    # 注入若干段 2-6 连板
+    for start in rng.choice(n_bars - 10, size=max(n_bars // 60, 1), replace=False):
+        pct[start:start + rng.integers(2, 7)] = 10.0
+
+    close = np.empty(n_bars)
+    pre_close = np.empty(n_bars)
+    price = 10.0
+    for i in range(n_bars):
+        pre_close[i] = price
+        price = np.floor(price * (1 + pct[i] / 100) * 100 + 0.5 + 1e-6) / 100
+        close[i] = price
+    pct_chg = (close / pre_close - 1) * 100
+
+    dates = pd.bdate_range("2015-01-01", periods=n_bars).strftime("%Y%m%d")
+    return pd.DataFrame({
+        'ts_code': '000001.SZ',
+        'trade_date': dates,
+        'close': close,
+        'pre_close': pre_close,
+        'pct_chg': pct_chg,
+    })
+
+
+def legacy_find(df: pd.DataFrame, threshold: float = 9.5) -> list[dict]:
+    """原 DataClient.find_consecutive_limit_up 的逐行实现（作为对照）"""
+    if df.empty:
+        return []
+
+    df['is_limit_up'] = df['pct_chg'] >= threshold
+
+    result = []
+    current_streak = []
+
+    for idx, row in df.iterrows():
+        if row['is_limit_up']:
+            current_streak.append({
+                'date': row['trade_date'],
+                'close': row['close'],
+                'pct_chg': row['pct_chg']
+            })
+        else:
+            if len(current_streak) >= 3:
+                result.append({
+                    'start_date': current_streak[0]['date'],
+                    'start_price': current_streak[0]['close'],
+                    'count': len(current_streak),
+                    'limit_up_days': [x['date'] for x in current_streak]
+                })
+            current_streak = []
+
+    if len(current_streak) >= 3:
+        result.append({
+            'start_date': current_streak[0]['date'],
+            'start_price': current_streak[0]['close'],
+            'count': len(current_streak),
+            'limit_up_days': [x['date'] for x in current_streak]
+        })
+
+    return result
+
+
+def vectorized_find(df: pd.DataFrame) -> list[dict]:
+    return find_limit_up_periods(
+        df['trade_date'].to_numpy(dtype=object),
+        df['close'].to_numpy(dtype=float),
+        df['pre_close'].to_numpy(dtype=float),
+        df['pct_chg'].to_numpy(dtype=float),
+        rate=MAIN_BOARD_LIMIT,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=8, help="每个序列的年数")
+    parser.add_argument("--series", type=int, default=200, help="序列数量")
+    args = parser.parse_args()
+
+    n_bars = args.years * 245
+    frames = [make_series(n_bars, seed) for seed in range(args.series)]
+
+    # 结果一致性检查
+    for df in frames[:10]:
+        old = [(p['start_date'], p['count']) for p in legacy_find(df.copy())]
+        new = [(p['start_date'], p['count']) for p in vectorized_find(df)]
+        assert old == new, f"结果不一致: {old} != {new}"
+
+    start = time.perf_counter()
+    for df in frames:
+        legacy_find(df.copy())
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for df in frames:
+        vectorized_find(df)
+    vectorized = time.perf_counter() - start
+
+    print(f"{args.series} 个序列 × {n_bars} 根日线")
+    print(f"  iterrows 循环: {legacy * 1000:9.1f} ms ({legacy / args.series * 1e6:8.1f} µs/序列)")
+    print(f"  NumPy 向量化:  {vectorized * 1000:9.1f} ms ({vectorized / args.series * 1e6:8.1f} µs/序列)")
+    print(f"  加速比: {legacy / vectorized:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""矩阵引擎基准：全市场规模的本地数据一次性筛选耗时
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_panel [--stocks 5000] [--bars 120]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from app.core.bar_store import BarStore
+from app.core.panel import load_panel, screen_panel
+from benchmarks.bench_limit_up import make_series
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--stocks", type=int, default=5000, help="股票数量")
+    parser.add_argument("--bars", type=int, default=120, help="每只股票的日线数量")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as root:
+        store = BarStore(Path(root))
+        templates = [make_series(args.bars, seed, drift=-0.5).assign(open=0.0, high=0.0, low=0.0, vol=0.0, amount=0.0)
+                     for seed in range(50)]
+        codes = [f"{600000 + i:06d}.SH" for i in range(args.stocks)]
+        for i, ts_code in enumerate(codes):
+            store.merge(ts_code, templates[i % len(templates)], "20150101", "20301231")
+        info = pd.DataFrame({'ts_code': codes, 'name': '', 'industry': ''})
+
+        for label, cold in (("冷启动（读磁盘）", True), ("热数据（内存）", False)):
+            if cold:
+                store = BarStore(Path(root))
+            start = time.perf_counter()
+            panel = load_panel(codes, "20150101", "20301231", store=store)
+            loaded = time.perf_counter()
+            results = screen_panel(panel, info)
+            done = time.perf_counter()
+            print(f"{label}: {args.stocks} 只 × {panel.shape[0]} 日  "
+                  f"加载 {(loaded - start) * 1000:.0f} ms, 计算 {(done - loaded) * 1000:.0f} ms, "
+                  f"命中 {len(results)} 只")
+
+
+if __name__ == "__main__":
+    main()
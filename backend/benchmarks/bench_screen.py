@@ -0,0 +1,152 @@
+"""端到端筛选基准：合成数据源 + 真实筛选流程，离线测量吞吐、延迟、写库耗时和峰值内存
+
+每个规模在独立子进程中运行（独立的临时数据目录，峰值内存互不影响），依次测量：
+    冷启动  本地无数据，经合成数据源（模拟延迟和失败）拉取后逐只筛选
+    热数据  重复筛选，命中本地日线和筛选备忘
+    矩阵    矩阵引擎在本地数据上一次性筛选
+    写库    结果写入任务表（create_task + append_task_results + finalize）
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_screen [--sizes 200 1000 5000] [--latency-ms 5] [--error-rate 0.01]
+    python -m benchmarks.bench_screen --save baseline.json
+    python -m benchmarks.bench_screen --baseline baseline.json [--tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# 各项指标：(键, 表头, 数值越大越好, 比较时忽略的绝对变化量)
+METRICS = [
+    ("cold_rate", "冷启动 只/秒", True, 0),
+    ("cold_seconds", "冷启动 秒", False, 0.05),
+    ("warm_seconds", "热数据 秒", False, 0.05),
+    ("panel_seconds", "矩阵 秒", False, 0.05),
+    ("db_write_ms", "写库 ms", False, 20),
+    ("peak_mb", "峰值内存 MB", False, 10),
+]
+
+
+def run_size(n_stocks: int, latency: float, error_rate: float, lookback_days: int) -> dict:
+    """在当前进程中测量一个规模（由子进程调用，数据目录已指向临时目录）"""
+    from app.core.config import settings
+    from app.core.fake_client import FakeDataClient
+    from app.core.trade_calendar import trade_calendar
+    from app.database import create_task, append_task_results, finalize_task_results
+
+    client = FakeDataClient(n_stocks, latency=latency, error_rate=error_rate)
+    trade_calendar.fetcher = client.fetch_trade_calendar
+
+    start = time.perf_counter()
+    results = client.screen_stocks_progressive(lookback_days=lookback_days, max_stocks=n_stocks,
+                                               workers=settings.fetch_workers)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    client.screen_stocks_progressive(lookback_days=lookback_days, max_stocks=n_stocks,
+                                     workers=settings.fetch_workers)
+    warm = time.perf_counter() - start
+
+    start = time.perf_counter()
+    client.screen_stocks_panel(lookback_days=lookback_days, max_stocks=n_stocks)
+    panel = time.perf_counter() - start
+
+    start = time.perf_counter()
+    task_id = f"bench_{n_stocks}"
+    create_task(task_id, lookback_days, n_stocks, n_stocks)
+    append_task_results(task_id, results)
+    finalize_task_results(task_id, "完成")
+    db_write = time.perf_counter() - start
+
+    return {
+        "stocks": n_stocks,
+        "found": len(results),
+        "calls": client.calls,
+        "errors": client.errors,
+        "cold_rate": n_stocks / cold,
+        "cold_seconds": cold,
+        "warm_seconds": warm,
+        "panel_seconds": panel,
+        "db_write_ms": db_write * 1000,
+        # Linux 上 ru_maxrss 的单位为 KB
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def spawn(n_stocks: int, args) -> dict:
+    """在独立子进程和临时数据目录中测量一个规模"""
+    with tempfile.TemporaryDirectory() as root:
+        env = dict(os.environ, SCREENER_DATA_DIR=root)
+        env.setdefault("TUSHARE_TOKEN", "offline")
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_screen", "--child", str(n_stocks),
+             "--latency-ms", str(args.latency_ms), "--error-rate", str(args.error_rate),
+             "--lookback", str(args.lookback)],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def compare(rows: list[dict], baseline: list[dict], tolerance: float) -> list[str]:
+    """与基线比较，返回退化超过 tolerance 的指标说明"""
+    previous = {row["stocks"]: row for row in baseline}
+    regressions = []
+    for row in rows:
+        base = previous.get(row["stocks"])
+        if base is None:
+            continue
+        for key, label, higher_better, noise in METRICS:
+            if not base.get(key) or abs(row[key] - base[key]) <= noise:
+                continue
+            change = (row[key] - base[key]) / base[key]
+            if (-change if higher_better else change) > tolerance:
+                regressions.append(f"{row['stocks']} 只 {label}: {base[key]:.2f} -> {row[key]:.2f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 1000, 5000], help="股票数量")
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="合成数据源每次请求的平均延迟（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.01, help="合成数据源请求失败概率")
+    parser.add_argument("--lookback", type=int, default=180, help="回溯天数")
+    parser.add_argument("--save", help="把结果保存为 JSON（作为之后比较的基线）")
+    parser.add_argument("--baseline", help="与之前保存的基线比较，退化超过 tolerance 时返回非零")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="允许的退化比例")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        row = run_size(args.child, args.latency_ms / 1000, args.error_rate, args.lookback)
+        print(json.dumps(row))
+        return
+
+    rows = []
+    print(f"合成数据源: 延迟 {args.latency_ms} ms, 失败率 {args.error_rate:.0%}, 回溯 {args.lookback} 天")
+    print(f"{'股票数':>8}{'命中':>8}" + "".join(f"{label:>14}" for _, label, _, _ in METRICS))
+    for n_stocks in args.sizes:
+        row = spawn(n_stocks, args)
+        rows.append(row)
+        print(f"{row['stocks']:>8}{row['found']:>8}" + "".join(f"{row[key]:>14.2f}" for key, _, _, _ in METRICS))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(rows, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(rows, json.load(f), args.tolerance)
+        if regressions:
+            print("性能退化:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("未发现超过阈值的退化")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""启动耗时基准：导入 app.main 到 /api/health 首次响应的时间
+
+每次测量都在新的子进程中进行（导入缓存互不影响），分两种方式：
+    延迟导入  当前行为，Tushare/AkShare 在首次使用或后台预热时才导入
+    预先导入  先导入 Tushare/AkShare 再导入 app.main（模拟改为延迟导入之前的启动过程）
+
+用法（在 backend 目录下）:
+    python -m benchmarks.bench_startup [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HEAVY_MODULES = ("tushare", "akshare")
+
+
+def run_child(eager: bool) -> dict:
+    """在当前进程中测量一次启动（由子进程调用）"""
+    started = time.perf_counter()
+    if eager:
+        for module in HEAVY_MODULES:
+            try:
+                __import__(module)
+            except ImportError:
+                pass
+    from app.main import app
+    imported = time.perf_counter()
+    loaded = [m for m in HEAVY_MODULES if m in sys.modules]
+
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        client.get("/api/health").raise_for_status()
+        health = time.perf_counter()
+
+    return {
+        "import_seconds": imported - started,
+        "health_seconds": health - started,
+        "loaded_at_import": loaded,
+    }
+
+
+def spawn(eager: bool) -> dict:
+    """在独立子进程和临时数据目录中测量一次"""
+    with tempfile.TemporaryDirectory() as root:
+        env = dict(os.environ, SCREENER_DATA_DIR=root, PREFETCH_ENABLED="false")
+        env.setdefault("TUSHARE_TOKEN", "offline")
+        command = [sys.executable, "-m", "benchmarks.bench_startup", "--child"]
+        if eager:
+            command.append("--eager")
+        out = subprocess.run(command, env=env, capture_output=True, text=True, check=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=5, help="每种方式测量次数（取中位数）")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--eager", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(args.eager)))
+        return
+
+    installed = [m for m in HEAVY_MODULES if subprocess.run(
+        [sys.executable, "-c", f"import {m}"], capture_output=True).returncode == 0]
+    print(f"已安装的数据源库: {', '.join(installed) or '无'}（未安装的库不计入预先导入的耗时）")
+    print(f"{'方式':<10}{'导入 秒':>10}{'首次健康检查 秒':>18}  导入时已加载")
+
+    medians = {}
+    for label, eager in (("延迟导入", False), ("预先导入", True)):
+        runs = [spawn(eager) for _ in range(args.repeat)]
+        import_s = statistics.median(r["import_seconds"] for r in runs)
+        health_s = statistics.median(r["health_seconds"] for r in runs)
+        medians[eager] = health_s
+        loaded = ", ".join(runs[0]["loaded_at_import"]) or "-"
+        print(f"{label:<10}{import_s:>10.3f}{health_s:>18.3f}  {loaded}")
+
+    saved = medians[True] - medians[False]
+    print(f"首次健康检查提前 {saved:.3f} 秒 ({saved / medians[True]:.0%})")
+
+
+if __name__ == "__main__":
+    main()
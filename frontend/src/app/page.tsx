@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect, useMemo, useCallback } from "react";
+import { useState, useEffect, useMemo, useCallback, useRef } from "react";
 import { useLanguage } from "@/contexts/LanguageContext";
 import { StockTable } from "@/components/stock-table";
 import { StockChart } from "@/components/stock-chart";
@@ -22,6 +22,7 @@ interface StockInfo {
   limit_up_count: number;
   drop_ratio: number;
   industry: string;
+  seq?: number;
 }
 
 interface StockDetail {
@@ -43,6 +44,11 @@ interface StockDetail {
   }>;
 }
 
+// 列式日线：每个字段一个数组
+type ColumnarDailyData = {
+  [K in keyof StockDetail["daily_data"][number]]: StockDetail["daily_data"][number][K][];
+};
+
 interface ProgressState {
   current: number;
   total: number;
@@ -82,6 +88,7 @@ export default function Home() {
   const [currentTaskResults, setCurrentTaskResults] = useState<StockInfo[]>([]);
   const [sectors, setSectors] = useState<{name: string, code: string, type: string}[]>([]);
   const [selectedSector, setSelectedSector] = useState<string>("");
+  const [taskId, setTaskId] = useState<string | null>(null);
 
   // 获取所有板块
   useEffect(() => {
@@ -100,45 +107,118 @@ export default function Home() {
     fetchSectors();
   }, []);
 
-  // 轮询进度
+  // 推送回调里读取最新的提示文案，避免语言切换时重新建立连接
+  const noResultsDescRef = useRef(t.noResultsDesc);
+  noResultsDescRef.current = t.noResultsDesc;
+
+  // 订阅进度推送（SSE），新发现的股票实时追加
+  // 每个任务只建立一个连接（暂停/继续不重连），按 seq 去重；重连或事件被丢弃时用 since 游标补取
   useEffect(() => {
-    if (screeningState === 'idle') return;
+    if (!taskId) return;
+
+    const query = `task_id=${encodeURIComponent(taskId)}`;
+    const source = new EventSource(`${API_BASE}/api/screen/stream?${query}`);
+    // 下一个期望的结果序号
+    let cursor = 0;
+    let catchingUp = false;
+    let pendingCatchUp = false;
+    // 任务结束（已取完整结果）或连接关闭后不再追加
+    let closed = false;
+
+    const appendRows = (rows: StockInfo[]) => {
+      if (closed) return;
+      const fresh = rows.filter(row => row.seq === undefined || row.seq >= cursor);
+      if (fresh.length === 0) return;
+      for (const row of fresh) {
+        if (row.seq !== undefined) cursor = Math.max(cursor, row.seq + 1);
+      }
+      setStocks(prev => [...prev, ...fresh]);
+    };
 
-    const interval = setInterval(async () => {
+    const catchUp = async () => {
+      if (catchingUp) {
+        pendingCatchUp = true;
+        return;
+      }
+      catchingUp = true;
       try {
-        const res = await fetch(`${API_BASE}/api/screen/progress`);
-        if (res.ok) {
-          const data = await res.json();
-          setProgress(data);
-
-          // 更新状态
-          if (data.status.includes('running')) {
-            setScreeningState('running');
-          } else if (data.status.includes('已暂停')) {
-            setScreeningState('paused');
-          } else if (data.status.includes('完成') || data.status.includes('已取消') || data.status.includes('错误')) {
-            setScreeningState('idle');
-            // 获取结果
-            const resultsRes = await fetch(`${API_BASE}/api/screen/results`);
-            if (resultsRes.ok) {
-              const results = await resultsRes.json();
-              setStocks(results);
-              setCurrentTaskResults(results);
-              if (results.length === 0) {
-                setError(t.noResultsDesc);
-              } else {
-                setError("");
-              }
+        do {
+          pendingCatchUp = false;
+          if (closed) break;
+          const res = await fetch(`${API_BASE}/api/screen/results?${query}&since=${cursor}`);
+          if (res.ok) {
+            const data: { cursor: number; results: StockInfo[] } = await res.json();
+            appendRows(data.results);
+            cursor = Math.max(cursor, data.cursor);
+          }
+        } while (pendingCatchUp);
+      } catch (err) {
+        console.error('Failed to catch up results:', err);
+      } finally {
+        catchingUp = false;
+      }
+    };
+
+    // 首次连接和断线自动重连后都补取一次
+    source.addEventListener('open', () => {
+      catchUp();
+    });
+
+    source.addEventListener('resync', () => {
+      catchUp();
+    });
+
+    source.addEventListener('progress', async (event) => {
+      const data: ProgressState = JSON.parse((event as MessageEvent).data);
+      setProgress(data);
+
+      // 更新状态
+      if (data.status.includes('running')) {
+        setScreeningState('running');
+      } else if (data.status.includes('已暂停')) {
+        setScreeningState('paused');
+      } else if (data.status.includes('完成') || data.status.includes('已取消') || data.status.includes('错误')) {
+        closed = true;
+        source.close();
+        setScreeningState('idle');
+        // 获取完整结果（按回落幅度排序）
+        try {
+          const resultsRes = await fetch(`${API_BASE}/api/screen/results?${query}`);
+          if (resultsRes.ok) {
+            const results = await resultsRes.json();
+            setStocks(results);
+            setCurrentTaskResults(results);
+            if (results.length === 0) {
+              setError(noResultsDescRef.current);
+            } else {
+              setError("");
             }
           }
+        } catch (err) {
+          console.error('Failed to fetch results:', err);
         }
-      } catch (err) {
-        console.error('Failed to fetch progress:', err);
       }
-    }, 500);
+    });
+
+    source.addEventListener('result', (event) => {
+      const stock: StockInfo = JSON.parse((event as MessageEvent).data);
+      if (stock.seq !== undefined && stock.seq > cursor) {
+        // 中间有结果没收到，从游标处补取（包含这一条）
+        catchUp();
+        return;
+      }
+      appendRows([stock]);
+    });
 
-    return () => clearInterval(interval);
-  }, [screeningState, t.noResultsDesc]);
+    source.onerror = (err) => {
+      console.error('Progress stream error:', err);
+    };
+
+    return () => {
+      closed = true;
+      source.close();
+    };
+  }, [taskId]);
 
   const handleStart = async () => {
     setError("");
@@ -160,6 +240,7 @@ export default function Home() {
       const data = await res.json();
 
       if (res.ok) {
+        setTaskId(data.task_id);
         setScreeningState('running');
         setProgress(prev => ({ ...prev, task_id: data.task_id, total_batches: data.batches || 1 }));
       } else {
@@ -171,30 +252,44 @@ export default function Home() {
   };
 
   const handlePause = async () => {
-    await fetch(`${API_BASE}/api/screen/pause`, { method: 'POST' });
+    if (!taskId) return;
+    await fetch(`${API_BASE}/api/screen/pause?task_id=${encodeURIComponent(taskId)}`, { method: 'POST' });
     setScreeningState('paused');
   };
 
   const handleResume = async () => {
-    await fetch(`${API_BASE}/api/screen/resume`, { method: 'POST' });
+    if (!taskId) return;
+    await fetch(`${API_BASE}/api/screen/resume?task_id=${encodeURIComponent(taskId)}`, { method: 'POST' });
     setScreeningState('running');
   };
 
   const handleCancel = async () => {
-    await fetch(`${API_BASE}/api/screen/cancel`, { method: 'POST' });
+    if (!taskId) return;
+    await fetch(`${API_BASE}/api/screen/cancel?task_id=${encodeURIComponent(taskId)}`, { method: 'POST' });
     setScreeningState('idle');
   };
 
   const handleSelectStock = async (tsCode: string, name: string) => {
     try {
-      const response = await fetch(`${API_BASE}/api/stock/${tsCode}?lookback_days=${lookbackDays[0]}`);
+      const response = await fetch(`${API_BASE}/api/stock/${tsCode}?lookback_days=${lookbackDays[0]}&format=columnar`);
 
       if (!response.ok) {
         throw new Error("Failed to fetch stock details");
       }
 
       const data = await response.json();
-      setSelectedStock(data);
+      const columns: ColumnarDailyData = data.daily_data;
+      setSelectedStock({
+        ...data,
+        daily_data: columns.trade_date.map((trade_date, i) => ({
+          trade_date,
+          open: columns.open[i],
+          high: columns.high[i],
+          low: columns.low[i],
+          close: columns.close[i],
+          pct_chg: columns.pct_chg[i],
+        })),
+      });
     } catch (err) {
       setError(err instanceof Error ? err.message : t.unknown);
     }